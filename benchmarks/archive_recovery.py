@@ -0,0 +1,101 @@
+# Crash-recovery check for the archive's year files (jweather.archive): writes
+# a file in three chunks, then cuts it at every byte offset (a write torn at
+# that point) and also appends a zero-filled tail. Each damaged copy must still
+# open, return exactly the hours of its complete chunks, and be repaired by the
+# next append. Exits with status 1 when any offset breaks one of those.
+#   python benchmarks/archive_recovery.py
+import os
+import shutil
+import sys
+import tempfile
+from array import array
+from datetime import date
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jweather.archive import ArchiveStore, _hour_start  # noqa: E402
+from jweather.frame import ForecastFrame  # noqa: E402
+
+LAT, LON = 48.85, 2.35
+DAY = date(2024, 3, 1)
+CHUNK_HOURS = (24, 30, 18)
+
+
+def make_frame(hours):
+    t0 = _hour_start(DAY)
+    return ForecastFrame(array('q', range(t0, t0 + hours * 3600, 3600)), {
+        'temperature_2m': array('f', (i * 0.1 for i in range(hours))),
+        'precipitation': array('f', (float(i % 5) for i in range(hours))),
+    })
+
+
+def check(store, path, data, expect_hours, full):
+    # Returns a failure reason, or None
+    with open(path, 'wb') as fh:
+        fh.write(data)
+    try:
+        got = store.query(LAT, LON, DAY, date(2024, 3, 10))
+    except Exception as e:
+        return f"query raised {type(e).__name__}: {e}"
+    if len(got) != expect_hours:
+        return f"query returned {len(got)} hours, expected {expect_hours}"
+    if got.times.tolist() != full.times[:expect_hours].tolist():
+        return "query returned the wrong hours"
+    try:
+        store.append(LAT, LON, full)
+        repaired = store.query(LAT, LON, DAY, date(2024, 3, 10))
+    except Exception as e:
+        return f"append after the cut raised {type(e).__name__}: {e}"
+    if repaired.times.tolist() != full.times.tolist():
+        return f"append left {len(repaired)} hours, expected {len(full)}"
+    for name, col in full.columns.items():
+        got_col = repaired.columns.get(name)
+        if got_col is None or got_col.tobytes() != col.tobytes():
+            return f"append left wrong values in {name}"
+    return None
+
+
+def main():
+    root = tempfile.mkdtemp(prefix="jweather-archive-check-")
+    try:
+        full = make_frame(sum(CHUNK_HOURS))
+        writer = ArchiveStore(root=root)
+        stop = 0
+        for hours in CHUNK_HOURS:
+            stop += hours
+            writer.append(LAT, LON, make_frame(stop))
+        path = writer._path(LAT, LON, DAY.year)
+        with open(path, 'rb') as fh:
+            original = fh.read()
+        _, chunks, valid_end = writer._index(path)
+        if valid_end != len(original) or [c[1] for c in chunks] != list(CHUNK_HOURS):
+            print(f"FAIL setup: expected chunks of {CHUNK_HOURS} hours, got {[c[1] for c in chunks]}")
+            return 1
+        # Byte offset where each chunk ends, with the hours stored up to there
+        ends = []
+        hours = 0
+        for _, n, offset, lengths in chunks:
+            hours += n
+            ends.append((offset + sum(lengths), hours))
+
+        failures = 0
+        cases = [(cut, original[:cut]) for cut in range(len(original))]
+        cases.append(('zero tail', original + bytes(64)))
+        for cut, data in cases:
+            size = len(data) if cut == 'zero tail' else cut
+            expect = max([h for end, h in ends if end <= size], default=0)
+            # A fresh store each time, so no index is cached from the last cut
+            reason = check(ArchiveStore(root=root), path, data, expect, full)
+            if reason is not None:
+                failures += 1
+                print(f"FAIL cut at {cut} of {len(original)} bytes: {reason}")
+        print(f"{len(cases)} damaged copies of a {len(original)}-byte year file checked, {failures} failed")
+        if not failures:
+            print("OK: every torn file opened, kept its complete chunks and was repaired by the next append")
+        return 1 if failures else 0
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+# Checkpoint/resume check for the batch mode (python -m jweather) against the
+# stub server, for NDJSON and CSV output:
+#   1. every row fails (upstream down): the output must not be truncated later
+#   2. a run interrupted part-way through the input
+#   3. resumed runs until nothing is left to do
+# Afterwards the output must hold exactly one success record per valid id and
+# no error records, the checkpoint exactly the valid ids, and
+# <checkpoint>.failed only the row that can never succeed. Exits with status 1
+# otherwise.
+#   python benchmarks/cli_resume.py
+import csv
+import json
+import os
+import shutil
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("JWEATHER_HOME", tempfile.mkdtemp(prefix="jweather-bench-"))
+
+from stub_server import StubServer  # noqa: E402
+from jweather import cli, config  # noqa: E402
+
+ROWS = 120
+BAD_ID = "bad"
+
+
+class Interrupted(Exception):
+    pass
+
+
+def write_input(path):
+    with open(path, 'w', newline='', encoding='utf-8') as fh:
+        out = csv.writer(fh)
+        out.writerow(['id', 'lat', 'lon'])
+        for i in range(ROWS):
+            out.writerow([f"r{i}", round(-60 + i * 1.01, 3), round(-170 + i * 2.77, 3)])
+        out.writerow([BAD_ID, 999, 0])
+
+
+def interrupt_after(rows, n):
+    for i, row in enumerate(rows):
+        if i == n:
+            raise Interrupted()
+        yield row
+
+
+def output_ids(fmt, path):
+    ids, errors = [], []
+    with open(path, newline='', encoding='utf-8') as fh:
+        rows = csv.DictReader(fh) if fmt == 'csv' else (json.loads(line) for line in fh if line.strip())
+        for row in rows:
+            (errors if row.get('error') else ids).append(row['id'])
+    return ids, errors
+
+
+def check(fmt, work, stub):
+    source = os.path.join(work, 'in.csv')
+    output = os.path.join(work, 'out.' + fmt)
+    ckpt = output + '.ckpt'
+    write_input(source)
+    argv = ['-i', source, '-f', fmt, '-o', output, '--checkpoint', ckpt, '-q', '--replay', 'off', '--batch-size', '10']
+
+    # 1: upstream down, every row fails
+    cli.main(argv + ['--forecast-url', 'http://127.0.0.1:1/v1/forecast'])
+    # 2: interrupted after half the input, resuming the same way main() does
+    config.FORECAST_URL = stub.forecast_url
+    writer = cli.open_writer(fmt, output, resume=os.path.exists(ckpt))
+    try:
+        cli.run(interrupt_after(cli.read_locations(source), ROWS // 2), writer, ckpt,
+                cli.load_checkpoint(ckpt), workers=2, batch_size=10)
+    except Interrupted:
+        pass
+    if not cli.load_checkpoint(ckpt):
+        return ["the interrupted run checkpointed nothing; the check would not exercise a resume"]
+    # 3: resumed until done; the last run has nothing left to fetch
+    for _ in range(2):
+        cli.main(argv + ['--forecast-url', stub.forecast_url])
+
+    failures = []
+    ids, errors = output_ids(fmt, output)
+    want = [f"r{i}" for i in range(ROWS)]
+    if errors:
+        failures.append(f"{len(errors)} error records in the output")
+    if sorted(ids) != sorted(want):
+        dupes = len(ids) - len(set(ids))
+        failures.append(f"output holds {len(ids)} records for {len(set(ids))} ids ({dupes} duplicates), expected {ROWS}")
+    if cli.load_checkpoint(ckpt) != set(want):
+        failures.append(f"checkpoint holds {len(cli.load_checkpoint(ckpt))} ids, expected {ROWS}")
+    failed = []
+    if os.path.exists(ckpt + '.failed'):
+        with open(ckpt + '.failed', encoding='utf-8') as fh:
+            # One JSON error record per line (bare ids in older versions)
+            failed = [json.loads(line)['id'] if line.startswith('{') else line.strip() for line in fh if line.strip()]
+    if failed != [BAD_ID]:
+        failures.append(f"{ckpt}.failed lists {failed}, expected ['{BAD_ID}']")
+    return failures
+
+
+def main():
+    stub = StubServer().start()
+    failed = False
+    try:
+        for fmt in ('ndjson', 'csv'):
+            work = tempfile.mkdtemp(prefix="jweather-resume-")
+            try:
+                failures = check(fmt, work, stub)
+            finally:
+                shutil.rmtree(work, ignore_errors=True)
+            for reason in failures:
+                print(f"FAIL {fmt}: {reason}")
+            if not failures:
+                print(f"OK {fmt}: one record per id after a failed, an interrupted and two resumed runs")
+            failed = failed or bool(failures)
+    finally:
+        stub.stop()
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
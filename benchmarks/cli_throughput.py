@@ -0,0 +1,56 @@
+# Throughput of the headless batch mode (locations per second) against the
+# local stub server, compared with one fetch_weather call per location.
+#   python benchmarks/cli_throughput.py --points 2000 --latency 0.05
+import argparse
+import io
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("JWEATHER_HOME", tempfile.mkdtemp(prefix="jweather-bench-"))
+
+from stub_server import StubServer  # noqa: E402
+from jweather import cli, config  # noqa: E402
+
+
+def make_points(n, seed=7):
+    rnd = random.Random(seed)
+    return [(str(i), f"p{i}", round(rnd.uniform(-80, 80), 3), round(rnd.uniform(-170, 170), 3)) for i in range(n)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--points", type=int, default=1000)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--workers", type=int, default=cli.CLI_WORKERS)
+    parser.add_argument("--batch-size", type=int, default=cli.CLI_BATCH_SIZE)
+    parser.add_argument("--sequential-sample", type=int, default=50, help="points used to time the one-by-one baseline")
+    args = parser.parse_args()
+
+    stub = StubServer(latency=args.latency).start()
+    config.FORECAST_URL = stub.forecast_url
+    config.GEOCODING_URL = stub.geocoding_url
+    from jweather.forecast import fetch_weather
+
+    points = make_points(args.points)
+    sample = points[:args.sequential_sample]
+    t = time.perf_counter()
+    for _, _, lat, lon in sample:
+        fetch_weather(lat, lon)
+    seq_rate = len(sample) / (time.perf_counter() - t)
+
+    out = io.StringIO()
+    t = time.perf_counter()
+    written, failed = cli.run(points, cli.NdjsonWriter(out), workers=args.workers, batch_size=args.batch_size)
+    elapsed = time.perf_counter() - t
+    stub.stop()
+    print(f"sequential fetch_weather : {seq_rate:8.1f} loc/s")
+    print(f"batch mode               : {written / elapsed:8.1f} loc/s  ({written} written, {failed} failed, {elapsed:.2f}s)")
+    print(f"speedup                  : {written / elapsed / seq_rate:8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
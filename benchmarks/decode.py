@@ -0,0 +1,112 @@
+# Parse cost of large forecast payloads: time and peak memory to turn a
+# response body into a bundle with each available JSON codec, and how much a
+# trimmed variable set (what the GUI views request) saves against the full one.
+#   python benchmarks/decode.py --days 16 --past-days 7 --hourly-vars 20
+#   python benchmarks/decode.py --payload recorded.json
+# Each measurement runs in a fresh interpreter so peak RSS is not shared.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+EXTRA_HOURLY = [
+    "relative_humidity_2m", "dew_point_2m", "apparent_temperature", "precipitation_probability", "precipitation",
+    "rain", "showers", "snowfall", "snow_depth", "weather_code", "pressure_msl", "surface_pressure",
+    "cloud_cover", "cloud_cover_low", "cloud_cover_mid", "cloud_cover_high", "visibility", "evapotranspiration",
+    "wind_speed_10m", "wind_speed_80m", "wind_direction_10m", "wind_gusts_10m", "uv_index", "is_day",
+    "sunshine_duration", "cape", "freezing_level_height", "soil_temperature_0cm", "soil_moisture_0_to_1cm",
+]
+
+
+def make_payload(days, past_days, hourly_vars):
+    from datetime import date, timedelta
+    sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+    from stub_server import forecast_payload
+    names = ["temperature_2m"] + EXTRA_HOURLY[:max(0, hourly_vars - 1)]
+    return forecast_payload(48.85, 2.35, names, days + past_days, date.today() - timedelta(days=past_days))
+
+
+def child(codec, path, repeat):
+    import resource
+    import tracemalloc
+    from jweather import codec as jcodec
+    from jweather.bundle import bundle_from_payload
+    jcodec.use_codec(codec)
+    with open(path, 'rb') as fh:
+        body = fh.read()
+    # Warm up imports (NumPy for the aggregation) before taking the RSS baseline
+    bundle_from_payload(48.85, 2.35, jcodec.loads(body))
+    base_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    decode = build = float('inf')
+    for _ in range(repeat):
+        t = time.perf_counter()
+        data = jcodec.loads(body)
+        t1 = time.perf_counter()
+        bundle_from_payload(48.85, 2.35, data)
+        decode = min(decode, t1 - t)
+        build = min(build, time.perf_counter() - t1)
+        del data
+    tracemalloc.start()
+    bundle = bundle_from_payload(48.85, 2.35, jcodec.loads(body))
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    del bundle
+    print(json.dumps({
+        'decode_ms': decode * 1000,
+        'build_ms': build * 1000,
+        'peak_kb': peak / 1024,
+        'rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - base_rss,
+    }))
+
+
+def measure(codec, path, repeat):
+    out = subprocess.run([sys.executable, __file__, '--child', codec, path, str(repeat)],
+                         capture_output=True, text=True)
+    if out.returncode != 0:
+        return None
+    return json.loads(out.stdout)
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--child':
+        return child(sys.argv[2], sys.argv[3], int(sys.argv[4]))
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--payload', help="recorded forecast response (JSON file) instead of a synthetic one")
+    parser.add_argument('--days', type=int, default=16)
+    parser.add_argument('--past-days', type=int, default=7)
+    parser.add_argument('--hourly-vars', type=int, default=20)
+    parser.add_argument('--repeat', type=int, default=10)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix='jweather-decode-')
+    cases = []
+    if args.payload:
+        cases.append(('recorded', args.payload))
+    else:
+        full = os.path.join(tmp, 'full.json')
+        with open(full, 'w') as fh:
+            json.dump(make_payload(args.days, args.past_days, args.hourly_vars), fh)
+        trimmed = os.path.join(tmp, 'trimmed.json')
+        with open(trimmed, 'w') as fh:
+            json.dump(make_payload(args.days, args.past_days, 1), fh)
+        cases += [(f'full ({args.hourly_vars} hourly vars)', full), ('trimmed (views only)', trimmed)]
+
+    for label, path in cases:
+        print(f"{label}: {os.path.getsize(path) / 1024:.0f} KiB")
+        for name in ('json', 'orjson', 'msgspec'):
+            result = measure(name, path, args.repeat)
+            if result is None:
+                print(f"  {name:<8} not installed")
+                continue
+            print(f"  {name:<8} decode {result['decode_ms']:7.2f} ms   frames+aggregates {result['build_ms']:7.2f} ms   "
+                  f"peak {result['peak_kb']:7.0f} KiB   rss +{result['rss_kb']:5.0f} KiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,96 @@
+# Frame-latency check for the background fetch engine: drives the GUI against a
+# deliberately slow stub upstream (fetches, a superseding fetch, a city lookup
+# and a cache hit while requests are on the wire) and fails when the Tk event
+# loop stalls. Needs a display; run under xvfb-run on CI.
+#   xvfb-run python benchmarks/frame_latency.py --latency 2 --budget-ms 16
+# Exits with status 1 when the worst UI-queue drain tick or event-loop lag is
+# over the budget, or when no forecast was drawn at all.
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("JWEATHER_HOME", tempfile.mkdtemp(prefix="jweather-bench-"))
+
+from stub_server import StubServer  # noqa: E402
+from jweather import config, trace  # noqa: E402
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else float('nan')
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--latency", type=float, default=2.0, help="seconds the stub adds to every response")
+    parser.add_argument("--jitter", type=float, default=0.5)
+    parser.add_argument("--budget-ms", type=float, default=16.0)
+    args = parser.parse_args()
+
+    if not (os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin")):
+        print("no display: skipping frame-latency check (run under xvfb-run)")
+        return 0
+
+    stub = StubServer(latency=args.latency, jitter=args.jitter, days=16).start()
+    config.FORECAST_URL = stub.forecast_url
+    config.GEOCODING_URL = stub.geocoding_url
+    config.ARCHIVE_URL = stub.archive_url
+    from jweather.app import create_app
+
+    app = create_app(auto_locate=False, auto_refresh=False)
+    app.window.update()
+    trace.enable()
+    trace.clear()
+
+    def fetch_city():
+        app.city_entry.delete(0, 'end')
+        app.city_entry.insert(0, "Berlin")
+        app.fetch_city()
+
+    # Everything below is scheduled on the Tk loop itself, as a user would click
+    wait = int((args.latency + args.jitter) * 1000)
+    app.window.after(0, lambda: app.perform_fetch(48.85, 2.35))
+    app.window.after(150, lambda: app.perform_fetch(40.71, -74.01))   # supersedes the first
+    app.window.after(300, fetch_city)
+    app.window.after(2 * wait + 600, lambda: app.perform_fetch(48.85, 2.35))   # cached by now
+    app.window.after(2 * wait + 750, app.show_hourly_explorer)
+    app.window.after(3 * wait + 1500, app.window.quit)
+    app.window.mainloop()
+    trace.enable(False)
+
+    drain, lag, callbacks = [], [], {}
+    for name, _, dur, _, _ in trace.spans():
+        if name == 'tk.drain':
+            drain.append(dur / 1e6)
+        elif name == 'tk.loop_lag':
+            lag.append(dur / 1e6)
+        elif name.startswith('ui.'):
+            callbacks.setdefault(name, []).append(dur / 1e6)
+    stub.stop()
+
+    print(f"stub latency {args.latency:.1f}s (+{args.jitter:.1f}s jitter), {sum(stub.requests.values())} upstream requests")
+    rows = [("tk.drain", drain), ("tk.loop_lag", lag)] + sorted(callbacks.items())
+    for name, values in rows:
+        print(f"{name:24s} n {len(values):5d}  p50 {percentile(values, 50):7.2f} ms  "
+              f"p99 {percentile(values, 99):7.2f} ms  max {max(values, default=0):7.2f} ms")
+
+    failed = []
+    if not app.render_stats()['applied']:
+        failed.append("no forecast was drawn")
+    for name, values in (("tk.drain", drain), ("tk.loop_lag", lag)):
+        if not values:
+            failed.append(f"{name}: no samples")
+        elif max(values) > args.budget_ms:
+            failed.append(f"{name}: max {max(values):.2f} ms over the {args.budget_ms:g} ms budget")
+    app.window.destroy()
+    for reason in failed:
+        print("FAIL", reason)
+    if not failed:
+        print(f"OK: every drain tick and loop lag under {args.budget_ms:g} ms")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,72 @@
+# Boundary check for jweather.lod.MinMaxPyramid.window(), which covers rows
+# [start, stop). Runs random series (with NaN gaps) at many ranges, fractional
+# bounds and pixel widths against a brute-force answer:
+#   - zoomed in (no more than 2 rows per pixel) the raw samples of exactly
+#     [start, stop) come back, row `stop` never among them
+#   - zoomed out no peak is lost: the points span at least the true min and max
+#   - extent() agrees with the range
+# Prints up to 10 mismatches and exits with status 1 when there are any.
+#   python benchmarks/lod_check.py
+import math
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from jweather.lod import MinMaxPyramid  # noqa: E402
+
+CASES = 3000
+
+
+def series(rnd, n):
+    out = []
+    for i in range(n):
+        out.append(float('nan') if rnd.random() < 0.05 else math.sin(i / 7) * 10 + rnd.uniform(-3, 3))
+    return out
+
+
+def main():
+    rnd = random.Random(22)
+    failures = []
+    for case in range(CASES):
+        n = rnd.choice((1, 2, 3, 7, 24, 100, 384, 552, 5000))
+        values = series(rnd, n)
+        pyramid = MinMaxPyramid(values)
+        stored = pyramid.levels[0][0]
+        start = rnd.uniform(-2, n)
+        stop = rnd.uniform(start, n + 2)
+        pixels = rnd.choice((1, 10, 64, 300, 900, 4000))
+        lo, hi = max(0, int(start)), min(n, int(stop))
+        rows = [i for i in range(lo, hi) if stored[i] == stored[i]]
+        points = pyramid.window(start, stop, pixels)
+        label = f"n={n} window({start:.2f}, {stop:.2f}, {pixels})"
+        if hi <= lo:
+            if points:
+                failures.append(f"{label}: empty range returned {len(points)} points")
+            continue
+        if (hi - lo) / pixels <= 2:
+            if [r for r, _ in points] != rows:
+                failures.append(f"{label}: rows {[r for r, _ in points][-3:]}…, expected …{rows[-3:]}")
+            elif any(v != stored[r] for r, v in points):
+                failures.append(f"{label}: values differ from the series")
+        elif rows:
+            got = [v for _, v in points]
+            want_lo, want_hi = min(stored[i] for i in rows), max(stored[i] for i in rows)
+            if not got or min(got) > want_lo or max(got) < want_hi:
+                failures.append(f"{label}: lost a peak ({min(got, default=None)}..{max(got, default=None)} "
+                                f"vs {want_lo}..{want_hi})")
+        extent = pyramid.extent(start, stop)
+        if (extent is None) != (not rows):
+            failures.append(f"{label}: extent() is {extent} for {len(rows)} present rows")
+        if len(failures) >= 10:
+            break
+    for reason in failures:
+        print("FAIL", reason)
+    if not failures:
+        print(f"OK: {CASES} windows honor [start, stop) and keep every peak")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
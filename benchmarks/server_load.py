@@ -0,0 +1,111 @@
+# Load test for the local forecast proxy (jweather.server) against the stub
+# upstream: many concurrent keep-alive clients ask for a handful of sites.
+# Reports requests/second, latency percentiles and how many upstream calls
+# the coalescing and caching left.
+#   python benchmarks/server_load.py --clients 2000 --requests 5 --sites 10 --latency 0.2
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("JWEATHER_HOME", tempfile.mkdtemp(prefix="jweather-bench-"))
+
+from stub_server import StubServer  # noqa: E402
+from jweather import config, server  # noqa: E402
+
+
+def raise_fd_limit():
+    try:
+        import resource
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+        return hard
+    except Exception:
+        return None
+
+
+async def client(host, port, paths, latencies, failures):
+    try:
+        reader, writer = await asyncio.open_connection(host, port)
+    except OSError:
+        failures.append('connect')
+        return
+    try:
+        for path in paths:
+            t = time.perf_counter()
+            writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode())
+            head = await reader.readuntil(b"\r\n\r\n")
+            length = 0
+            for line in head.split(b"\r\n"):
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":", 1)[1])
+            await reader.readexactly(length)
+            latencies.append(time.perf_counter() - t)
+            if not head.startswith(b"HTTP/1.1 200"):
+                failures.append(head.split(b"\r\n", 1)[0].decode())
+    except (OSError, asyncio.IncompleteReadError) as e:
+        failures.append(type(e).__name__)
+    finally:
+        writer.close()
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] if values else float('nan')
+
+
+async def phase(name, srv, sites, clients, per_client, stub):
+    before = sum(stub.requests.values())
+    coalesced = srv.stats()['coalesced']
+    latencies, failures = [], []
+    rnd = random.Random(name)
+    jobs = []
+    for _ in range(clients):
+        paths = []
+        for _ in range(per_client):
+            lat, lon = rnd.choice(sites)
+            paths.append(f"/v1/forecast?latitude={lat}&longitude={lon}")
+        jobs.append(client(srv.host, srv.port, paths, latencies, failures))
+    t = time.perf_counter()
+    await asyncio.gather(*jobs)
+    elapsed = time.perf_counter() - t
+    print(f"{name:<6} {len(latencies):7d} req  {len(latencies) / elapsed:9.0f} req/s  "
+          f"p50 {percentile(latencies, 50) * 1000:7.1f} ms  p99 {percentile(latencies, 99) * 1000:7.1f} ms  "
+          f"upstream {sum(stub.requests.values()) - before:4d}  coalesced {srv.stats()['coalesced'] - coalesced:6d}  "
+          f"failed {len(failures)}")
+
+
+async def run(args):
+    stub = StubServer(latency=args.latency).start()
+    config.FORECAST_URL = stub.forecast_url
+    config.GEOCODING_URL = stub.geocoding_url
+    srv = await server.ForecastServer(port=0).start()
+    rnd = random.Random(1)
+    sites = [(round(rnd.uniform(-60, 60), 2), round(rnd.uniform(-170, 170), 2)) for _ in range(args.sites)]
+    # cold: every site misses at once, so concurrent clients pile onto one upstream call per site
+    await phase("cold", srv, sites, args.clients, args.requests, stub)
+    # warm: everything is served from encoded responses
+    await phase("warm", srv, sites, args.clients, args.requests, stub)
+    await srv.close()
+    stub.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--clients", type=int, default=1000, help="concurrent keep-alive connections")
+    parser.add_argument("--requests", type=int, default=5, help="requests per connection")
+    parser.add_argument("--sites", type=int, default=10)
+    parser.add_argument("--latency", type=float, default=0.2, help="stub upstream latency in seconds")
+    args = parser.parse_args()
+    limit = raise_fd_limit()
+    if limit is not None and limit < args.clients * 2 + 64:
+        print(f"warning: open file limit {limit} is low for {args.clients} clients", file=sys.stderr)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# Cold-start benchmark. Each sample runs in a fresh interpreter so nothing is
+# warm. Measures the import cost of the headless data layer and the time from
+# process start to the first painted frame of the GUI (needs a display; run
+# under xvfb-run on CI). For a per-module breakdown use:
+#   python -X importtime -c "import jweather.app" 2> importtime.log
+import os
+import subprocess
+import sys
+from statistics import median
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_SNIPPET = """
+import time
+t = time.perf_counter()
+import {module}
+print(time.perf_counter() - t)
+"""
+
+FIRST_PAINT_SNIPPET = """
+import time
+t = time.perf_counter()
+from jweather.app import create_app
+app = create_app(auto_locate=False)
+app.window.update()
+print(time.perf_counter() - t)
+app.window.destroy()
+"""
+
+
+def sample(snippet, runs):
+    times = []
+    for _ in range(runs):
+        out = subprocess.run(
+            [sys.executable, "-c", snippet], cwd=ROOT, capture_output=True, text=True, check=True
+        )
+        times.append(float(out.stdout.strip().splitlines()[-1]))
+    return times
+
+
+def main(runs=7):
+    results = {}
+    for module in ("jweather", "jweather.forecast", "jweather.app"):
+        results[f"import {module}"] = sample(IMPORT_SNIPPET.format(module=module), runs)
+    if os.environ.get("DISPLAY") or sys.platform in ("win32", "darwin"):
+        results["first paint"] = sample(FIRST_PAINT_SNIPPET, runs)
+    else:
+        print("no display: skipping first-paint measurement")
+    for name, times in results.items():
+        print(f"{name:28s} median {median(times) * 1000:7.1f} ms   min {min(times) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 7)
@@ -0,0 +1,206 @@
+# Local stand-in for the Open-Meteo forecast and geocoding APIs (and the IP
+# geolocation providers), so benchmarks run without network access and with
+# controlled latency. Run it standalone:
+#   python benchmarks/stub_server.py --port 8765 --latency 0.2
+# or start it in-process with StubServer(...).start().
+import argparse
+import hashlib
+import json
+import random
+import threading
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+def forecast_payload(lat, lon, hourly_vars=("temperature_2m",), days=7, start=None, extra_vars=0):
+    # Deterministic per location so repeated runs produce identical bodies
+    rnd = random.Random(f"{lat:.4f},{lon:.4f}")
+    start = start or date.today()
+    day_list = [start + timedelta(days=d) for d in range(days)]
+    times = [f"{d.isoformat()}T{h:02d}:00" for d in day_list for h in range(24)]
+    base = 25 - abs(lat) * 0.4
+    hourly = {"time": times}
+    # Variables with their own range; anything else is shaped like a temperature
+    shapes = {
+        "relative_humidity_2m": lambda i: rnd.randint(30, 95),
+        "dew_point_2m": lambda i: round(base - 8 + rnd.uniform(-3, 3), 1),
+        "cloud_cover": lambda i: rnd.randint(0, 100),
+        "precipitation": lambda i: round(rnd.uniform(0, 2), 1) if rnd.random() < 0.15 else 0.0,
+        "rain": lambda i: round(rnd.uniform(0, 2), 1) if rnd.random() < 0.15 else 0.0,
+        "snowfall": lambda i: round(rnd.uniform(0, 1), 1) if base < 2 and rnd.random() < 0.15 else 0.0,
+        "is_day": lambda i: 1 if 6 <= i % 24 < 20 else 0,
+        "wind_speed_10m": lambda i: round(rnd.uniform(0, 30), 1),
+    }
+    for name in hourly_vars:
+        shape = shapes.get(name)
+        if shape is not None:
+            hourly[name] = [shape(i) for i in range(len(times))]
+        else:
+            hourly[name] = [round(base + 6 * ((i % 24) - 12) / 12 + rnd.uniform(-1, 1), 1) for i in range(len(times))]
+    # Padding columns to grow the payload without changing what the app reads
+    for n in range(extra_vars):
+        hourly[f"extra_{n}"] = [round(rnd.uniform(0, 100), 1) for _ in times]
+    temps = hourly.get("temperature_2m") or [base] * len(times)
+    return {
+        "latitude": lat,
+        "longitude": lon,
+        "utc_offset_seconds": 0,
+        "timezone": "GMT",
+        "current": {
+            "time": times[12], "interval": 900,
+            "temperature_2m": temps[12], "apparent_temperature": temps[12] - 1,
+            "relative_humidity_2m": rnd.randint(30, 90), "dew_point_2m": round(base - 8, 1),
+            "is_day": 1, "precipitation": 0.0, "rain": 0.0, "showers": 0.0, "snowfall": 0.0,
+            "cloud_cover": rnd.randint(0, 100), "pressure_msl": 1013.2, "surface_pressure": 1008.1,
+            "wind_speed_10m": round(rnd.uniform(0, 30), 1), "wind_gusts_10m": round(rnd.uniform(5, 50), 1),
+            "wind_direction_10m": rnd.randint(0, 359), "visibility": 24140.0, "uv_index": 3.2,
+        },
+        "current_units": {"temperature_2m": "°C", "apparent_temperature": "°C", "relative_humidity_2m": "%",
+                          "wind_speed_10m": "km/h", "wind_gusts_10m": "km/h", "cloud_cover": "%"},
+        "hourly": hourly,
+        "hourly_units": {name: "°C" for name in hourly_vars},
+        "daily": {
+            "time": [d.isoformat() for d in day_list],
+            "temperature_2m_max": [max(temps[i * 24:(i + 1) * 24]) for i in range(days)],
+            "temperature_2m_min": [min(temps[i * 24:(i + 1) * 24]) for i in range(days)],
+        },
+        "daily_units": {"temperature_2m_max": "°C", "temperature_2m_min": "°C"},
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; with Nagle on, the client's
+    # delayed ACK adds ~40 ms to every keep-alive response
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        stub = self.server.stub
+        url = urlsplit(self.path)
+        # Lists arrive either comma-separated or as repeated keys
+        query = {k: ",".join(v) for k, v in parse_qs(url.query).items()}
+        stub.count(url.path)
+        delay = stub.latency + (random.uniform(0, stub.jitter) if stub.jitter else 0)
+        if delay:
+            time.sleep(delay)
+        if stub.failure_rate and random.random() < stub.failure_rate:
+            return self.send_json({"error": True, "reason": "injected failure"}, status=503)
+        if url.path.endswith("/forecast") or url.path.endswith("/archive"):
+            return self.forecast(query, stub)
+        if url.path.endswith("/search"):
+            return self.geocode(query)
+        # Anything else answers like an IP geolocation provider
+        return self.send_json({"city": "Stubville", "latitude": 51.5, "longitude": -0.12, "loc": "51.5,-0.12"})
+
+    def forecast(self, query, stub):
+        try:
+            lats = [float(v) for v in query["latitude"].split(",")]
+            lons = [float(v) for v in query["longitude"].split(",")]
+        except (KeyError, ValueError):
+            return self.send_json({"error": True, "reason": "bad coordinates"}, status=400)
+        hourly_vars = [v for v in query.get("hourly", "temperature_2m").split(",") if v] or ["temperature_2m"]
+        days = int(query.get("forecast_days", stub.days))
+        past = int(query.get("past_days", 0))
+        start = date.today() - timedelta(days=past)
+        if "start_date" in query and "end_date" in query:
+            # Archive requests name their date range
+            start = date.fromisoformat(query["start_date"])
+            days = (date.fromisoformat(query["end_date"]) - start).days + 1
+        bodies = [forecast_payload(a, b, hourly_vars, days + past, start, stub.extra_vars) for a, b in zip(lats, lons)]
+        self.send_json(bodies if len(bodies) > 1 else bodies[0])
+
+    def geocode(self, query):
+        name = (query.get("name") or "").strip()
+        if not name or name.lower().startswith("nowhere"):
+            return self.send_json({"generationtime_ms": 0.1})
+        rnd = random.Random(name.lower())
+        self.send_json({"results": [{
+            "name": name.title(), "country": "Stubland", "admin1": "Region",
+            "latitude": round(rnd.uniform(-60, 60), 4), "longitude": round(rnd.uniform(-170, 170), 4),
+        }]})
+
+    def send_json(self, body, status=200):
+        data = json.dumps(body).encode()
+        etag = '"%s"' % hashlib.sha1(data).hexdigest()[:16]
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self.server.stub.count("304")
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        self.send_response(status)
+        if status == 200:
+            self.send_header("ETag", etag)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class StubServer:
+    def __init__(self, port=0, latency=0.0, jitter=0.0, failure_rate=0.0, days=7, extra_vars=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.failure_rate = failure_rate
+        self.days = days
+        self.extra_vars = extra_vars
+        self.requests = {}
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self
+
+    def count(self, path):
+        with self._lock:
+            self.requests[path] = self.requests.get(path, 0) + 1
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    @property
+    def forecast_url(self):
+        return self.base_url + "/v1/forecast"
+
+    @property
+    def geocoding_url(self):
+        return self.base_url + "/v1/search"
+
+    @property
+    def archive_url(self):
+        return self.base_url + "/v1/archive"
+
+    def start(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open-Meteo stub server")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random latency, 0..JITTER seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of requests answered with 503")
+    parser.add_argument("--days", type=int, default=7, help="forecast days when the request does not say")
+    parser.add_argument("--extra-vars", type=int, default=0, help="padding hourly columns added to every forecast (payload size)")
+    args = parser.parse_args()
+    stub = StubServer(args.port, args.latency, args.jitter, args.failure_rate, args.days, args.extra_vars)
+    print(f"stub listening on {stub.base_url}", flush=True)
+    try:
+        stub.httpd.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
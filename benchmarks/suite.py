@@ -0,0 +1,449 @@
+# Benchmark suite over the hot paths, run against the local stub server so
+# results do not depend on the network. Every run is appended to a history
+# file; with --check the run fails (exit 1) when any benchmark's median is
+# more than --threshold slower than the median of the last few comparable
+# runs (same machine, Python and parameters).
+#   python benchmarks/suite.py                       # run everything, record it
+#   python benchmarks/suite.py --check               # ... and gate on regressions
+#   python benchmarks/suite.py -k fetch -k geocode --latency 0.02 --jitter 0.01
+#   xvfb-run python benchmarks/suite.py -k render    # render benchmarks need a display
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from statistics import median
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("JWEATHER_HOME", tempfile.mkdtemp(prefix="jweather-bench-"))
+
+from stub_server import StubServer, forecast_payload  # noqa: E402
+from jweather import config  # noqa: E402
+
+HISTORY_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "history.jsonl")
+REGRESSION_THRESHOLD = 0.25   # fail when the median is 25% slower than the baseline
+BASELINE_RUNS = 5             # previous comparable runs the baseline is taken from
+BENCHMARKS = {}
+
+
+def benchmark(name, needs_display=False):
+    # Registers setup(ctx) -> fn; fn(i) is one timed operation
+    def wrap(setup):
+        BENCHMARKS[name] = (setup, needs_display)
+        return setup
+    return wrap
+
+
+def _points(n, seed=11):
+    import random
+    rnd = random.Random(seed)
+    return [(round(rnd.uniform(-70, 70), 3), round(rnd.uniform(-170, 170), 3)) for _ in range(n)]
+
+
+@benchmark("fetch_weather")
+def bench_fetch_weather(ctx):
+    # Network round trip to the stub, decode, frames and aggregation
+    from jweather.forecast import fetch_weather
+    points = _points(ctx.repeat + ctx.warmup)
+
+    def run(i):
+        return fetch_weather(*points[i])
+    return run
+
+
+BATCH_POINTS = 20
+
+
+def _first_error(bundles):
+    # One result for the error count: the first failed bundle, else the first
+    return next((b for b in bundles if b.get("error")), bundles[0])
+
+
+@benchmark("fetch_weather_many.batched")
+def bench_fetch_many_batched(ctx):
+    # BATCH_POINTS locations in one batched request; compare with .sequential
+    from jweather.forecast import fetch_weather_many
+    points = _points(BATCH_POINTS, seed=13)
+
+    def run(i):
+        return _first_error(fetch_weather_many(points, use_cache=False))
+    return run
+
+
+@benchmark("fetch_weather_many.sequential")
+def bench_fetch_many_sequential(ctx):
+    # The same BATCH_POINTS locations as one fetch_weather call each
+    from jweather.forecast import fetch_weather
+    points = _points(BATCH_POINTS, seed=13)
+
+    def run(i):
+        return _first_error([fetch_weather(lat, lon) for lat, lon in points])
+    return run
+
+
+@benchmark("cached_fetch_weather.disk_hit")
+def bench_cached_hit(ctx):
+    # Warm start: the forecast is in SQLite but not yet in memory
+    from jweather.cache import forecast_cache
+    from jweather.forecast import cached_fetch_weather
+    points = _points(20, seed=12)
+    for lat, lon in points:
+        cached_fetch_weather(lat, lon)
+
+    def run(i):
+        forecast_cache._memory.clear()
+        return cached_fetch_weather(*points[i % len(points)])
+    return run
+
+
+@benchmark("geocode_city")
+def bench_geocode(ctx):
+    # What the City tab's fetch does first; unique names so every call misses the store
+    from jweather.geocode import geocode_city
+    stamp = int(time.time() * 1000)
+
+    def run(i):
+        return geocode_city(f"Benchtown {stamp} {i}")
+    return run
+
+
+@benchmark("geocode_city.store_hit")
+def bench_geocode_hit(ctx):
+    from jweather.geocode import geocode_city
+    names = [f"Storeville {i}" for i in range(20)]
+    for name in names:
+        geocode_city(name)
+
+    def run(i):
+        return geocode_city(names[i % len(names)])
+    return run
+
+
+@benchmark("locate_by_ip")
+def bench_locate(ctx):
+    # Auto-locate with every provider pointed at the stub and the cached position ignored
+    from jweather import locate
+    locate.IP_PROVIDERS = [f"{ctx.stub.base_url}/ip/{n}" for n in range(4)]
+
+    def run(i):
+        return locate.locate_by_ip(use_cache=False)
+    return run
+
+
+@benchmark("bundle_from_payload")
+def bench_bundle(ctx):
+    from jweather.bundle import bundle_from_payload
+    payload = forecast_payload(10.0, 20.0, ("temperature_2m",), ctx.args.days, extra_vars=ctx.args.extra_vars)
+
+    def run(i):
+        return bundle_from_payload(10.0, 20.0, payload)
+    return run
+
+
+@benchmark("aggregate_days")
+def bench_aggregate(ctx):
+    from jweather.aggregate import aggregate_days
+    from jweather.frame import ForecastFrame
+    payload = forecast_payload(10.0, 20.0, ("temperature_2m", "relative_humidity_2m", "wind_speed_10m"),
+                               ctx.args.days, extra_vars=ctx.args.extra_vars)
+    frame = ForecastFrame.from_json(payload["hourly"])
+
+    def run(i):
+        return aggregate_days(frame)
+    return run
+
+
+@benchmark("lod.pyramid_build")
+def bench_pyramid_build(ctx):
+    # Explorer precompute for a 50k-hour series (about 6 years hourly)
+    import math
+    from jweather.lod import MinMaxPyramid
+    values = [math.sin(i / 24) * 10 + (i % 7) for i in range(50000)]
+
+    def run(i):
+        return MinMaxPyramid(values)
+    return run
+
+
+@benchmark("lod.window")
+def bench_pyramid_window(ctx):
+    # One explorer redraw's worth of points: a 900 px lane at a range of zoom levels
+    import math
+    from jweather.lod import MinMaxPyramid
+    pyramid = MinMaxPyramid([math.sin(i / 24) * 10 + (i % 7) for i in range(50000)])
+    spans = [(0, 50000), (10000, 30000), (20000, 22000), (25000, 25200)]
+
+    def run(i):
+        start, stop = spans[i % len(spans)]
+        return pyramid.window(start, stop, 900)
+    return run
+
+
+def _derive_inputs(locations=200):
+    # Every location's 16-day hourly inputs back to back: 200 x 384 = 76,800 hours
+    from array import array
+    from jweather.derive import DERIVED_INPUTS
+    columns = {name: array("f") for name in DERIVED_INPUTS}
+    for lat, lon in _points(locations, seed=13):
+        hourly = forecast_payload(lat, lon, DERIVED_INPUTS, 16)["hourly"]
+        for name in DERIVED_INPUTS:
+            columns[name].extend(hourly[name])
+    return columns
+
+
+@benchmark("derive.columns")
+def bench_derive(ctx):
+    from jweather.derive import derive_columns
+    columns = _derive_inputs()
+
+    def run(i):
+        return derive_columns(columns)
+    return run
+
+
+@benchmark("derive.columns_python")
+def bench_derive_python(ctx):
+    # The fallback used without NumPy, on a tenth of the hours
+    from jweather.derive import _derive_python
+    columns = _derive_inputs(20)
+    n = len(columns["temperature_2m"])
+
+    def run(i):
+        return _derive_python(columns, n)
+    return run
+
+
+def _archive(ctx, years=10):
+    # A private store backfilled from the stub once per run
+    from datetime import date
+    from jweather.archive import ArchiveStore, backfill
+    if getattr(ctx, "archive", None) is None:
+        ctx.archive = ArchiveStore(root=tempfile.mkdtemp(prefix="jweather-archive-"))
+        backfill(48.85, 2.35, years=years, end=date(2026, 6, 30), store=ctx.archive)
+    return ctx.archive
+
+
+@benchmark("archive.backfill_year")
+def bench_archive_backfill(ctx):
+    # Four chunked requests plus the appends for one location-year
+    from datetime import date
+    from jweather.archive import ArchiveStore, backfill
+    root = tempfile.mkdtemp(prefix="jweather-archive-")
+
+    def run(i):
+        return backfill(10.0 + i * 0.5, 20.0, years=0, end=date(2025, 12, 31), store=ArchiveStore(root=root))
+    return run
+
+
+@benchmark("archive.query_week")
+def bench_archive_query(ctx):
+    from datetime import date, timedelta
+    store = _archive(ctx)
+    weeks = [date(2017 + i % 9, 1 + i % 12, 3) for i in range(40)]
+
+    def run(i):
+        return store.query(48.85, 2.35, weeks[i % len(weeks)], weeks[i % len(weeks)] + timedelta(days=7))
+    return run
+
+
+@benchmark("archive.climatology")
+def bench_archive_climatology(ctx):
+    # Recomputing the normals over 10 stored years
+    store = _archive(ctx)
+
+    def run(i):
+        return store.climatology(48.85, 2.35, refresh=True)
+    return run
+
+
+def _app_renders(ctx):
+    # Alternates two cached locations so every render has real changes to draw
+    from jweather.app import create_app
+    from jweather.forecast import cached_fetch_weather
+    if ctx.app is None:
+        ctx.app = create_app(auto_locate=False, auto_refresh=False)
+        ctx.app.window.update()
+    a = cached_fetch_weather(1.0, 2.0)
+    b = cached_fetch_weather(30.0, 40.0)
+    app = ctx.app
+
+    def run(i):
+        # The cache lookup runs on the worker pool, so pump the event loop until
+        # the UI queue has delivered the bundle and it has been drawn
+        bundle = (a, b)[i % 2]
+        before = app.render_stats()
+        app.perform_fetch(bundle["lat"], bundle["lon"])
+        deadline = time.perf_counter() + 5
+        while app.render_stats() == before and time.perf_counter() < deadline:
+            app.window.update()
+            time.sleep(0.001)
+        app.window.update_idletasks()
+    return run
+
+
+@benchmark("render_hourly", needs_display=True)
+def bench_render_hourly(ctx):
+    ctx.span = "render.hourly"
+    return _app_renders(ctx)
+
+
+@benchmark("render_daily", needs_display=True)
+def bench_render_daily(ctx):
+    ctx.span = "render.daily"
+    return _app_renders(ctx)
+
+
+class Context:
+    def __init__(self, args, stub):
+        self.args = args
+        self.stub = stub
+        self.repeat = args.repeat
+        self.warmup = args.warmup
+        self.app = None
+        self.span = None
+        self.archive = None
+
+
+def measure(name, ctx):
+    # Returns per-operation seconds; for span-backed benchmarks the time comes
+    # from jweather.trace so only the function under test is counted
+    from jweather import trace
+    ctx.span = None
+    fn = BENCHMARKS[name][0](ctx)
+    for i in range(ctx.warmup):
+        fn(i)
+    errors = 0
+    times = []
+    if ctx.span:
+        trace.clear()
+        trace.enable()
+    for i in range(ctx.warmup, ctx.warmup + ctx.repeat):
+        t = time.perf_counter()
+        result = fn(i)
+        times.append(time.perf_counter() - t)
+        if (result is None and name == "locate_by_ip") or (isinstance(result, dict) and result.get("error")):
+            errors += 1
+    if ctx.span:
+        trace.enable(False)
+        times = [dur / 1e9 for span_name, _, dur, _, _ in trace.spans() if span_name == ctx.span] or times
+    return times, errors
+
+
+def summarize(times):
+    ordered = sorted(times)
+    return {
+        "median_ms": median(ordered) * 1000,
+        "p95_ms": ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))] * 1000,
+        "min_ms": ordered[0] * 1000,
+        "runs": len(ordered),
+    }
+
+
+def load_history(path):
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as fh:
+        return [json.loads(line) for line in fh if line.strip()]
+
+
+def baseline(history, entry, name, runs=BASELINE_RUNS):
+    same = [h for h in history if h.get("machine") == entry["machine"] and h.get("python") == entry["python"]
+            and h.get("params") == entry["params"] and name in h.get("results", {})]
+    medians = [h["results"][name]["median_ms"] for h in same[-runs:]]
+    return median(medians) if medians else None
+
+
+def git_revision():
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True)
+        return out.stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="JWeather hot-path benchmarks against the local stub")
+    parser.add_argument("-k", dest="only", action="append", help="run benchmarks whose name contains this (repeatable)")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--latency", type=float, default=0.0, help="stub latency per response, seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="extra random stub latency, 0..JITTER seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="fraction of stub responses that are 503s")
+    parser.add_argument("--days", type=int, default=16, help="forecast days in stub payloads")
+    parser.add_argument("--extra-vars", type=int, default=0, help="padding hourly columns per payload")
+    parser.add_argument("--history", default=HISTORY_PATH, help="JSONL file runs are appended to (default: %(default)s)")
+    parser.add_argument("--no-record", action="store_true", help="do not append this run to the history")
+    parser.add_argument("--check", action="store_true", help="exit 1 when a benchmark regressed")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--list", action="store_true", help="list benchmark names and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, (_, needs_display) in BENCHMARKS.items():
+            print(name + ("  (needs a display)" if needs_display else ""))
+        return 0
+
+    has_display = bool(os.environ.get("DISPLAY")) or sys.platform in ("win32", "darwin")
+    names = [n for n in BENCHMARKS if not args.only or any(k in n for k in args.only)]
+    stub = StubServer(latency=args.latency, jitter=args.jitter, failure_rate=args.failure_rate,
+                      days=args.days, extra_vars=args.extra_vars).start()
+    config.FORECAST_URL = stub.forecast_url
+    config.GEOCODING_URL = stub.geocoding_url
+    config.ARCHIVE_URL = stub.archive_url
+    config.REPLAY_MODE = "off"   # measure the fetch path itself, not the recorder's disk writes
+    ctx = Context(args, stub)
+
+    entry = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "commit": git_revision(),
+        "machine": platform.node(),
+        "python": platform.python_version(),
+        "params": {k: getattr(args, k) for k in ("latency", "jitter", "failure_rate", "days", "extra_vars")},
+        "results": {},
+    }
+    history = load_history(args.history)
+    regressions = []
+    print(f"{'benchmark':28s} {'median':>10s} {'p95':>10s} {'baseline':>10s} {'change':>8s}")
+    try:
+        for name in names:
+            if BENCHMARKS[name][1] and not has_display:
+                print(f"{name:28s} skipped (no display; run under xvfb-run)")
+                continue
+            times, errors = measure(name, ctx)
+            result = summarize(times)
+            if errors:
+                result["errors"] = errors
+            entry["results"][name] = result
+            base = baseline(history, entry, name)
+            change = ""
+            if base:
+                delta = result["median_ms"] / base - 1
+                change = f"{delta * 100:+7.1f}%"
+                if delta > args.threshold:
+                    regressions.append((name, base, result["median_ms"]))
+                    change += " !"
+            print(f"{name:28s} {result['median_ms']:8.3f}ms {result['p95_ms']:8.3f}ms "
+                  f"{(f'{base:8.3f}ms' if base else '—'):>10s} {change:>8s}"
+                  + (f"  ({errors} errors)" if errors else ""))
+    finally:
+        stub.stop()
+        if ctx.app is not None:
+            ctx.app.window.destroy()
+
+    if not args.no_record and entry["results"]:
+        with open(args.history, "a", encoding="utf-8") as fh:
+            fh.write(json.dumps(entry) + "\n")
+    if regressions:
+        for name, base, now in regressions:
+            print(f"REGRESSION {name}: {base:.3f}ms -> {now:.3f}ms ({(now / base - 1) * 100:+.1f}%)", file=sys.stderr)
+        if args.check:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,34 @@
+# JWeather: Open-Meteo weather client. The data layer (fetch, geocode,
+# aggregation, caches) is importable without a display; the Tk GUI lives in
+# jweather.app and is only built by create_app(). Names below are resolved on
+# first access so `import jweather` stays cheap.
+_EXPORTS = {
+    'fetch_weather': 'forecast',
+    'cached_fetch_weather': 'forecast',
+    'fetch_weather_many': 'forecast',
+    'validate_coords': 'forecast',
+    'geocode_city': 'geocode',
+    'geocode_store': 'geocode',
+    'locate_by_ip': 'locate',
+    'forecast_cache': 'cache',
+    'pin_store': 'pins',
+    'archive_store': 'archive',
+    'aggregate_days': 'aggregate',
+    'ForecastFrame': 'frame',
+    'http_session': 'transport',
+    'http_stats': 'transport',
+    'ForecastServer': 'server',
+    'create_app': 'app',
+}
+
+__all__ = list(_EXPORTS)
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'jweather' has no attribute {name!r}")
+    from importlib import import_module
+    value = getattr(import_module(f'.{module}', __name__), name)
+    globals()[name] = value
+    return value
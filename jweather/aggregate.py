@@ -0,0 +1,112 @@
+# Per-day aggregation: run once when a bundle arrives (on the fetch worker),
+# grouping hourly rows by local date and precomputing stats for every
+# variable so popups, render_daily and exporters just index into the result:
+#   day_stats[day_number][variable] -> {'min', 'max', 'mean', 'count',
+#                                       'p10', 'p50', 'p90', 'buckets'}
+DAY_BUCKETS = (('morning', 6, 12), ('afternoon', 12, 18), ('evening', 18, 24))
+AGG_PERCENTILES = (10, 50, 90)
+
+
+def percentile(sorted_vals, q):
+    """Return the q-th percentile (0-100) of an ascending sequence, interpolated like NumPy's default."""
+    pos = (len(sorted_vals) - 1) * q / 100.0
+    lo = int(pos)
+    hi = min(lo + 1, len(sorted_vals) - 1)
+    return sorted_vals[lo] + (sorted_vals[hi] - sorted_vals[lo]) * (pos - lo)
+
+
+def _aggregate_days_python(frame, buckets, percentiles):
+    days = {}
+    starts = []
+    for i in range(len(frame)):
+        if not starts or frame.day_at(i) != frame.day_at(starts[-1]):
+            starts.append(i)
+    hours = [frame.hour_at(i) for i in range(len(frame))]
+    for k, start in enumerate(starts):
+        stop = starts[k + 1] if k + 1 < len(starts) else len(frame)
+        per_var = {}
+        for name, col in frame.columns.items():
+            vals = [col[i] for i in range(start, stop) if col[i] == col[i]]
+            if not vals:
+                continue
+            ordered = sorted(vals)
+            stats = {'min': ordered[0], 'max': ordered[-1], 'mean': sum(vals) / len(vals), 'count': len(vals)}
+            for q in percentiles:
+                stats[f'p{q}'] = percentile(ordered, q)
+            bucket_means = {}
+            for label, h0, h1 in buckets:
+                bucket = [col[i] for i in range(start, stop) if h0 <= hours[i] < h1 and col[i] == col[i]]
+                bucket_means[label] = sum(bucket) / len(bucket) if bucket else None
+            stats['buckets'] = bucket_means
+            per_var[name] = stats
+        days[frame.day_at(start)] = per_var
+    return days
+
+
+def _aggregate_days_numpy(np, frame, buckets, percentiles):
+    names = list(frame.columns)
+    if not names:
+        return {}
+    times = frame.as_numpy('time')
+    day = times // 86400
+    hour = (times % 86400) // 3600
+    starts = np.flatnonzero(np.r_[True, day[1:] != day[:-1]])
+    lengths = np.diff(np.r_[starts, len(times)])
+    # All variables at once: (variables x hours), reduced per day with reduceat
+    cols = np.stack([frame.as_numpy(name) for name in names]).astype(np.float64)
+    present = ~np.isnan(cols)
+    filled = np.where(present, cols, 0.0)
+    counts = np.add.reduceat(present, starts, axis=1)
+    with np.errstate(all='ignore'):
+        means = np.add.reduceat(filled, starts, axis=1) / counts
+        mins = np.fmin.reduceat(cols, starts, axis=1)
+        maxs = np.fmax.reduceat(cols, starts, axis=1)
+        # Percentiles: pad each day to the longest one, sort (NaN sorts last)
+        # and interpolate between the closest ranks of the valid prefix
+        width = int(lengths.max())
+        offsets = np.arange(width)
+        valid = offsets[None, :] < lengths[:, None]
+        grid = np.where(valid, starts[:, None] + offsets[None, :], 0)
+        ordered = np.sort(np.where(valid[None, :, :], cols[:, grid], np.nan), axis=2)
+        last = np.maximum(counts - 1, 0)
+        pct = {}
+        for q in percentiles:
+            pos = last * (q / 100.0)
+            lo = np.floor(pos).astype(np.int64)
+            hi = np.minimum(lo + 1, last)
+            v_lo = np.take_along_axis(ordered, lo[:, :, None], axis=2)[:, :, 0]
+            v_hi = np.take_along_axis(ordered, hi[:, :, None], axis=2)[:, :, 0]
+            pct[q] = (v_lo + (v_hi - v_lo) * (pos - lo)).tolist()
+        bucket_means = {}
+        for label, h0, h1 in buckets:
+            mask = present & ((hour >= h0) & (hour < h1))[None, :]
+            b_cnt = np.add.reduceat(mask, starts, axis=1)
+            b_mean = np.add.reduceat(np.where(mask, cols, 0.0), starts, axis=1) / b_cnt
+            bucket_means[label] = (b_mean.tolist(), b_cnt.tolist())
+    counts, means, mins, maxs = counts.tolist(), means.tolist(), mins.tolist(), maxs.tolist()
+    days = {}
+    for k, d in enumerate(day[starts].tolist()):
+        per_var = {}
+        for v, name in enumerate(names):
+            if not counts[v][k]:
+                continue
+            stats = {'min': mins[v][k], 'max': maxs[v][k], 'mean': means[v][k], 'count': counts[v][k]}
+            for q in percentiles:
+                stats[f'p{q}'] = pct[q][v][k]
+            stats['buckets'] = {
+                label: (b_mean[v][k] if b_cnt[v][k] else None)
+                for label, (b_mean, b_cnt) in bucket_means.items()
+            }
+            per_var[name] = stats
+        days[d] = per_var
+    return days
+
+
+def aggregate_days(frame, buckets=DAY_BUCKETS, percentiles=AGG_PERCENTILES):
+    if frame is None or len(frame) == 0:
+        return {}
+    try:
+        import numpy as np
+    except ImportError:
+        return _aggregate_days_python(frame, buckets, percentiles)
+    return _aggregate_days_numpy(np, frame, buckets, percentiles)
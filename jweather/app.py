@@ -0,0 +1,1953 @@
+import queue
+import random
+import time
+import tkinter as tk
+from tkinter import messagebox
+from tkinter import ttk
+from types import SimpleNamespace
+from concurrent.futures import ThreadPoolExecutor
+
+from . import config
+from .bundle import BUNDLE_SECTIONS, bundle_changes
+from .archive import archive_store, day_key
+from .cache import forecast_cache
+from .derive import COMFORT_NAMES, CONDITION_NAMES, condition_icon, condition_of, trend_slope
+from .forecast import cached_fetch_weather, fetch_weather_many
+from .frame import ForecastFrame
+from .lod import MinMaxPyramid
+from .geocode import geocode_city, geocode_store, place_label
+from .locate import locate_by_ip
+from .pins import pin_store
+from .transport import http_stats
+from . import trace
+from .trace import record, span, traced
+from .theme import primary_bg, surface_bg, border_color, accent, text_color, subtle_text, accent_text
+
+HOURLY_POINTS = 24
+LAYOUT_FRAME_MS = 16
+LAYOUT_SETTLE_MS = 150
+REFRESH_JITTER = (60, 300)      # seconds after the hourly model update
+REFRESH_RETRY = 300             # seconds before retrying a failed refresh
+REFRESH_IDLE_AFTER = 30 * 60    # no input for this long counts as idle
+POPUP_MAX_OPEN = 3              # detail windows on screen at once; the oldest is hidden first
+DAILY_DAYS = 16                 # rows in the daily strip (Open-Meteo's full horizon)
+DAILY_ROW_HEIGHT = 26
+TREND_DEG_PER_DAY = 0.4         # fitted change of the daily mean that counts as warming/cooling
+EXPLORER_VIEWS = ('hourly_explorer',)
+EXPLORER_DEFAULT_VARS = ('temperature_2m', 'precipitation', 'wind_speed_10m')
+EXPLORER_MIN_HOURS = 6          # narrowest zoom
+EXPLORER_COLORS = ('#0a84ff', '#30b0c7', '#34c759', '#ff9f0a', '#ff375f', '#af52de')
+DASH_ROW_HEIGHT = 44
+DASH_SPARK_WIDTH = 120
+DASH_SPARK_HEIGHT = 24
+DASH_PREFETCH_ROWS = 10         # rows loaded beyond the viewport on each side
+DASH_LOAD_BLOCK = 25            # rows fetched together in one batched request
+APP_VIEWS = ('current_card', 'hourly_chart', 'daily_rows', 'dashboard')
+
+
+def daily_details(bundle, climate=None):
+    # Texts for every day's details popup, built once per bundle so opening
+    # one only pushes strings into existing labels; climate is the stored
+    # climatology for the location (jweather.archive), when there is one
+    daily = bundle.get('daily') or ForecastFrame()
+    daily_units = bundle.get('daily_units') or {}
+    cur_units = bundle.get('hourly_units') or {}
+    tmax = daily.column('temperature_2m_max') or []
+    tmin = daily.column('temperature_2m_min') or []
+    hi_unit = daily_units.get('temperature_2m_max', '°')
+    lo_unit = daily_units.get('temperature_2m_min', '°')
+    unit = cur_units.get('temperature_2m', '°')
+    day_stats = bundle.get('day_stats') or {}
+    day_derived = bundle.get('day_derived') or {}
+    out = []
+    for index in range(len(daily)):
+        hi_val = tmax[index] if index < len(tmax) and tmax[index] == tmax[index] else None
+        lo_val = tmin[index] if index < len(tmin) and tmin[index] == tmin[index] else None
+        # Hourly details for the selected date come precomputed with the bundle
+        stats = day_stats.get(daily.day_at(index), {}).get('temperature_2m')
+        if stats:
+            # Morning (06-12), Afternoon (12-18), Evening (18-24)
+            parts = [stats['buckets'].get(label) for label in ('morning', 'afternoon', 'evening')]
+            morn, aft, eve = (round(v) if v is not None else '—' for v in parts)
+            lines = [
+                f"Hourly min/max: {round(stats['min'])}{unit}/{round(stats['max'])}{unit}",
+                f"Hourly average: {round(stats['mean'])}{unit}",
+                f"Morning/Afternoon/Evening avg: {morn}{unit} / {aft}{unit} / {eve}{unit}",
+            ]
+        else:
+            lines = ["No hourly breakdown available for this day.", "", ""]
+        derived = day_derived.get(daily.day_at(index)) or {}
+        feel = []
+        if derived.get('condition') is not None:
+            feel.append(CONDITION_NAMES[derived['condition']].capitalize())
+        if derived.get('comfort') is not None:
+            feel.append(COMFORT_NAMES[derived['comfort']])
+        if derived.get('heat_index') is not None:
+            feel.append(f"heat index up to {round(derived['heat_index'])}{unit}")
+        if derived.get('wind_chill') is not None:
+            feel.append(f"wind chill down to {round(derived['wind_chill'])}{unit}")
+        lines.append(", ".join(feel))
+        normal = climate['days'].get(str(day_key(daily.date_at(index)))) if climate else None
+        if normal:
+            tx, tn = normal['tmax'], normal['tmin']
+            lines.append(f"Normal: {round(tx['mean'])}{hi_unit}/{round(tn['mean'])}{lo_unit}, "
+                         f"highs usually {round(tx['p10'])}–{round(tx['p90'])}{hi_unit} "
+                         f"({climate['years'][0]}–{climate['years'][1]})")
+        else:
+            lines.append("")
+        out.append({
+            'title': daily.date_at(index).strftime('%A, %b %d'),
+            'high': f"High: {round(hi_val) if hi_val is not None else '—'}{hi_unit}",
+            'low': f"Low:  {round(lo_val) if lo_val is not None else '—'}{lo_unit}",
+            'lines': lines,
+        })
+    return out
+
+
+def create_app(auto_locate=True, auto_refresh=True):
+    # Builds the whole window; nothing touches the network until the first
+    # paint is done (auto-locate waits 400 ms and runs on the worker pool)
+
+    # Only request the variables these views read
+    config.ACTIVE_VIEWS = APP_VIEWS
+
+    # Create main window
+    window = tk.Tk()
+    window.title("JWeather")
+    window.geometry("860x600")
+    window.resizable(True, True)
+
+    # Theme: Light mode, mobile-friendly spacing
+    style = ttk.Style()
+    try:
+        style.theme_use('clam')
+    except Exception:
+        pass
+
+    window.configure(bg=primary_bg)
+
+    style.configure('TFrame', background=primary_bg)
+    style.configure('Header.TLabel', background=primary_bg, foreground=text_color, font=("SF Pro Text", 18, "bold"))
+    style.configure('SubHeader.TLabel', background=primary_bg, foreground=subtle_text, font=("SF Pro Text", 11))
+    style.configure('TLabel', background=primary_bg, foreground=text_color)
+    # Card
+    style.configure('Card.TFrame', background=surface_bg, relief='solid', bordercolor=border_color, borderwidth=1)
+    style.configure('Card.TLabel', background=surface_bg, foreground=text_color)
+    # Buttons
+    style.configure('Accent.TButton', background=accent, foreground=accent_text, borderwidth=0, padding=8)
+    style.map('Accent.TButton', background=[('active', '#0a84ff')])
+
+    # Layout: single-column (header, sidebar, content stacked)
+    root_frame = ttk.Frame(window)
+    root_frame.grid(row=0, column=0, sticky="nsew")
+    window.grid_rowconfigure(0, weight=1)
+    window.grid_columnconfigure(0, weight=1)
+    root_frame.grid_rowconfigure(2, weight=1)
+    root_frame.grid_columnconfigure(0, weight=1)
+
+    header = ttk.Frame(root_frame, style='TFrame')
+    header.grid(row=0, column=0, sticky='ew', padx=12, pady=(8, 6))
+    app_title = ttk.Label(header, text="JWeather", style='Header.TLabel')
+    app_title.pack(side='left')
+    subtitle = ttk.Label(header, text="Current • Hourly • Daily", style='SubHeader.TLabel')
+    subtitle.pack(side='left', padx=8)
+
+    sidebar = ttk.Frame(root_frame, style='TFrame')
+    content = ttk.Frame(root_frame, style='TFrame')
+
+    # single column layout
+    sidebar.grid(row=1, column=0, sticky='ew', padx=12, pady=(0,8))
+    content.grid(row=2, column=0, sticky='nsew', padx=12, pady=(0,12))
+    # Make content scrollable so nothing is cut off on small screens
+    content_canvas = tk.Canvas(content, bg=primary_bg, highlightthickness=0, takefocus=True)
+    content_scroll = tk.Scrollbar(content, orient='vertical', command=content_canvas.yview)
+    content_scroll._visible = False
+    content_inner = ttk.Frame(content, style='TFrame')
+    # Update scrollregion whenever size of inner changes
+    def _update_scroll_metrics(event=None):
+        # Update scrollregion and toggle scrollbar visibility based on content height vs canvas height
+        try:
+            if _dash['active']:
+                # Dashboard rows are virtual: the region covers every pinned row
+                bbox = (0, 0, content_canvas.winfo_width(), len(_dash['pins']) * DASH_ROW_HEIGHT)
+            else:
+                bbox = content_canvas.bbox('all')
+            content_canvas.configure(scrollregion=bbox)
+            # Determine if vertical scroll is needed
+            need_scroll = False
+            if bbox is not None:
+                total_height = bbox[3] - bbox[1]
+                visible_height = content_canvas.winfo_height()
+                need_scroll = total_height > visible_height + 1
+            # Show or hide scrollbar based on need
+            if need_scroll:
+                if not getattr(content_scroll, '_visible', False):
+                    content_scroll.grid(row=0, column=1, sticky='ns')
+                    content_scroll._visible = True
+            else:
+                if getattr(content_scroll, '_visible', False):
+                    content_scroll.grid_forget()
+                    content_scroll._visible = False
+        except Exception:
+            pass
+
+    # Create window for inner frame and keep its ID to sync widths
+    # (resizes are routed through the layout scheduler further down)
+    _inner_window = content_canvas.create_window((0,0), window=content_inner, anchor='nw')
+    def _on_yscroll(*args):
+        content_scroll.set(*args)
+        if _dash['active']:
+            request_dashboard()
+
+    content_canvas.configure(yscrollcommand=_on_yscroll)
+    content_canvas.grid(row=0, column=0, sticky='nsew')
+    # Scrollbar starts hidden; will be shown only when needed
+    # content_scroll.grid(row=0, column=1, sticky='ns')
+    content.grid_rowconfigure(0, weight=1)
+    content.grid_columnconfigure(0, weight=1)
+
+    # Cross-platform mouse wheel/trackpad scrolling
+
+    def _on_mousewheel(event):
+        try:
+            delta = event.delta
+            if delta is None:
+                return
+            # Normalize delta across platforms: on Windows typically +/-120 per notch,
+            # on macOS it can be small multiples. Scale to reasonable step count.
+            if delta != 0:
+                steps = -int(round(delta / 120))
+            else:
+                steps = 0
+            # Use scroll_by amount to make trackpads feel smoother
+            if steps == 0:
+                # Fallback minimal movement based on sign
+                steps = -1 if delta > 0 else (1 if delta < 0 else 0)
+            if steps:
+                # Scroll by number of mouse wheel notches, but use "pages" for large deltas to feel smoother
+                granularity = 'units'
+                if abs(steps) >= 3:
+                    granularity = 'pages'
+                content_canvas.yview_scroll(steps, granularity)
+        except Exception:
+            pass
+
+
+    def _on_mousewheel_linux(event):
+        try:
+            if event.num == 4:
+                content_canvas.yview_scroll(-1, 'units')
+            elif event.num == 5:
+                content_canvas.yview_scroll(1, 'units')
+        except Exception:
+            pass
+
+
+    def _bind_to_mousewheel():
+        try:
+            # Bind directly to canvas and inner only, avoid global bind_all to reduce side effects
+            content_canvas.bind('<MouseWheel>', _on_mousewheel)
+            # Linux
+            content_canvas.bind('<Button-4>', _on_mousewheel_linux)
+            content_canvas.bind('<Button-5>', _on_mousewheel_linux)
+        except Exception:
+            pass
+
+
+    def _unbind_from_mousewheel():
+        try:
+            content_canvas.unbind('<MouseWheel>')
+            content_inner.unbind('<MouseWheel>')
+            # Linux
+            content_canvas.unbind('<Button-4>')
+            content_canvas.unbind('<Button-5>')
+        except Exception:
+            pass
+
+    def _enter_scroll_area(event=None):
+        try:
+            _bind_to_mousewheel()
+            content_canvas.focus_set()
+            # Ensure wheel events bubble to the canvas by making canvas first bindtag
+            def apply_bindtags(widget):
+                try:
+                    tags = list(widget.bindtags())
+                    if content_canvas not in tags:
+                        widget.bindtags((content_canvas,) + tuple(t for t in tags if t is not content_canvas))
+                except Exception:
+                    pass
+                for child in getattr(widget, 'winfo_children', lambda: [])():
+                    apply_bindtags(child)
+            apply_bindtags(content_inner)
+            for row in _dash['pool']:
+                apply_bindtags(row['frame'])
+        except Exception:
+            pass
+
+    def _leave_scroll_area(event=None):
+        try:
+            _unbind_from_mousewheel()
+        except Exception:
+            pass
+
+    for w in (content_canvas, content_inner):
+        w.bind('<Enter>', _enter_scroll_area)
+        w.bind('<Leave>', _leave_scroll_area)
+
+    # Reassign sections to content_inner instead of content
+
+    # Input notebook
+    notebook = ttk.Notebook(sidebar)
+    notebook.grid(row=0, column=0, sticky='ew', padx=0, pady=0)
+    sidebar.grid_columnconfigure(0, weight=1)
+    latlon_tab = ttk.Frame(notebook)
+    city_tab = ttk.Frame(notebook)
+    notebook.add(latlon_tab, text="Lat/Lon")
+    notebook.add(city_tab, text="City")
+    pinned_tab = ttk.Frame(notebook)
+    notebook.add(pinned_tab, text="Pinned")
+    # Make City the default tab
+    try:
+        notebook.select(city_tab)
+    except Exception:
+        pass
+
+    # Lat/Lon inputs
+    ttk.Label(latlon_tab, text="Latitude").grid(row=0, column=0, padx=6, pady=6, sticky='w')
+    lat_entry = ttk.Entry(latlon_tab)
+    latlon_tab.grid_columnconfigure(1, weight=1)
+    lat_entry.grid(row=0, column=1, padx=6, pady=6, sticky='ew')
+
+    ttk.Label(latlon_tab, text="Longitude").grid(row=1, column=0, padx=6, pady=6, sticky='w')
+    lon_entry = ttk.Entry(latlon_tab)
+    lon_entry.grid(row=1, column=1, padx=6, pady=6, sticky='ew')
+
+    status_var = tk.StringVar(value="Enter coordinates or city and click Fetch")
+    status_label = ttk.Label(sidebar, textvariable=status_var, style='SubHeader.TLabel')
+    status_label.grid(row=2, column=0, sticky='w', pady=(12,0))
+
+    # Content sections
+    current_card = ttk.Frame(content_inner, padding=12, style='Card.TFrame')
+    current_card.grid(row=0, column=0, sticky='ew')
+    content_inner.grid_columnconfigure(0, weight=1)
+    current_card.grid_columnconfigure(1, weight=1)
+
+    # Current section widgets
+    current_icon = ttk.Label(current_card, text="☀", style='Card.TLabel', font=("Segoe UI Emoji", 32))
+    current_icon.grid(row=0, column=0, rowspan=2, padx=(0,12))
+    current_temp = ttk.Label(current_card, text="--°", style='Card.TLabel', font=("Segoe UI", 28, 'bold'))
+    current_temp.grid(row=0, column=1, sticky='w')
+    current_desc = ttk.Label(current_card, text="", style='Card.TLabel')
+    current_desc.grid(row=1, column=1, sticky='w')
+    current_meta = ttk.Label(current_card, text="", style='Card.TLabel')
+    current_meta.grid(row=0, column=2, rowspan=2, sticky='e')
+
+    # Click for details on current section
+    current_card_tip = tk.StringVar(value="Click for more current details…")
+
+    # Popup manager: one Toplevel per kind, built on first use and afterwards
+    # only refilled and shown again; closing hides it. Contents are prepared
+    # when a forecast is applied, so opening does no computation. At most
+    # POPUP_MAX_OPEN popups are visible; opening another hides the one used
+    # least recently. The explorer and debug panel go through it as well and
+    # keep their state (loaded series, view) while hidden.
+    _popups = {
+        'windows': {},
+        'order': [],
+        'content': {'current': {}, 'daily': []},
+        'daily_index': 0,
+        'counts': {'opens': 0, 'built': 0, 'reused': 0, 'evicted': 0, 'last_open_ms': 0.0},
+    }
+
+    def _popup_touch(kind):
+        order = _popups['order']
+        if kind in order:
+            order.remove(kind)
+        order.append(kind)
+        while len(order) > POPUP_MAX_OPEN:
+            _popups['counts']['evicted'] += 1
+            _popup_hide(order[0])
+
+    def _popup_show(kind, build, fill, on_hide=None):
+        started = time.perf_counter()
+        with span('popup.open', kind=kind):
+            entry = _popups['windows'].get(kind)
+            if entry is None:
+                top = tk.Toplevel(window)
+                top.configure(bg=surface_bg)
+                top.protocol('WM_DELETE_WINDOW', lambda: _popup_hide(kind))
+                top.bind('<Escape>', lambda e: _popup_hide(kind))
+                entry = {'top': top, 'widgets': build(top), 'fill': fill, 'visible': False, 'on_hide': on_hide}
+                _popups['windows'][kind] = entry
+                _popups['counts']['built'] += 1
+            else:
+                _popups['counts']['reused'] += 1
+            fill(entry['widgets'])
+            if not entry['visible']:
+                entry['top'].deiconify()
+                entry['visible'] = True
+            entry['top'].lift()
+            _popup_touch(kind)
+        _popups['counts']['opens'] += 1
+        _popups['counts']['last_open_ms'] = (time.perf_counter() - started) * 1000
+
+    def _popup_visible(kind):
+        entry = _popups['windows'].get(kind)
+        return entry is not None and entry['visible']
+
+    def _popup_hide(kind):
+        if kind in _popups['order']:
+            _popups['order'].remove(kind)
+        entry = _popups['windows'].get(kind)
+        if entry is None or not entry['visible']:
+            return
+        entry['top'].withdraw()
+        entry['visible'] = False
+        if entry['on_hide'] is not None:
+            entry['on_hide']()
+
+    def _popup_refresh():
+        # New data: visible popups are refilled in place
+        for entry in list(_popups['windows'].values()):
+            if entry['visible']:
+                entry['fill'](entry['widgets'])
+
+    def popup_stats():
+        out = dict(_popups['counts'])
+        out['windows'] = len(_popups['windows'])
+        out['visible'] = len(_popups['order'])
+
+        def count(widget):
+            return 1 + sum(count(child) for child in widget.winfo_children())
+        out['widgets'] = sum(count(e['top']) for e in _popups['windows'].values())
+        return out
+
+    def _build_current_popup(top):
+        top.title("Current Details")
+        ttk.Label(top, text="Current Conditions", style='Header.TLabel').grid(row=0, column=0, padx=12, pady=(12,6), sticky='w')
+        desc = ttk.Label(top, text="", style='TLabel')
+        desc.grid(row=1, column=0, padx=12, pady=4, sticky='w')
+        meta = ttk.Label(top, text="", style='TLabel')
+        meta.grid(row=2, column=0, padx=12, pady=(0,12), sticky='w')
+        ttk.Button(top, text="Close", style='Accent.TButton', command=lambda: _popup_hide('current')).grid(row=3, column=0, padx=12, pady=(0,12), sticky='e')
+        return {'desc': desc, 'meta': meta}
+
+    def _fill_current_popup(widgets):
+        content = _popups['content']['current']
+        _apply(widgets['desc'], text=content.get('desc', ''))
+        _apply(widgets['meta'], text=content.get('meta', ''))
+
+    def show_current_details(event=None):
+        _popup_show('current', _build_current_popup, _fill_current_popup)
+
+    for w in (current_card, current_icon, current_temp, current_desc):
+        w.bind('<Button-1>', show_current_details)
+        w.configure(cursor='hand2')
+
+    # Hourly chart
+    hourly_frame = ttk.Frame(content_inner, padding=12, style='Card.TFrame')
+    hourly_frame.grid(row=1, column=0, sticky='ew', pady=(8,0))
+    hourly_label = ttk.Label(hourly_frame, text="Next 24h", style='Card.TLabel')
+    hourly_label.grid(row=0, column=0, sticky='w')
+    hourly_canvas = tk.Canvas(hourly_frame, height=160, bg=surface_bg, highlightthickness=0)
+    hourly_canvas.grid(row=1, column=0, sticky='ew', pady=(6,0))
+    hourly_frame.grid_columnconfigure(0, weight=1)
+
+    # Hourly explorer: every hourly variable over the full horizon (past days
+    # included), one lane per selected variable, zoomed with the wheel and
+    # panned by dragging. Each series gets a min/max pyramid once when the data
+    # arrives; a redraw asks it for about one point pair per pixel over the
+    # visible rows only, so its cost does not grow with the series length.
+    # Redraws are coalesced to one per frame.
+    _explorer = {
+        'top': None,
+        'canvas': None,
+        'info': None,
+        'selected': {},
+        'bundle': None,
+        'pyramids': {},
+        'view': None,
+        'generation': 0,
+        'items': {'lanes': [], 'ticks': [], 'now': None},
+        'job': None,
+        'drag': None,
+        'counts': {'redraws': 0, 'points': 0, 'last_ms': 0.0},
+    }
+
+    def _explorer_rows():
+        bundle = _explorer['bundle']
+        hourly = bundle.get('hourly') if bundle else None
+        return len(hourly) if hourly is not None else 0
+
+    def _explorer_schedule():
+        if _explorer['job'] is None and _explorer['top'] is not None:
+            _explorer['job'] = window.after(LAYOUT_FRAME_MS, _explorer_draw)
+
+    def _explorer_loaded(loaded):
+        # loaded: (generation, bundle); answers for an earlier location are dropped
+        gen, bundle = loaded
+        if _explorer['top'] is None or gen != _explorer['generation']:
+            return
+        if not bundle or 'error' in bundle:
+            _explorer['info'].configure(text=(bundle or {}).get('error') or "No hourly data")
+            return
+        hourly = bundle.get('hourly') or ForecastFrame()
+        _explorer['bundle'] = bundle
+        _explorer['pyramids'] = {name: MinMaxPyramid(col) for name, col in hourly.columns.items()}
+        n = len(hourly)
+        view = _explorer['view']
+        if view is None or view[1] > n - 1:
+            _explorer['view'] = [0.0, float(max(1, n - 1))]
+        _explorer_schedule()
+
+    def _explorer_lane_items(count):
+        lanes = _explorer['items']['lanes']
+        canvas = _explorer['canvas']
+        while len(lanes) < count:
+            color = EXPLORER_COLORS[len(lanes) % len(EXPLORER_COLORS)]
+            lanes.append({
+                'line': canvas.create_line(0, 0, 0, 0, fill=color, width=1.5),
+                'label': canvas.create_text(0, 0, text="", fill=color, anchor='nw', font=("SF Pro Text", 10)),
+                'rule': canvas.create_line(0, 0, 0, 0, fill=border_color),
+            })
+        return lanes
+
+    def _explorer_tick_items(count):
+        ticks = _explorer['items']['ticks']
+        canvas = _explorer['canvas']
+        while len(ticks) < count:
+            ticks.append({
+                'line': canvas.create_line(0, 0, 0, 0, fill=border_color, dash=(2, 4)),
+                'label': canvas.create_text(0, 0, text="", fill=subtle_text, anchor='n', font=("SF Pro Text", 9)),
+            })
+        return ticks
+
+    @traced('render.explorer')
+    def _explorer_draw():
+        _explorer['job'] = None
+        canvas = _explorer['canvas']
+        bundle = _explorer['bundle']
+        # Hidden: nothing to draw until it is shown (and refilled) again
+        if canvas is None or bundle is None or _explorer['view'] is None or not _popup_visible('explorer'):
+            return
+        started = time.perf_counter()
+        hourly = bundle['hourly']
+        units = bundle.get('hourly_units') or {}
+        names = [name for name, var in _explorer['selected'].items() if var.get() and name in _explorer['pyramids']]
+        w = max(300, canvas.winfo_width() or 900)
+        h = max(200, canvas.winfo_height() or 420)
+        left, right, axis = 8, 8, 22
+        plot_w = w - left - right
+        start, stop = _explorer['view']
+        span_rows = max(1e-9, stop - start)
+
+        def x_of(row):
+            return left + (row - start) / span_rows * plot_w
+
+        lanes = _explorer_lane_items(len(names))
+        lane_h = (h - axis) / max(1, len(names))
+        points = 0
+        for i, name in enumerate(names):
+            lane = lanes[i]
+            top_y = i * lane_h
+            # The view's right edge is the last row shown, window() wants it exclusive
+            pts = _explorer['pyramids'][name].window(start, int(stop) + 1, plot_w)
+            points += len(pts)
+            values = [v for _, v in pts]
+            lo, hi = (min(values), max(values)) if values else (0.0, 1.0)
+            scale = (lane_h - 28) / (hi - lo) if hi > lo else 0
+            flat = []
+            for row, v in pts:
+                flat.extend((x_of(row), top_y + 20 + (hi - v) * scale if scale else top_y + lane_h / 2))
+            if len(flat) == 2:
+                flat.extend(flat)
+            if flat:
+                canvas.coords(lane['line'], *flat)
+                canvas.itemconfigure(lane['line'], state='normal')
+            else:
+                canvas.itemconfigure(lane['line'], state='hidden')
+            unit = units.get(name, '')
+            label = f"{name} ({unit})  {lo:.1f} – {hi:.1f}" if values else f"{name} — no data"
+            canvas.coords(lane['label'], left + 4, top_y + 4)
+            canvas.itemconfigure(lane['label'], text=label, state='normal')
+            canvas.coords(lane['rule'], left, top_y + lane_h, w - right, top_y + lane_h)
+            canvas.itemconfigure(lane['rule'], state='normal')
+        for lane in lanes[len(names):]:
+            for item in lane.values():
+                canvas.itemconfigure(item, state='hidden')
+
+        # Time axis: rows are hours from the first timestamp
+        t0 = hourly.times[0] if len(hourly) else 0
+        hours_visible = span_rows
+        step = next((s for s in (1, 3, 6, 12, 24, 48, 168) if hours_visible / s <= plot_w / 90), 168)
+        first = -(-(t0 // 3600 + int(start)) // step) * step - t0 // 3600
+        rows = [r for r in range(int(first), int(stop) + 1, step) if r >= start]
+        ticks = _explorer_tick_items(len(rows))
+        for tick, row in zip(ticks, rows):
+            x = x_of(row)
+            t = t0 + row * 3600
+            stamp = time.gmtime(t)
+            text = time.strftime('%a %d' if step >= 24 or stamp.tm_hour == 0 else '%H:%M', stamp)
+            canvas.coords(tick['line'], x, 0, x, h - axis)
+            canvas.coords(tick['label'], x, h - axis + 4)
+            canvas.itemconfigure(tick['line'], state='normal')
+            canvas.itemconfigure(tick['label'], text=text, state='normal')
+        for tick in ticks[len(rows):]:
+            canvas.itemconfigure(tick['line'], state='hidden')
+            canvas.itemconfigure(tick['label'], state='hidden')
+
+        # Current hour marker
+        items = _explorer['items']
+        if items['now'] is None:
+            items['now'] = canvas.create_line(0, 0, 0, 0, fill=accent, width=2)
+        now_row = ((time.time() + (bundle.get('utc_offset_seconds') or 0)) - t0) / 3600
+        if start <= now_row <= stop:
+            canvas.coords(items['now'], x_of(now_row), 0, x_of(now_row), h - axis)
+            canvas.itemconfigure(items['now'], state='normal')
+        else:
+            canvas.itemconfigure(items['now'], state='hidden')
+
+        c = _explorer['counts']
+        c['redraws'] += 1
+        c['points'] = points
+        c['last_ms'] = (time.perf_counter() - started) * 1000
+        first_day = time.strftime('%a %d %b %H:%M', time.gmtime(t0 + start * 3600))
+        last_day = time.strftime('%a %d %b %H:%M', time.gmtime(t0 + stop * 3600))
+        _explorer['info'].configure(text=f"{first_day} → {last_day} • {points} points drawn")
+
+    def _explorer_zoom(factor, x=None):
+        n = _explorer_rows()
+        if n < 2 or _explorer['view'] is None:
+            return
+        start, stop = _explorer['view']
+        canvas = _explorer['canvas']
+        w = max(300, canvas.winfo_width() or 900)
+        frac = 0.5 if x is None else min(1.0, max(0.0, (x - 8) / (w - 16)))
+        anchor = start + frac * (stop - start)
+        span_rows = min(n - 1, max(EXPLORER_MIN_HOURS, (stop - start) * factor))
+        start = anchor - frac * span_rows
+        _explorer_set_view(start, start + span_rows)
+
+    def _explorer_set_view(start, stop):
+        n = _explorer_rows()
+        span_rows = stop - start
+        start = min(max(0.0, start), max(0.0, n - 1 - span_rows))
+        _explorer['view'] = [start, start + span_rows]
+        _explorer_schedule()
+
+    def _explorer_pan(rows):
+        if _explorer['view'] is not None:
+            start, stop = _explorer['view']
+            _explorer_set_view(start + rows, stop + rows)
+
+    def _explorer_on_wheel(event):
+        up = getattr(event, 'delta', 0) > 0 or getattr(event, 'num', None) == 4
+        _explorer_zoom(0.8 if up else 1.25, event.x)
+
+    def _explorer_on_press(event):
+        _explorer['drag'] = event.x
+
+    def _explorer_on_drag(event):
+        if _explorer['drag'] is None or _explorer['view'] is None:
+            return
+        dx = event.x - _explorer['drag']
+        _explorer['drag'] = event.x
+        start, stop = _explorer['view']
+        w = max(300, _explorer['canvas'].winfo_width() or 900)
+        _explorer_pan(-dx / (w - 16) * (stop - start))
+
+    def _explorer_reset(event=None):
+        n = _explorer_rows()
+        if n:
+            _explorer_set_view(0.0, float(max(1, n - 1)))
+
+    def _explorer_hidden():
+        if _explorer['job'] is not None:
+            window.after_cancel(_explorer['job'])
+        _explorer.update(job=None, drag=None)
+
+    def _build_explorer_popup(top):
+        top.title("Hourly Explorer")
+        top.geometry("920x520")
+        ttk.Label(top, text="Hourly Explorer", style='Header.TLabel').grid(row=0, column=0, padx=12, pady=(12, 4), sticky='w')
+        picks = ttk.Frame(top)
+        picks.grid(row=1, column=0, padx=12, sticky='w')
+        selected = {}
+        for i, name in enumerate(config.VIEW_FIELDS['hourly_explorer']['hourly']):
+            var = tk.BooleanVar(value=name in EXPLORER_DEFAULT_VARS)
+            ttk.Checkbutton(picks, text=name, variable=var, command=_explorer_schedule).grid(row=i // 5, column=i % 5, sticky='w', padx=(0, 8))
+            selected[name] = var
+        canvas = tk.Canvas(top, bg=surface_bg, highlightthickness=0, width=900, height=420)
+        canvas.grid(row=2, column=0, sticky='nsew', padx=12, pady=6)
+        info = ttk.Label(top, text="Loading…", style='SubHeader.TLabel')
+        info.grid(row=3, column=0, padx=12, pady=(0, 10), sticky='w')
+        top.grid_rowconfigure(2, weight=1)
+        top.grid_columnconfigure(0, weight=1)
+        canvas.bind('<MouseWheel>', _explorer_on_wheel)
+        canvas.bind('<Button-4>', _explorer_on_wheel)
+        canvas.bind('<Button-5>', _explorer_on_wheel)
+        canvas.bind('<ButtonPress-1>', _explorer_on_press)
+        canvas.bind('<B1-Motion>', _explorer_on_drag)
+        canvas.bind('<Double-Button-1>', _explorer_reset)
+        canvas.bind('<Configure>', lambda e: _explorer_schedule())
+        top.bind('<Left>', lambda e: _explorer_pan(-(_explorer['view'][1] - _explorer['view'][0]) / 4) if _explorer['view'] else None)
+        top.bind('<Right>', lambda e: _explorer_pan((_explorer['view'][1] - _explorer['view'][0]) / 4) if _explorer['view'] else None)
+        top.bind('<plus>', lambda e: _explorer_zoom(0.8))
+        top.bind('<equal>', lambda e: _explorer_zoom(0.8))
+        top.bind('<minus>', lambda e: _explorer_zoom(1.25))
+        _explorer.update(top=top, canvas=canvas, info=info, selected=selected)
+        return {'canvas': canvas, 'info': info}
+
+    def _fill_explorer_popup(widgets):
+        # Follows the shown location; kept series are redrawn as they were
+        _explorer_follow(last_bundle.get('data'))
+        _explorer_schedule()
+
+    def show_hourly_details(event=None):
+        _popup_show('explorer', _build_explorer_popup, _fill_explorer_popup, _explorer_hidden)
+
+    def _explorer_follow(data):
+        # Load the explorer's data for the shown location (also called when it changes)
+        if not data:
+            _explorer['info'].configure(text="Fetch a location first")
+            return
+        lat, lon = data['lat'], data['lon']
+        bundle = _explorer['bundle']
+        if bundle is not None and (bundle['lat'], bundle['lon']) == (lat, lon):
+            return
+        _explorer['view'] = None
+        _explorer['generation'] += 1
+        gen = _explorer['generation']
+        # The explorer's variables and horizon are fetched separately, only while
+        # it is open; the cache lookup runs on the worker too
+        def task():
+            try:
+                cached, fresh = forecast_cache.get(lat, lon, EXPLORER_VIEWS)
+                if cached is not None:
+                    _ui_queue.put((None, _explorer_loaded, (gen, cached)))
+                    if fresh:
+                        return
+                result = cached_fetch_weather(lat, lon, views=EXPLORER_VIEWS)
+            except Exception as e:
+                result = {"error": str(e)}
+            _ui_queue.put((None, _explorer_loaded, (gen, result)))
+
+        _fetch_pool.submit(task)
+
+    def explorer_stats():
+        out = dict(_explorer['counts'])
+        out['rows'] = _explorer_rows()
+        out['view'] = tuple(_explorer['view']) if _explorer['view'] else None
+        return out
+
+    for w in (hourly_frame, hourly_canvas, hourly_label):
+        w.bind('<Button-1>', show_hourly_details)
+        try:
+            w.configure(cursor='hand2')
+        except Exception:
+            pass
+
+    # Daily grid
+    daily_frame = ttk.Frame(content_inner, padding=12, style='Card.TFrame')
+    # Ensure daily frame is visible initially by giving it some minimum height via padding and letting content expand
+    # Also place it before binding resize so initial geometry is computed
+    daily_frame.grid(row=2, column=0, sticky='ew', pady=(8,0))
+    daily_label = ttk.Label(daily_frame, text="This Week — Min/Max and Trend", style='Card.TLabel')
+    daily_label.grid(row=0, column=0, sticky='w')
+    # All days live on one retained canvas: each row is a handful of canvas
+    # items created on first use and moved/re-texted afterwards, and one click
+    # binding maps the y coordinate back to a row
+    daily_canvas = tk.Canvas(daily_frame, height=DAILY_ROW_HEIGHT * 7, bg=surface_bg, highlightthickness=0, cursor='hand2')
+    daily_canvas.grid(row=1, column=0, sticky='ew', pady=(6,0))
+    daily_frame.grid_columnconfigure(0, weight=1)
+
+    def _build_daily_popup(top):
+        title = ttk.Label(top, text="", style='Header.TLabel')
+        title.grid(row=0, column=0, columnspan=3, padx=12, pady=(12,6), sticky='w')
+        high = ttk.Label(top, text="", style='TLabel')
+        high.grid(row=1, column=0, columnspan=3, padx=12, pady=(0,4), sticky='w')
+        low = ttk.Label(top, text="", style='TLabel')
+        low.grid(row=2, column=0, columnspan=3, padx=12, pady=(0,8), sticky='w')
+        lines = []
+        for i in range(5):
+            line = ttk.Label(top, text="", style='TLabel')
+            line.grid(row=3 + i, column=0, columnspan=3, padx=12, pady=(0,4), sticky='w')
+            lines.append(line)
+        prev_btn = ttk.Button(top, text="‹ Prev", command=lambda: _step_daily_popup(-1))
+        prev_btn.grid(row=8, column=0, padx=(12,4), pady=(8,12), sticky='w')
+        next_btn = ttk.Button(top, text="Next ›", command=lambda: _step_daily_popup(1))
+        next_btn.grid(row=8, column=1, padx=4, pady=(8,12), sticky='w')
+        ttk.Button(top, text="Close", style='Accent.TButton', command=lambda: _popup_hide('daily')).grid(row=8, column=2, padx=12, pady=(8,12), sticky='e')
+        top.grid_columnconfigure(2, weight=1)
+        return {'top': top, 'title': title, 'high': high, 'low': low, 'lines': lines, 'window_title': None}
+
+    def _fill_daily_popup(widgets):
+        days = _popups['content']['daily']
+        index = min(_popups['daily_index'], len(days) - 1)
+        if index < 0:
+            day = {'title': "No daily data", 'high': "", 'low': "", 'lines': ["", "", "", "", ""]}
+        else:
+            day = days[index]
+        if widgets['window_title'] != day['title']:
+            widgets['top'].title(day['title'])
+            widgets['window_title'] = day['title']
+        _apply(widgets['title'], text=day['title'])
+        _apply(widgets['high'], text=day['high'])
+        _apply(widgets['low'], text=day['low'])
+        for label, text in zip(widgets['lines'], day['lines']):
+            _apply(label, text=text)
+
+    def _step_daily_popup(delta):
+        days = _popups['content']['daily']
+        if days:
+            _popups['daily_index'] = max(0, min(len(days) - 1, _popups['daily_index'] + delta))
+            _fill_daily_popup(_popups['windows']['daily']['widgets'])
+
+    def show_daily_details(index):
+        _popups['daily_index'] = index
+        _popup_show('daily', _build_daily_popup, _fill_daily_popup)
+
+    def on_daily_click(event):
+        index = int(daily_canvas.canvasy(event.y) // DAILY_ROW_HEIGHT)
+        if 0 <= index < _daily['shown']:
+            show_daily_details(index)
+
+    daily_canvas.bind('<Button-1>', on_daily_click)
+
+    # Actions
+    fetch_btn = ttk.Button(sidebar, text="Fetch", style='Accent.TButton')
+    fetch_btn.grid(row=1, column=0, pady=(12,0), sticky='ew')
+
+    # Single-column layout: keep chart width responsive to content width
+
+    def on_resize(event=None):
+        try:
+            avail = max(260, min(820, content.winfo_width() - 24))
+            hourly_canvas.config(width=avail)
+        except Exception:
+            pass
+
+    # Layout scheduler: every <Configure> just marks layout dirty. At most one
+    # reflow runs per frame, and it is skipped when the sizes it depends on did
+    # not change. Charts are redrawn at the new width only once resizing has been
+    # quiet for LAYOUT_SETTLE_MS.
+    _layout = {
+        'frame_job': None,
+        'settle_job': None,
+        'size': None,
+        'chart_width': None,
+        'counts': {'events': 0, 'reflows': 0, 'skipped': 0, 'chart_redraws': 0},
+    }
+
+
+    def request_layout(event=None):
+        # A <Configure> bound on the toplevel also fires for every child widget
+        if event is not None and event.widget not in (window, content_canvas, content_inner):
+            return
+        _layout['counts']['events'] += 1
+        if _layout['frame_job'] is None:
+            _layout['frame_job'] = window.after(LAYOUT_FRAME_MS, _run_layout)
+
+
+    def _run_layout():
+        _layout['frame_job'] = None
+        try:
+            size = (content_canvas.winfo_width(), content_canvas.winfo_height(), content_inner.winfo_reqheight())
+            if size == _layout['size']:
+                _layout['counts']['skipped'] += 1
+                return
+            width_changed = _layout['size'] is None or size[0] != _layout['size'][0]
+            _layout['size'] = size
+            _layout['counts']['reflows'] += 1
+            # Keep inner frame width equal to the visible canvas width (no horizontal scroll)
+            content_canvas.itemconfig(_inner_window, width=size[0])
+            _update_scroll_metrics()
+            if _dash['active']:
+                request_dashboard()
+            if width_changed:
+                on_resize()
+                if _layout['settle_job'] is not None:
+                    window.after_cancel(_layout['settle_job'])
+                _layout['settle_job'] = window.after(LAYOUT_SETTLE_MS, _redraw_charts)
+        except Exception:
+            pass
+
+
+    def _redraw_charts():
+        _layout['settle_job'] = None
+        width = hourly_canvas.winfo_width()
+        if width == _layout['chart_width']:
+            return
+        _layout['chart_width'] = width
+        _layout['counts']['chart_redraws'] += 1
+        try:
+            if _hourly_chart['items'] is not None:
+                layout_hourly()
+            if last_bundle.get('data'):
+                render_daily(last_bundle['data'])
+        except Exception:
+            pass
+
+
+    def layout_stats():
+        return dict(_layout['counts'])
+
+
+    window.bind('<Configure>', request_layout)
+    content_canvas.bind('<Configure>', request_layout)
+    content_inner.bind('<Configure>', request_layout)
+    # Apply once at start
+    window.after(50, request_layout)
+
+    # Utility: map basic icon based on simple current conditions
+
+    def icon_for(current):
+        # Same classes as the hourly rows (jweather.derive)
+        try:
+            cc = float(current['cloud_cover']) if current.get('cloud_cover') is not None else None
+        except Exception:
+            cc = None
+        condition = condition_of(cc, current.get('rain') or 0, current.get('snowfall') or 0)
+        return condition_icon(condition, current.get('is_day', 1))
+
+    # Render functions
+
+    # View model: the last value pushed to each widget option and canvas item.
+    # Renders go through _apply()/_apply_item(), which only issue the Tk call
+    # for values that changed; 'applied' and 'skipped' count field updates.
+    _view = {
+        'state': {},
+        'counts': {'applied': 0, 'skipped': 0},
+    }
+
+
+    def _apply(widget, **opts):
+        state = _view['state']
+        changed = {}
+        for name, value in opts.items():
+            key = (id(widget), name)
+            if key not in state or state[key] != value:
+                changed[name] = value
+                state[key] = value
+        _view['counts']['applied'] += len(changed)
+        _view['counts']['skipped'] += len(opts) - len(changed)
+        if changed:
+            widget.configure(**changed)
+
+
+    def _apply_item(canvas, item, coords=None, **opts):
+        state = _view['state']
+        key = (id(canvas), item, 'coords')
+        if coords is not None:
+            if state.get(key) != coords:
+                canvas.coords(item, *coords)
+                state[key] = coords
+                _view['counts']['applied'] += 1
+            else:
+                _view['counts']['skipped'] += 1
+        changed = {}
+        for name, value in opts.items():
+            key = (id(canvas), item, name)
+            if key not in state or state[key] != value:
+                changed[name] = value
+                state[key] = value
+        _view['counts']['applied'] += len(changed)
+        _view['counts']['skipped'] += len(opts) - len(changed)
+        if changed:
+            canvas.itemconfig(item, **changed)
+
+
+    def render_stats():
+        return dict(_view['counts'])
+
+
+    @traced('render.current')
+    def render_current(bundle):
+        cur = bundle.get('current', {})
+        units = bundle.get('current_units', {})
+        t = cur.get('temperature_2m')
+        app = cur.get('apparent_temperature')
+        rh = cur.get('relative_humidity_2m')
+        wind = cur.get('wind_speed_10m')
+        gust = cur.get('wind_gusts_10m')
+        uv = cur.get('uv_index')
+        _apply(current_icon, text=icon_for(cur))
+        if t is not None:
+            _apply(current_temp, text=f"{round(t)}{units.get('temperature_2m','°C')}")
+        else:
+            _apply(current_temp, text="--°")
+        parts = []
+        if rh is not None: parts.append(f"Humidity {rh}{units.get('relative_humidity_2m','%')}")
+        if wind is not None: parts.append(f"Wind {wind}{units.get('wind_speed_10m',' m/s')}")
+        if gust is not None: parts.append(f"Gust {gust}{units.get('wind_gusts_10m',' m/s')}")
+        if uv is not None: parts.append(f"UV {uv}")
+        desc = " • ".join(parts)
+        if app is not None and t is not None:
+            meta = f"Feels like {round(app)}{units.get('apparent_temperature','°C')}  |  Cloud {cur.get('cloud_cover','—')}{units.get('cloud_cover','%')}"
+        else:
+            meta = f"Cloud {cur.get('cloud_cover','—')}{units.get('cloud_cover','%')}"
+        _apply(current_desc, text=desc)
+        _apply(current_meta, text=meta)
+        _popups['content']['current'] = {'desc': desc, 'meta': meta}
+
+
+    # Retained-mode hourly chart: canvas items are created once and afterwards
+    # only moved with coords()/itemconfig(), both when new data arrives and when
+    # the canvas is resized. Moves go through the view model, so items that land
+    # where they already are cost nothing. 'tk_calls' counts canvas calls made
+    # by the chart.
+    _hourly_chart = {
+        'items': None,
+        'dots': [],
+        'labels': [],
+        'vals': [],
+        'size': None,
+        'tk_calls': 0,
+    }
+
+
+    def _hourly_items():
+        c = _hourly_chart
+        if c['items'] is None:
+            c['items'] = {
+                'axis_x': hourly_canvas.create_line(0, 0, 0, 0, fill=border_color),
+                'axis_y': hourly_canvas.create_line(0, 0, 0, 0, fill=border_color),
+                'line': hourly_canvas.create_line(0, 0, 0, 0, fill=accent, width=2),
+                'empty': hourly_canvas.create_text(0, 0, text="No hourly data", fill=subtle_text, state='hidden'),
+            }
+            c['tk_calls'] += 4
+        return c['items']
+
+
+    @traced('render.hourly_layout')
+    def layout_hourly(width=None, height=None):
+        c = _hourly_chart
+        applied = _view['counts']['applied']
+        try:
+            _layout_hourly(c, width, height)
+        finally:
+            c['tk_calls'] += _view['counts']['applied'] - applied
+
+
+    def _layout_hourly(c, width, height):
+        items = _hourly_items()
+        w = max(240, width or hourly_canvas.winfo_width() or 320)
+        h = height or hourly_canvas.winfo_height() or 160
+        c['size'] = (w, h)
+        vals = c['vals']
+        known = [v for v in vals if v == v]
+        if not known:
+            for name in ('axis_x', 'axis_y', 'line'):
+                _apply_item(hourly_canvas, items[name], state='hidden')
+            for item in c['dots'] + c['labels']:
+                _apply_item(hourly_canvas, item, state='hidden')
+            _apply_item(hourly_canvas, items['empty'], coords=(w/2, h/2), state='normal')
+            return
+        _apply_item(hourly_canvas, items['empty'], state='hidden')
+        n = len(vals)
+        tmin, tmax = min(known), max(known)
+        pad = 24
+        # axes
+        _apply_item(hourly_canvas, items['axis_x'], coords=(pad, h-pad, w-pad, h-pad), state='normal')
+        _apply_item(hourly_canvas, items['axis_y'], coords=(pad, pad, pad, h-pad), state='normal')
+        # scale
+        def y(v):
+            if tmax == tmin:
+                return h/2
+            return h - pad - (v - tmin) * (h - 2*pad) / (tmax - tmin)
+        step = (w - 2*pad) / max(1, (n-1))
+        pts = []
+        for i, v in enumerate(vals):
+            # Missing hours (NaN) get no dot; the line joins their neighbours
+            pts.append((pad + i*step, y(v) if v == v else None))
+        # One polyline for the whole series
+        flat = []
+        for x, yv in pts:
+            if yv is not None:
+                flat.extend((x, yv))
+        if len(flat) == 2:
+            flat.extend(flat)
+        _apply_item(hourly_canvas, items['line'], coords=tuple(flat), state='normal')
+        # Labels every 3 hours, thinned further when points get too close
+        label_every = 3 * max(1, -(-28 // max(1, int(step * 3))))
+        n_labels = (n + label_every - 1) // label_every
+        while len(c['dots']) < n:
+            c['dots'].append(hourly_canvas.create_oval(0, 0, 0, 0, fill="#7bd3ff", outline=""))
+            c['tk_calls'] += 1
+        while len(c['labels']) < n_labels:
+            c['labels'].append(hourly_canvas.create_text(0, 0, text="", fill=text_color, font=("Segoe UI", 9)))
+            c['tk_calls'] += 1
+        for i, (x, yv) in enumerate(pts):
+            if yv is None:
+                _apply_item(hourly_canvas, c['dots'][i], state='hidden')
+            else:
+                _apply_item(hourly_canvas, c['dots'][i], coords=(x-3, yv-3, x+3, yv+3), state='normal')
+        for dot in c['dots'][n:]:
+            _apply_item(hourly_canvas, dot, state='hidden')
+        for j, label in enumerate(c['labels']):
+            i = j * label_every
+            if j >= n_labels or pts[i][1] is None:
+                _apply_item(hourly_canvas, label, state='hidden')
+                continue
+            _apply_item(hourly_canvas, label, coords=(pts[i][0], pts[i][1]-12), text=f"{round(vals[i])}°", state='normal')
+
+
+    @traced('render.hourly')
+    def render_hourly(bundle):
+        hourly = bundle.get('hourly') or ForecastFrame()
+        temps = hourly.column('temperature_2m') or []
+        _hourly_chart['vals'] = list(temps[:HOURLY_POINTS])
+        if bundle.get('offline'):
+            _apply(hourly_label, text=f"Next 24h — data from {data_age(bundle)} ago")
+        else:
+            _apply(hourly_label, text="Next 24h")
+        layout_hourly()
+
+
+    # Retained items per daily row, created when a forecast first needs that many rows
+    _daily = {
+        'rows': [],
+        'shown': 0,
+    }
+
+
+    def _daily_row(idx):
+        rows = _daily['rows']
+        while len(rows) <= idx:
+            y = len(rows) * DAILY_ROW_HEIGHT + DAILY_ROW_HEIGHT / 2
+            font = ("SF Pro Text", 11)
+            rows.append({
+                'icon': daily_canvas.create_text(14, y, text="", fill=text_color, font=font),
+                'day': daily_canvas.create_text(34, y, text="", fill=text_color, font=font, anchor='w'),
+                # Climatological normal range, drawn under the forecast bar
+                'normal': daily_canvas.create_rectangle(0, 0, 0, 0, fill="#e5e5ea", outline="", state='hidden'),
+                'bar': daily_canvas.create_rectangle(0, 0, 0, 0, fill="#5ac8fa", outline="", state='hidden'),
+                'hi': daily_canvas.create_text(0, y, text="", fill=text_color, font=font, anchor='e'),
+                'lo': daily_canvas.create_text(0, y, text="", fill=subtle_text, font=font, anchor='e'),
+            })
+        return rows[idx]
+
+
+    def _hide_daily_rows(start):
+        for row in _daily['rows'][start:]:
+            for item in row.values():
+                _apply_item(daily_canvas, item, state='hidden')
+
+
+    @traced('render.daily')
+    def render_daily(bundle):
+        daily = bundle.get('daily') or ForecastFrame()
+        tmax = daily.column('temperature_2m_max') or []
+        tmin = daily.column('temperature_2m_min') or []
+        known_max = [v for v in tmax if v == v]
+        known_min = [v for v in tmin if v == v]
+        n = min(DAILY_DAYS, len(daily), len(tmax), len(tmin))
+        if not known_max or not known_min:
+            _daily['shown'] = 0
+            _hide_daily_rows(0)
+            _apply(daily_label, text="Daily — No data")
+            return
+        overall_min = min(known_min)
+        overall_max = max(known_max)
+        # Normals for the shown days, read from the local archive store
+        climate = _climate['data']
+        normals = [None] * n
+        if climate is not None:
+            for idx in range(n):
+                entry = climate['days'].get(str(day_key(daily.date_at(idx))))
+                if entry:
+                    normals[idx] = (entry['tmin']['mean'], entry['tmax']['mean'])
+                    overall_min = min(overall_min, normals[idx][0])
+                    overall_max = max(overall_max, normals[idx][1])
+        # Add a small weekly insight: least-squares slope of the daily mean
+        trend = "stable"
+        slope = trend_slope([(tmax[i] + tmin[i]) / 2 for i in range(n)])
+        if slope is not None:
+            if slope > TREND_DEG_PER_DAY:
+                trend = "warming"
+            elif slope < -TREND_DEG_PER_DAY:
+                trend = "cooling"
+        weekly_range = f"{round(min(known_min))}–{round(max(known_max))}°"
+        title = "This Week" if n <= 7 else f"Next {n} Days"
+        insight = f"{title} — {weekly_range}, {trend}"
+        anomalies = [(tmax[i] + tmin[i]) / 2 - (normals[i][0] + normals[i][1]) / 2
+                     for i in range(n) if normals[i] and tmax[i] == tmax[i] and tmin[i] == tmin[i]]
+        if anomalies:
+            anomaly = round(sum(anomalies) / len(anomalies))
+            insight += ", near normal" if not anomaly else f", {abs(anomaly)}° {'above' if anomaly > 0 else 'below'} normal"
+        _apply(daily_label, text=insight)
+
+        def scale(v):
+            if overall_max == overall_min:
+                return 0
+            return (v - overall_min) / (overall_max - overall_min)
+        # One width read per render; columns are laid out from it
+        w = max(260, daily_canvas.winfo_width() or 480)
+        bar_x0, bar_x1 = 90, w - 100
+        day_derived = bundle.get('day_derived') or {}
+        _apply(daily_canvas, height=n * DAILY_ROW_HEIGHT)
+        for idx in range(n):
+            row = _daily_row(idx)
+            y = idx * DAILY_ROW_HEIGHT + DAILY_ROW_HEIGHT / 2
+            try:
+                day_str = daily.date_at(idx).strftime('%a %d')
+            except Exception:
+                day_str = f"D{idx+1}"
+            _apply_item(daily_canvas, row['day'], text=day_str, state='normal')
+            _apply_item(daily_canvas, row['hi'], coords=(w - 54, y), state='normal')
+            _apply_item(daily_canvas, row['lo'], coords=(w - 8, y), state='normal')
+            if normals[idx]:
+                n0 = bar_x0 + scale(normals[idx][0]) * (bar_x1 - bar_x0)
+                n1 = bar_x0 + scale(normals[idx][1]) * (bar_x1 - bar_x0)
+                _apply_item(daily_canvas, row['normal'], coords=(n0, y - 9, max(n1, n0 + 2), y + 9), state='normal')
+            else:
+                _apply_item(daily_canvas, row['normal'], state='hidden')
+            if tmax[idx] != tmax[idx] or tmin[idx] != tmin[idx]:
+                _apply_item(daily_canvas, row['bar'], state='hidden')
+                _apply_item(daily_canvas, row['hi'], text="—")
+                _apply_item(daily_canvas, row['lo'], text="—")
+                _apply_item(daily_canvas, row['icon'], text="—", state='normal')
+                continue
+            x0 = bar_x0 + scale(tmin[idx]) * (bar_x1 - bar_x0)
+            x1 = bar_x0 + scale(tmax[idx]) * (bar_x1 - bar_x0)
+            _apply_item(daily_canvas, row['bar'], coords=(x0, y - 5, max(x1, x0 + 2), y + 5), state='normal')
+            _apply_item(daily_canvas, row['hi'], text=f"{round(tmax[idx])}°")
+            _apply_item(daily_canvas, row['lo'], text=f"{round(tmin[idx])}°")
+            condition = day_derived.get(daily.day_at(idx), {}).get('condition')
+            _apply_item(daily_canvas, row['icon'], text=condition_icon(condition), state='normal')
+        _daily['shown'] = n
+        _hide_daily_rows(n)
+
+    # Controller
+
+    # Keep the latest fetched bundle for detail popups
+    last_bundle = {
+        'data': None,
+        'label': None,
+    }
+
+    # Background fetch engine: network calls run on a small worker pool and hand
+    # their results back to the Tk thread through a queue drained by window.after,
+    # so the event loop never blocks on a slow upstream.
+    _fetch_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix='jweather-fetch')
+    _ui_queue = queue.Queue()
+    _fetch_state = {
+        'generation': 0,
+        'pending': [],
+    }
+
+    def run_in_background(job, on_done, on_partial=None):
+        # A newer fetch supersedes older ones: queued jobs are cancelled outright
+        # and results of jobs already on the wire are dropped when they arrive.
+        # With on_partial, job(post) may hand over early results (a cached
+        # forecast) through post(), under the same generation.
+        _fetch_state['generation'] += 1
+        gen = _fetch_state['generation']
+        for fut in _fetch_state['pending']:
+            fut.cancel()
+
+        def post(result):
+            _ui_queue.put((gen, on_partial, result))
+
+        def task():
+            try:
+                result = job(post) if on_partial is not None else job()
+            except Exception as e:
+                result = {"error": str(e)}
+            _ui_queue.put((gen, on_done, result))
+        _fetch_state['pending'] = [_fetch_pool.submit(task)]
+        return gen
+
+
+    def _drain_ui_queue():
+        # How late this tick runs is the event loop's latency under load
+        now = time.perf_counter_ns()
+        due = _fetch_state.get('drain_due')
+        if due is not None and now > due:
+            record('tk.loop_lag', due, now - due)
+        try:
+            while True:
+                gen, on_done, result = _ui_queue.get_nowait()
+                # gen None: results that no user fetch can supersede (dashboard rows)
+                if gen is not None and gen != _fetch_state['generation']:
+                    continue
+                try:
+                    with span('ui.' + getattr(on_done, '__name__', 'callback')):
+                        on_done(result)
+                except Exception:
+                    pass
+        except queue.Empty:
+            pass
+        done = time.perf_counter_ns()
+        record('tk.drain', now, done - now)
+        _fetch_state['drain_due'] = done + 16_000_000
+        window.after(16, _drain_ui_queue)
+
+
+    def data_age(bundle):
+        age = max(0, time.time() - (bundle.get('fetched_at') or time.time()))
+        if age < 3600:
+            return f"{int(age // 60)} min"
+        if age < 86400:
+            return f"{int(age // 3600)} h"
+        return f"{int(age // 86400)} d"
+
+
+    def apply_bundle(data, sections=BUNDLE_SECTIONS):
+        if 'error' in data:
+            status_var.set(data['error'])
+            messagebox.showerror("Error", data['error'])
+            return
+        _climate_follow(data)
+        if 'current' in sections:
+            render_current(data)
+        if 'hourly' in sections:
+            render_hourly(data)
+        if 'daily' in sections:
+            render_daily(data)
+        last_bundle['data'] = data
+        if 'daily' in sections:
+            _popups['content']['daily'] = daily_details(data, _climate['data'])
+        _popup_refresh()
+        if data.get('offline'):
+            status_var.set(f"Offline • data from {data_age(data)} ago")
+        elif data.get('stale'):
+            status_var.set(f"Cached • {round(data['lat'],4)}, {round(data['lon'],4)} (refresh failed)")
+        else:
+            status_var.set(f"Updated • {round(data['lat'],4)}, {round(data['lon'],4)}")
+
+
+    # Climatology overlay: loaded from the archive store (disk only, never the
+    # network) on the worker pool whenever the shown location changes cell
+    _climate = {'cell': None, 'data': None}
+
+    def _climate_loaded(result):
+        cell, data = result
+        if cell != _climate['cell']:
+            return
+        _climate['data'] = data
+        bundle = last_bundle['data']
+        if bundle is not None and data is not None:
+            render_daily(bundle)
+            _popups['content']['daily'] = daily_details(bundle, data)
+            _popup_refresh()
+
+    def _climate_follow(data):
+        cell = archive_store.cell(data['lat'], data['lon'])
+        if cell == _climate['cell']:
+            return
+        _climate.update(cell=cell, data=None)
+        lat, lon = data['lat'], data['lon']
+
+        def task():
+            try:
+                result = archive_store.climatology(lat, lon)
+            except Exception:
+                result = None
+            _ui_queue.put((None, _climate_loaded, (cell, result)))
+
+        _fetch_pool.submit(task)
+
+
+    def perform_fetch(lat, lon, label=None):
+        # Stale-while-revalidate: any cached forecast is painted as soon as the
+        # worker finds it (a disk hit means a SQLite read and a decode, kept off
+        # the Tk thread), then the network is only asked when it is past its
+        # update boundary
+        last_bundle['label'] = label
+        status_var.set("Fetching…")
+
+        def job(post):
+            cached, fresh = forecast_cache.get(lat, lon)
+            if cached is not None:
+                if fresh:
+                    return cached
+                post(cached)
+            return cached_fetch_weather(lat, lon)
+
+        def on_cached(bundle):
+            apply_bundle(bundle)
+            status_var.set("Refreshing…")
+
+        run_in_background(job, apply_bundle, on_cached)
+
+
+    def on_fetch_latlon():
+        perform_fetch(lat_entry.get().strip(), lon_entry.get().strip())
+
+
+    ttk.Label(city_tab, text="City name").grid(row=0, column=0, padx=6, pady=6, sticky='w')
+    # Combobox doubles as a type-ahead list fed from the local geocoding store
+    city_entry = ttk.Combobox(city_tab)
+    city_tab.grid_columnconfigure(1, weight=1)
+    city_entry.grid(row=0, column=1, padx=6, pady=6, sticky='ew')
+
+
+    def sync_coord_fields(lat, lon):
+        try:
+            lat_entry.delete(0, 'end'); lat_entry.insert(0, f"{float(lat):.6f}")
+            lon_entry.delete(0, 'end'); lon_entry.insert(0, f"{float(lon):.6f}")
+        except Exception:
+            pass
+
+
+    def on_fetch_city():
+        name = city_entry.get().strip()
+        if not name:
+            status_var.set("Enter a city name")
+            return
+        status_var.set("Locating…")
+
+        # Geocode and fetch in one background job so the UI thread only sees the result
+        def job():
+            place = geocode_city(name)
+            if 'error' in place:
+                return {'place': place}
+            return {'place': place, 'data': cached_fetch_weather(place['latitude'], place['longitude'])}
+
+        def on_done(result):
+            place = result.get('place') or {}
+            if 'error' in place:
+                if place.get('not_found'):
+                    status_var.set(place['error'])
+                else:
+                    messagebox.showerror("Error", place['error'])
+                    status_var.set("Geocoding error")
+                return
+            sync_coord_fields(place['latitude'], place['longitude'])
+            last_bundle['label'] = place_label(place)
+            apply_bundle(result.get('data') or {"error": "No weather data"})
+
+        run_in_background(job, on_done)
+
+    def on_city_typed(event=None):
+        if event is not None and event.keysym in ('Return', 'Up', 'Down', 'Escape', 'Tab'):
+            return
+        try:
+            city_entry.configure(values=geocode_store.suggest(city_entry.get()))
+        except Exception:
+            pass
+
+
+    city_entry.bind('<KeyRelease>', on_city_typed)
+    city_entry.bind('<<ComboboxSelected>>', lambda e: on_fetch_city())
+    city_entry.bind('<Return>', lambda e: on_fetch_city())
+
+    def on_fetch():
+        # Default to City tab for fetch routing as well; on Pinned, Fetch reloads the dashboard
+        tab = notebook.index('current')
+        if tab == 2:
+            show_dashboard(True, reload=True)
+            return
+        show_dashboard(False)
+        on_fetch_latlon() if tab == 0 else on_fetch_city()
+
+
+    fetch_btn.configure(command=on_fetch)
+
+    # Ensure the window is focused and on top when it opens
+    window.lift()
+    window.attributes('-topmost', True)
+    window.after(0, lambda: window.attributes('-topmost', False))
+    window.focus_force()
+
+    # Attempt to auto-detect user city via IP and fetch on startup
+
+    def try_auto_locate_and_fetch():
+        # Locate off the UI thread; a manual Fetch issued meanwhile supersedes it
+        status_var.set("Locating your city…")
+
+        def on_done(result):
+            if not result or 'error' in result:
+                # If no IP result, just reset status
+                status_var.set("Enter a city or coordinates and click Fetch")
+                return
+            city, lat, lon = result.get('city'), result.get('lat'), result.get('lon')
+            # Prefer direct lat/lon (fast path)
+            if lat is not None and lon is not None:
+                sync_coord_fields(lat, lon)
+                status_var.set("Fetching weather…")
+                perform_fetch(lat, lon)
+                return
+            # Fallback to city geocoding if we only have city
+            if city:
+                try:
+                    city_entry.delete(0, 'end'); city_entry.insert(0, city)
+                except Exception:
+                    pass
+                status_var.set("Finding coordinates…")
+                on_fetch_city()
+                return
+            status_var.set("Enter a city or coordinates and click Fetch")
+
+        run_in_background(lambda: locate_by_ip() or {}, on_done)
+
+    # Auto-refresh: re-fetch the shown location (and any pinned ones) shortly
+    # after each hourly model update, with jitter so clients don't all hit the
+    # API in the same second. While the window is minimized or nobody has
+    # touched it for REFRESH_IDLE_AFTER the refresh is skipped and runs as soon
+    # as the window is used again. Fresh cache entries and 304 answers cost no
+    # download, and only sections whose data changed are repainted.
+    _refresh = {
+        'job': None,
+        'due': False,
+        'last_input': time.monotonic(),
+        'pinned': [],
+        'counts': {'runs': 0, 'skipped_hidden': 0, 'skipped_idle': 0, 'failed': 0, 'unchanged': 0, 'sections_rendered': 0},
+    }
+
+
+    def schedule_refresh(delay=None):
+        if _refresh['job'] is not None:
+            window.after_cancel(_refresh['job'])
+        if delay is None:
+            now = time.time()
+            delay = forecast_cache.expires_after(now) - now + random.uniform(*REFRESH_JITTER)
+        _refresh['job'] = window.after(int(delay * 1000), _refresh_tick)
+
+
+    def _refresh_tick():
+        _refresh['job'] = None
+        schedule_refresh()
+        try:
+            hidden = window.state() in ('iconic', 'withdrawn')
+        except Exception:
+            hidden = False
+        if hidden:
+            _refresh['due'] = True
+            _refresh['counts']['skipped_hidden'] += 1
+        elif time.monotonic() - _refresh['last_input'] > REFRESH_IDLE_AFTER:
+            _refresh['due'] = True
+            _refresh['counts']['skipped_idle'] += 1
+        else:
+            run_refresh()
+
+
+    def run_refresh():
+        # Runs beside user fetches without superseding them; a Fetch issued
+        # meanwhile bumps the generation and this result is dropped
+        _refresh['due'] = False
+        data = last_bundle.get('data')
+        pinned = list(_refresh['pinned'])
+        if not data and not pinned:
+            return
+        _refresh['counts']['runs'] += 1
+        gen = _fetch_state['generation']
+
+        def task():
+            try:
+                if pinned:
+                    fetch_weather_many(pinned)
+                    _ui_queue.put((None, _dash_invalidate, None))
+                result = cached_fetch_weather(data['lat'], data['lon']) if data else None
+            except Exception as e:
+                result = {"error": str(e)}
+            _ui_queue.put((gen, _on_refreshed, result))
+
+        _fetch_pool.submit(task)
+
+
+    def _on_refreshed(result):
+        if not result:
+            return
+        old = last_bundle.get('data') or {}
+        if 'error' in result or result.get('stale'):
+            _refresh['counts']['failed'] += 1
+            schedule_refresh(REFRESH_RETRY)
+        if 'error' in result:
+            return
+        if (old.get('lat'), old.get('lon')) != (result.get('lat'), result.get('lon')):
+            return
+        sections = bundle_changes(old, result)
+        if old.get('offline') != result.get('offline'):
+            # The hourly title carries the age of offline data
+            sections.add('hourly')
+        if not sections:
+            _refresh['counts']['unchanged'] += 1
+        _refresh['counts']['sections_rendered'] += len(sections)
+        apply_bundle(result, sections)
+
+
+    def _note_input(event=None):
+        _refresh['last_input'] = time.monotonic()
+        if _refresh['due']:
+            run_refresh()
+
+
+    def refresh_stats():
+        return dict(_refresh['counts'])
+
+
+    if auto_refresh:
+        for seq in ('<Any-KeyPress>', '<Any-ButtonPress>', '<Motion>'):
+            window.bind_all(seq, _note_input, add='+')
+        window.bind('<Map>', lambda e: _note_input() if e.widget is window else None, add='+')
+        schedule_refresh()
+
+    # Dashboard: every pinned location as one row on content_canvas. Only a
+    # pool of rows covering the viewport exists; scrolling re-binds the rows
+    # that left the screen to the indices that came into view (slot = index %
+    # pool size), so the widget count and per-frame work stay flat however many
+    # locations are pinned. Row data loads lazily for the visible window plus
+    # DASH_PREFETCH_ROWS, and only a small summary is kept per location.
+    _dash = {
+        'active': False,
+        'pins': [],
+        'pool': [],
+        'summaries': {},
+        'fresh': set(),
+        'loading': set(),
+        'job': None,
+        'counts': {'syncs': 0, 'rebinds': 0, 'loads': 0},
+    }
+
+    pins_var = tk.StringVar(value="No pinned locations")
+    ttk.Label(pinned_tab, textvariable=pins_var).grid(row=0, column=0, columnspan=2, padx=6, pady=6, sticky='w')
+    pin_btn = ttk.Button(pinned_tab, text="Pin shown location")
+    pin_btn.grid(row=1, column=0, padx=6, pady=6, sticky='ew')
+    dash_btn = ttk.Button(pinned_tab, text="Show dashboard")
+    dash_btn.grid(row=1, column=1, padx=6, pady=6, sticky='ew')
+    pinned_tab.grid_columnconfigure(0, weight=1)
+    pinned_tab.grid_columnconfigure(1, weight=1)
+
+
+    def _dash_summary(bundle):
+        # Runs on the worker pool; everything a row shows, nothing more
+        if 'error' in bundle:
+            return {'error': bundle['error']}
+        cur = bundle.get('current') or {}
+        units = bundle.get('current_units') or {}
+        t = cur.get('temperature_2m')
+        temps = (bundle.get('hourly') or ForecastFrame()).column('temperature_2m') or []
+        vals = list(temps[:HOURLY_POINTS])
+        known = [v for v in vals if v == v]
+        spark = ()
+        if len(known) >= 2:
+            lo, hi = min(known), max(known)
+            step = (DASH_SPARK_WIDTH - 4) / (len(vals) - 1)
+            for i, v in enumerate(vals):
+                if v == v:
+                    y = DASH_SPARK_HEIGHT / 2 if hi == lo else DASH_SPARK_HEIGHT - 2 - (v - lo) * (DASH_SPARK_HEIGHT - 4) / (hi - lo)
+                    spark += (2 + i * step, y)
+        parts = []
+        if cur.get('wind_speed_10m') is not None:
+            parts.append(f"Wind {cur['wind_speed_10m']}{units.get('wind_speed_10m',' m/s')}")
+        if cur.get('cloud_cover') is not None:
+            parts.append(f"Cloud {cur['cloud_cover']}{units.get('cloud_cover','%')}")
+        return {
+            'temp': f"{round(t)}{units.get('temperature_2m','°C')}" if t is not None else "--°",
+            'icon': icon_for(cur),
+            'desc': " • ".join(parts),
+            'spark': spark,
+        }
+
+
+    def _dash_make_row():
+        frame = ttk.Frame(content_canvas, style='Card.TFrame', padding=(8, 4))
+        row = {
+            'frame': frame,
+            'icon': ttk.Label(frame, text="", style='Card.TLabel', width=2, font=("Segoe UI Emoji", 16)),
+            'name': ttk.Label(frame, text="", style='Card.TLabel', width=24),
+            'temp': ttk.Label(frame, text="", style='Card.TLabel', width=6, font=("Segoe UI", 14, 'bold')),
+            'spark': tk.Canvas(frame, width=DASH_SPARK_WIDTH, height=DASH_SPARK_HEIGHT, bg=surface_bg, highlightthickness=0),
+            'desc': ttk.Label(frame, text="", style='Card.TLabel'),
+            'index': None,
+        }
+        for key in ('icon', 'name', 'temp', 'spark'):
+            row[key].pack(side='left', padx=(0, 8))
+        row['desc'].pack(side='left', fill='x', expand=True)
+        row['line'] = row['spark'].create_line(0, 0, 0, 0, fill=accent, width=2, state='hidden')
+        row['item'] = content_canvas.create_window(0, 0, window=frame, anchor='nw', height=DASH_ROW_HEIGHT - 4, state='hidden')
+        for key in ('frame', 'icon', 'name', 'temp', 'spark', 'desc'):
+            row[key].bind('<Button-1>', lambda e, r=row: _dash_open(r))
+            row[key].bind('<Button-3>', lambda e, r=row: _dash_unpin(r))
+            try:
+                row[key].configure(cursor='hand2')
+            except Exception:
+                pass
+        return row
+
+
+    def _dash_bind(row, pin):
+        _apply(row['name'], text=pin['label'])
+        summary = _dash['summaries'].get(pin['id'])
+        if summary is None or 'error' in summary:
+            _apply(row['icon'], text="")
+            _apply(row['temp'], text="…" if summary is None else "—")
+            _apply(row['desc'], text="Loading…" if summary is None else "Unavailable")
+            _apply_item(row['spark'], row['line'], state='hidden')
+            return
+        _apply(row['icon'], text=summary['icon'])
+        _apply(row['temp'], text=summary['temp'])
+        _apply(row['desc'], text=summary['desc'])
+        if summary['spark']:
+            _apply_item(row['spark'], row['line'], coords=summary['spark'], state='normal')
+        else:
+            _apply_item(row['spark'], row['line'], state='hidden')
+
+
+    def request_dashboard():
+        if _dash['job'] is None:
+            _dash['job'] = window.after(LAYOUT_FRAME_MS, sync_dashboard)
+
+
+    @traced('render.dashboard')
+    def sync_dashboard():
+        _dash['job'] = None
+        if not _dash['active']:
+            return
+        _dash['counts']['syncs'] += 1
+        pins = _dash['pins']
+        pool = _dash['pool']
+        width = content_canvas.winfo_width()
+        height = content_canvas.winfo_height()
+        while len(pool) < height // DASH_ROW_HEIGHT + 2:
+            pool.append(_dash_make_row())
+        top = content_canvas.canvasy(0)
+        first = max(0, int(top // DASH_ROW_HEIGHT))
+        last = min(len(pins), first + len(pool), int((top + height) // DASH_ROW_HEIGHT) + 1)
+        shown = set()
+        for index in range(first, last):
+            slot = index % len(pool)
+            row = pool[slot]
+            shown.add(slot)
+            if row['index'] != index:
+                row['index'] = index
+                _dash['counts']['rebinds'] += 1
+            _apply_item(content_canvas, row['item'], coords=(0, index * DASH_ROW_HEIGHT), width=width, state='normal')
+            _dash_bind(row, pins[index])
+        for slot, row in enumerate(pool):
+            if slot not in shown:
+                row['index'] = None
+                _apply_item(content_canvas, row['item'], state='hidden')
+        # Lazy loading for what is on screen and just around it, in whole
+        # blocks so fast scrolling still makes batched requests
+        lo = max(0, first - DASH_PREFETCH_ROWS) // DASH_LOAD_BLOCK * DASH_LOAD_BLOCK
+        hi = min(len(pins), last + DASH_PREFETCH_ROWS)
+        for start in range(lo, hi, DASH_LOAD_BLOCK):
+            block = pins[start:start + DASH_LOAD_BLOCK]
+            missing = [p for p in block if p['id'] not in _dash['fresh'] and p['id'] not in _dash['loading']]
+            if missing:
+                _dash_load(missing)
+
+
+    def _dash_load(pins):
+        _dash['counts']['loads'] += 1
+        _dash['loading'].update(p['id'] for p in pins)
+
+        def task():
+            try:
+                bundles = fetch_weather_many([(p['lat'], p['lon']) for p in pins])
+                result = {p['id']: _dash_summary(b) for p, b in zip(pins, bundles)}
+            except Exception as e:
+                result = {p['id']: {'error': str(e)} for p in pins}
+            _ui_queue.put((None, _dash_loaded, result))
+
+        _fetch_pool.submit(task)
+
+
+    def _dash_loaded(result):
+        _dash['summaries'].update(result)
+        _dash['fresh'].update(result)
+        _dash['loading'].difference_update(result)
+        request_dashboard()
+
+
+    def _dash_invalidate(_=None):
+        # Pinned forecasts were refreshed; rows keep their summary until reloaded
+        _dash['fresh'].clear()
+        if _dash['active']:
+            request_dashboard()
+
+
+    def _set_pins(pins):
+        _dash['pins'] = pins
+        ids = {p['id'] for p in pins}
+        for pin_id in [k for k in _dash['summaries'] if k not in ids]:
+            del _dash['summaries'][pin_id]
+            _dash['fresh'].discard(pin_id)
+        _refresh['pinned'][:] = [(p['lat'], p['lon']) for p in pins]
+        pins_var.set(f"{len(pins)} pinned location{'s' if len(pins) != 1 else ''}" if pins else "No pinned locations")
+        if _dash['active']:
+            _update_scroll_metrics()
+            request_dashboard()
+
+
+    def show_dashboard(on=True, reload=False):
+        if reload:
+            _dash_invalidate()
+        if on == _dash['active']:
+            return
+        _dash['active'] = on
+        _apply(dash_btn, text="Hide dashboard" if on else "Show dashboard")
+        content_canvas.itemconfig(_inner_window, state='hidden' if on else 'normal')
+        if not on:
+            for row in _dash['pool']:
+                row['index'] = None
+                _apply_item(content_canvas, row['item'], state='hidden')
+        content_canvas.yview_moveto(0)
+        _update_scroll_metrics()
+        if on:
+            if not _dash['pins']:
+                status_var.set("Pin a location to see it on the dashboard")
+            request_dashboard()
+
+
+    def _dash_open(row):
+        if row['index'] is None or row['index'] >= len(_dash['pins']):
+            return
+        pin = _dash['pins'][row['index']]
+        show_dashboard(False)
+        sync_coord_fields(pin['lat'], pin['lon'])
+        perform_fetch(pin['lat'], pin['lon'], label=pin['label'])
+
+
+    def _dash_unpin(row):
+        if row['index'] is None or row['index'] >= len(_dash['pins']):
+            return
+        pin = _dash['pins'][row['index']]
+        pin_store.remove(pin['id'])
+        _set_pins([p for p in _dash['pins'] if p['id'] != pin['id']])
+        status_var.set(f"Unpinned {pin['label']}")
+
+
+    def pin_shown_location():
+        data = last_bundle.get('data')
+        if not data:
+            status_var.set("Fetch a location first, then pin it")
+            return
+        label = last_bundle.get('label') or f"{data['lat']:.2f}, {data['lon']:.2f}"
+        pin = pin_store.add(label, data['lat'], data['lon'])
+        if all(p['id'] != pin['id'] for p in _dash['pins']):
+            _set_pins(_dash['pins'] + [pin])
+        status_var.set(f"Pinned {pin['label']}")
+
+
+    def dashboard_stats():
+        out = dict(_dash['counts'])
+        out['pool'] = len(_dash['pool'])
+        out['pins'] = len(_dash['pins'])
+        out['summaries'] = len(_dash['summaries'])
+        return out
+
+
+    pin_btn.configure(command=pin_shown_location)
+    dash_btn.configure(command=lambda: show_dashboard(not _dash['active']))
+    # Pinned list is read off the UI thread so startup does no extra I/O
+    _fetch_pool.submit(lambda: _ui_queue.put((None, _set_pins, pin_store.all())))
+
+    # Seed the geocoding store from a bundled gazetteer (if any) off the UI thread
+    _fetch_pool.submit(geocode_store.seed_from_gazetteer)
+
+    # Kick off auto-locate shortly after UI initializes
+    if auto_locate:
+        window.after(400, try_auto_locate_and_fetch)
+    # Start delivering background results to the UI
+    window.after(16, _drain_ui_queue)
+
+    # Hidden debug panel (Ctrl+Shift+D): span percentiles from jweather.trace,
+    # refreshed once a second while open. Opening it turns tracing on.
+    _debug = {'top': None, 'tree': None, 'info': None, 'job': None, 'recording': None}
+
+    def _debug_refresh():
+        _debug['job'] = None
+        if not _popup_visible('debug'):
+            return
+        tree = _debug['tree']
+        for item in tree.get_children():
+            tree.delete(item)
+        for name, st in sorted(trace.summary().items()):
+            tree.insert('', 'end', values=(name, st['count'], f"{st['p50']:.2f}", f"{st['p95']:.2f}",
+                                           f"{st['p99']:.2f}", f"{st['max']:.2f}"))
+        http = http_stats()
+        _debug['info'].configure(text=(
+            f"{'recording' if trace.enabled() else 'paused'} • {len(trace.spans())} spans • "
+            f"HTTP {http['requests']} requests / {http['handshakes']} handshakes • "
+            f"render {render_stats()['applied']} applied / {render_stats()['skipped']} skipped"))
+        _debug['job'] = window.after(1000, _debug_refresh)
+
+    def _debug_hidden():
+        if _debug['job'] is not None:
+            window.after_cancel(_debug['job'])
+            _debug['job'] = None
+
+    def _debug_export():
+        import os
+        os.makedirs(config.CACHE_DIR, exist_ok=True)
+        path = os.path.join(config.CACHE_DIR, time.strftime('trace-%Y%m%d-%H%M%S.json'))
+        try:
+            trace.export_chrome(path)
+            status_var.set(f"Trace written to {path}")
+        except OSError as e:
+            status_var.set(f"Trace export failed: {e}")
+
+    def _build_debug_popup(top):
+        top.title("JWeather — Performance")
+        cols = ('span', 'count', 'p50', 'p95', 'p99', 'max')
+        tree = ttk.Treeview(top, columns=cols, show='headings', height=16)
+        for col in cols:
+            tree.heading(col, text=col if col in ('span', 'count') else f"{col} ms")
+            tree.column(col, width=200 if col == 'span' else 70, anchor='w' if col == 'span' else 'e')
+        tree.grid(row=0, column=0, columnspan=4, sticky='nsew', padx=8, pady=(8, 4))
+        info = ttk.Label(top, style='SubHeader.TLabel')
+        info.grid(row=1, column=0, columnspan=4, sticky='w', padx=8)
+        recording = tk.BooleanVar(value=True)
+        ttk.Checkbutton(top, text="Record", variable=recording,
+                        command=lambda: trace.enable(recording.get())).grid(row=2, column=0, padx=8, pady=8, sticky='w')
+        ttk.Button(top, text="Clear", command=trace.clear).grid(row=2, column=1, pady=8)
+        ttk.Button(top, text="Export Chrome trace", command=_debug_export).grid(row=2, column=2, pady=8)
+        ttk.Button(top, text="Close", style='Accent.TButton', command=lambda: _popup_hide('debug')).grid(row=2, column=3, padx=8, pady=8, sticky='e')
+        top.grid_rowconfigure(0, weight=1)
+        top.grid_columnconfigure(0, weight=1)
+        _debug.update(top=top, tree=tree, info=info, recording=recording)
+        return {'tree': tree, 'info': info}
+
+    def _fill_debug_popup(widgets):
+        _debug_hidden()
+        _debug['job'] = window.after_idle(_debug_refresh)
+
+    def show_debug_panel(event=None):
+        # Opening it (again) turns tracing on
+        if not _popup_visible('debug'):
+            trace.enable()
+            if _debug['recording'] is not None:
+                _debug['recording'].set(True)
+        _popup_show('debug', _build_debug_popup, _fill_debug_popup, _debug_hidden)
+
+    window.bind('<Control-Shift-D>', show_debug_panel)
+    window.bind('<Control-Shift-d>', show_debug_panel)
+
+    # Stop handing out work once the window goes away
+    def _on_destroy(event):
+        if event.widget is window:
+            _fetch_pool.shutdown(wait=False, cancel_futures=True)
+
+    window.bind('<Destroy>', _on_destroy, add='+')
+
+    return SimpleNamespace(
+        window=window,
+        perform_fetch=perform_fetch,
+        city_entry=city_entry,
+        fetch_city=on_fetch_city,
+        layout_stats=layout_stats,
+        hourly_chart=_hourly_chart,
+        render_stats=render_stats,
+        show_dashboard=show_dashboard,
+        dashboard_stats=dashboard_stats,
+        run_refresh=run_refresh,
+        refresh_stats=refresh_stats,
+        pinned=_refresh['pinned'],
+        show_debug_panel=show_debug_panel,
+        show_hourly_explorer=show_hourly_details,
+        explorer_zoom=_explorer_zoom,
+        explorer_pan=_explorer_pan,
+        explorer_stats=explorer_stats,
+        show_current_details=show_current_details,
+        show_daily_details=show_daily_details,
+        popup_stats=popup_stats,
+    )
+
+
+def main():
+    app = create_app()
+    app.window.mainloop()
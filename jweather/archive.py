@@ -0,0 +1,490 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from array import array
+from datetime import date, timedelta
+
+from . import config
+from .aggregate import aggregate_days, percentile
+from .codec import loads
+from .frame import ForecastFrame, iso_to_epoch
+from .trace import span
+
+# Historical store fed from the Open-Meteo archive API. Hourly history lives
+# under CACHE_DIR/archive/<cell>/<year>.jwa, one file per location (snapped to
+# ARCHIVE_GRID) and local calendar year. A file is a header naming its columns
+# followed by chunks that are only ever appended:
+#   header  b'JWA1', u16 column count, then per column u8 length + UTF-8 name
+#   chunk   b'CHNK', i64 first hour (local epoch seconds), u32 hours,
+#           u32 compressed length per column, then each column's float32
+#           values zlib-compressed
+# Readers mmap the file and walk the small chunk headers, so a range query
+# decompresses only the chunks it overlaps. A chunk cut short by a crash is
+# ignored on read and truncated away before the next append.
+# Backfills run in ARCHIVE_CHUNK_DAYS requests and resume from whatever the
+# year files already hold. Afterwards the daily climatology (normals and
+# percentiles per calendar day) is written to climatology.json next to them,
+# which the daily view reads without going to the network.
+ARCHIVE_GRID = 0.1            # degrees; the reanalysis behind the archive is ~0.25°
+ARCHIVE_YEARS = 30
+ARCHIVE_CHUNK_DAYS = 92       # days per archive request
+ARCHIVE_LAG_DAYS = 5          # the archive trails today by about this much
+CLIMATE_WINDOW_DAYS = 7       # days either side of a date pooled into its normal
+CLIMATE_PERCENTILES = (10, 50, 90)
+_MAGIC = b'JWA1'
+_CHUNK = struct.Struct('<4sqI')
+_NAN = float('nan')
+
+
+def _read_header(mm):
+    # (columns, end offset) of a year file's header, or None when it is not
+    # one or was cut short
+    size = len(mm)
+    if size < 6 or mm[:4] != _MAGIC:
+        return None
+    ncols = struct.unpack_from('<H', mm, 4)[0]
+    pos = 6
+    columns = []
+    for _ in range(ncols):
+        if pos >= size or pos + 1 + mm[pos] > size:
+            return None
+        try:
+            columns.append(mm[pos + 1:pos + 1 + mm[pos]].decode('utf-8'))
+        except UnicodeDecodeError:
+            return None
+        pos += 1 + mm[pos]
+    return columns, pos
+
+
+def _hour_start(d):
+    # Local epoch seconds of the midnight starting a date
+    return iso_to_epoch(d.isoformat())
+
+
+def _year_of(t):
+    return date.fromordinal(t // 86400 + date(1970, 1, 1).toordinal()).year
+
+
+def day_key(d):
+    # Calendar day index 0..364 of a non-leap year; 29 Feb shares 28 Feb's
+    if d.month == 2 and d.day == 29:
+        d = d.replace(day=28)
+    return (date(2001, d.month, d.day) - date(2001, 1, 1)).days
+
+
+class ArchiveStore:
+    def __init__(self, root=None, grid=ARCHIVE_GRID):
+        self._root = root
+        self.grid = grid
+        self._lock = threading.RLock()
+        self._indexes = {}
+        self._climate = {}
+        self._counters = {'appended_hours': 0, 'chunks_read': 0, 'chunks_skipped': 0}
+
+    @property
+    def root(self):
+        return self._root or os.path.join(config.CACHE_DIR, 'archive')
+
+    def cell(self, lat, lon):
+        g = self.grid
+        return f"{round(float(lat) / g) * g:+.2f}_{round(float(lon) / g) * g:+.2f}"
+
+    def _dir(self, lat, lon):
+        return os.path.join(self.root, self.cell(lat, lon))
+
+    def _path(self, lat, lon, year):
+        return os.path.join(self._dir(lat, lon), f"{year}.jwa")
+
+    def years(self, lat, lon):
+        try:
+            names = os.listdir(self._dir(lat, lon))
+        except OSError:
+            return []
+        return sorted(int(n[:-4]) for n in names if n.endswith('.jwa') and n[:-4].isdigit())
+
+    def _index(self, path):
+        """Return (columns, chunks, valid_end) for a year file, or None when it does not exist.
+
+        chunks is a list of (first_hour, hours, offset, lengths); valid_end is
+        the byte offset just past the last complete chunk, where the next
+        append truncates the file. A file whose header was torn by an
+        interrupted first write counts as missing and is rewritten.
+        """
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        stamp = (st.st_mtime_ns, st.st_size)
+        cached = self._indexes.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+        with open(path, 'rb') as fh:
+            if st.st_size == 0:
+                return None
+            with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                header = _read_header(mm)
+                if header is None:
+                    return None
+                columns, pos = header
+                lengths_fmt = struct.Struct(f'<{len(columns)}I')
+                chunks = []
+                valid_end = pos
+                size = len(mm)
+                while pos + _CHUNK.size + lengths_fmt.size <= size:
+                    tag, first, hours = _CHUNK.unpack_from(mm, pos)
+                    if tag != b'CHNK' or hours <= 0:
+                        break
+                    lengths = lengths_fmt.unpack_from(mm, pos + _CHUNK.size)
+                    body = pos + _CHUNK.size + lengths_fmt.size
+                    end = body + sum(lengths)
+                    if end > size:
+                        break
+                    chunks.append((first, hours, body, lengths))
+                    pos = valid_end = end
+        index = (columns, chunks, valid_end)
+        self._indexes[path] = (stamp, index)
+        return index
+
+    def covered_until(self, lat, lon, year):
+        """Return the local epoch second after the last stored hour of a year, or None."""
+        index = self._index(self._path(lat, lon, year))
+        if not index or not index[1]:
+            return None
+        first, hours, _, _ = index[1][-1]
+        return first + hours * 3600
+
+    def append(self, lat, lon, frame):
+        """Add hourly rows to the year files; rows at or before what a file already holds are skipped.
+
+        Returns the number of hours written.
+        """
+        if frame is None or not len(frame):
+            return 0
+        written = 0
+        times = frame.times
+        with self._lock:
+            start = 0
+            n = len(times)
+            # One chunk per run of consecutive hours within a year
+            for i in range(1, n + 1):
+                if i < n and times[i] - times[i - 1] == 3600 and _year_of(times[i]) == _year_of(times[start]):
+                    continue
+                written += self._append_run(lat, lon, frame, start, i)
+                start = i
+        self._counters['appended_hours'] += written
+        return written
+
+    def _append_run(self, lat, lon, frame, start, stop):
+        times = frame.times
+        year = _year_of(times[start])
+        path = self._path(lat, lon, year)
+        index = self._index(path)
+        if index is not None and index[1]:
+            first, hours, _, _ = index[1][-1]
+            end = first + hours * 3600
+            while start < stop and times[start] < end:
+                start += 1
+        if start >= stop:
+            return 0
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if index is None:
+            columns = sorted(frame.columns)
+            head = bytearray(_MAGIC + struct.pack('<H', len(columns)))
+            for name in columns:
+                raw = name.encode('utf-8')
+                head += bytes([len(raw)]) + raw
+            with open(path, 'wb') as fh:
+                fh.write(head)
+            valid_end = len(head)
+        else:
+            columns, _, valid_end = index
+        blobs = []
+        for name in columns:
+            col = frame.columns.get(name)
+            values = col[start:stop] if col is not None else array('f', [_NAN]) * (stop - start)
+            blobs.append(zlib.compress(values.tobytes(), 6))
+        chunk = (_CHUNK.pack(b'CHNK', times[start], stop - start)
+                 + struct.pack(f'<{len(columns)}I', *(len(b) for b in blobs)) + b''.join(blobs))
+        with open(path, 'r+b') as fh:
+            # Drop a torn tail left by an interrupted write before appending
+            fh.truncate(valid_end)
+            fh.seek(valid_end)
+            fh.write(chunk)
+            fh.flush()
+            os.fsync(fh.fileno())
+        return stop - start
+
+    def query(self, lat, lon, start, stop, columns=None):
+        """Return a ForecastFrame with the stored hours in [start, stop) (local epoch seconds or dates).
+
+        Hours that were never ingested are simply absent; columns a file does
+        not have come back as NaN.
+        """
+        if isinstance(start, date):
+            start = _hour_start(start)
+        if isinstance(stop, date):
+            stop = _hour_start(stop)
+        times = array('q')
+        out = None
+        with span('archive.query'):
+            for year in self.years(lat, lon):
+                if _hour_start(date(year + 1, 1, 1)) <= start or _hour_start(date(year, 1, 1)) >= stop:
+                    continue
+                path = self._path(lat, lon, year)
+                index = self._index(path)
+                if not index:
+                    continue
+                names, chunks, _ = index
+                if out is None:
+                    out = {name: array('f') for name in (columns or names)}
+                with open(path, 'rb') as fh, mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    for first, hours, offset, lengths in chunks:
+                        last = first + hours * 3600
+                        if last <= start or first >= stop:
+                            self._counters['chunks_skipped'] += 1
+                            continue
+                        self._counters['chunks_read'] += 1
+                        lo = max(0, (start - first) // 3600)
+                        hi = min(hours, (stop - first + 3599) // 3600)
+                        times.extend(range(first + lo * 3600, first + hi * 3600, 3600))
+                        pos = offset
+                        blobs = {}
+                        for name, length in zip(names, lengths):
+                            blobs[name] = (pos, length)
+                            pos += length
+                        for name, col in out.items():
+                            if name in blobs:
+                                pos, length = blobs[name]
+                                values = array('f')
+                                values.frombytes(zlib.decompress(mm[pos:pos + length]))
+                                col.extend(values[lo:hi])
+                            else:
+                                col.extend(array('f', [_NAN]) * (hi - lo))
+        return ForecastFrame(times, out or {name: array('f') for name in (columns or ())})
+
+    def stats(self):
+        out = dict(self._counters)
+        files = size = 0
+        for base, _, names in os.walk(self.root):
+            for name in names:
+                if name.endswith('.jwa'):
+                    files += 1
+                    size += os.path.getsize(os.path.join(base, name))
+        out['files'] = files
+        out['bytes'] = size
+        return out
+
+    # Climatology
+
+    def _signature(self, lat, lon):
+        # Changes whenever any year file of the location does
+        out = {}
+        for year in self.years(lat, lon):
+            try:
+                out[str(year)] = os.path.getsize(self._path(lat, lon, year))
+            except OSError:
+                pass
+        return out
+
+    def climatology(self, lat, lon, refresh=False):
+        """Return {'years': [first, last], 'days': {day_key: {...}}} or None when nothing is stored.
+
+        day_key is the day of a non-leap year (0..364, see day_key()); each
+        entry holds 'tmax' and 'tmin' (mean and CLIMATE_PERCENTILES of the
+        daily extremes, °C) and 'precip' (mean daily total), pooled over
+        CLIMATE_WINDOW_DAYS either side of the date in every stored year.
+        """
+        path = os.path.join(self._dir(lat, lon), 'climatology.json')
+        signature = self._signature(lat, lon)
+        if not signature:
+            return None
+        memo = self._climate.get(path)
+        if not refresh and memo is not None and memo['signature'] == signature:
+            return memo
+        if not refresh:
+            try:
+                with open(path, encoding='utf-8') as fh:
+                    saved = json.load(fh)
+                if saved.get('signature') == signature:
+                    self._climate[path] = saved
+                    return saved
+            except (OSError, ValueError):
+                pass
+        with span('archive.climatology'):
+            result = self._compute_climatology(lat, lon)
+        result['signature'] = signature
+        self._climate[path] = result
+        try:
+            tmp = path + '.tmp'
+            with open(tmp, 'w', encoding='utf-8') as fh:
+                json.dump(result, fh)
+            os.replace(tmp, path)
+        except OSError:
+            pass
+        return result
+
+    def _compute_climatology(self, lat, lon):
+        # Daily extremes and totals per stored day, keyed by calendar day
+        samples = [{'tmax': [], 'tmin': [], 'precip': []} for _ in range(365)]
+        years = self.years(lat, lon)
+        for year in years:
+            frame = self.query(lat, lon, date(year, 1, 1), date(year + 1, 1, 1), ['temperature_2m', 'precipitation'])
+            for day, stats in aggregate_days(frame, buckets=(), percentiles=()).items():
+                temp = stats.get('temperature_2m')
+                # Skip days the archive only partly covers
+                if not temp or temp['count'] < 20:
+                    continue
+                key = day_key(date.fromordinal(day + date(1970, 1, 1).toordinal()))
+                samples[key]['tmax'].append(temp['max'])
+                samples[key]['tmin'].append(temp['min'])
+                rain = stats.get('precipitation')
+                if rain:
+                    samples[key]['precip'].append(rain['mean'] * rain['count'])
+        days = {}
+        for key in range(365):
+            pooled = {'tmax': [], 'tmin': [], 'precip': []}
+            for k in range(key - CLIMATE_WINDOW_DAYS, key + CLIMATE_WINDOW_DAYS + 1):
+                for name, values in samples[k % 365].items():
+                    pooled[name].extend(values)
+            if not pooled['tmax']:
+                continue
+            entry = {}
+            for name in ('tmax', 'tmin'):
+                ordered = sorted(pooled[name])
+                entry[name] = {'mean': sum(ordered) / len(ordered)}
+                for q in CLIMATE_PERCENTILES:
+                    entry[name][f'p{q}'] = percentile(ordered, q)
+            precip = pooled['precip']
+            entry['precip'] = {'mean': sum(precip) / len(precip) if precip else None}
+            entry['samples'] = len(pooled['tmax'])
+            days[str(key)] = entry
+        return {'years': [years[0], years[-1]] if years else None, 'days': days}
+
+    def normals(self, lat, lon, day):
+        """Return the climatology entry for a date (or day number), or None."""
+        clim = self.climatology(lat, lon)
+        if clim is None:
+            return None
+        if not isinstance(day, date):
+            day = date.fromordinal(day + date(1970, 1, 1).toordinal())
+        return clim['days'].get(str(day_key(day)))
+
+
+def fetch_archive(lat, lon, start, end, hourly=None):
+    """Fetch hourly history for the dates [start, end] inclusive; returns a ForecastFrame or {"error": ...}."""
+    from .transport import http_session, request_errors
+    params = {
+        "latitude": lat,
+        "longitude": lon,
+        "start_date": start.isoformat(),
+        "end_date": end.isoformat(),
+        "hourly": ",".join(hourly or config.ARCHIVE_HOURLY),
+        "timezone": "auto",
+    }
+    try:
+        resp = http_session().get(config.ARCHIVE_URL, params=params, timeout=30)
+        resp.raise_for_status()
+        with span('decode', bytes=len(resp.content)):
+            data = loads(resp.content)
+    except (request_errors(), ValueError) as e:
+        return {"error": f"Failed to fetch archive: {e}"}
+    return ForecastFrame.from_json(data.get("hourly"), data.get("hourly_units"))
+
+
+def backfill(lat, lon, years=ARCHIVE_YEARS, end=None, chunk_days=ARCHIVE_CHUNK_DAYS, store=None, progress=None):
+    """Download the hourly history of the last `years` years (plus this year so far) into the store.
+
+    Each year resumes after the last hour its file holds, so rerunning after
+    an interruption only fetches what is missing. Stops at the first failed
+    request. Returns {'requests', 'hours', 'error', 'climatology'}.
+    """
+    store = store or archive_store
+    end = end or date.today() - timedelta(days=ARCHIVE_LAG_DAYS)
+    out = {'requests': 0, 'hours': 0, 'error': None, 'climatology': False}
+    for year in range(end.year - years, end.year + 1):
+        covered = store.covered_until(lat, lon, year)
+        day = date(year, 1, 1)
+        if covered is not None:
+            day = max(day, date.fromordinal(covered // 86400 + date(1970, 1, 1).toordinal()))
+        last = min(date(year, 12, 31), end)
+        while day <= last:
+            stop = min(last, day + timedelta(days=chunk_days - 1))
+            with span('archive.chunk', year=year):
+                frame = fetch_archive(lat, lon, day, stop)
+            out['requests'] += 1
+            if isinstance(frame, dict):
+                out['error'] = frame['error']
+                return out
+            out['hours'] += store.append(lat, lon, frame)
+            if progress is not None:
+                progress(year, stop, out)
+            day = stop + timedelta(days=1)
+    if store.climatology(lat, lon) is not None:
+        out['climatology'] = True
+    return out
+
+
+archive_store = ArchiveStore()
+
+
+def main(argv=None):
+    import argparse
+    import sys
+    parser = argparse.ArgumentParser(prog='python -m jweather.archive', description="Historical hourly store fed from the Open-Meteo archive API.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    fill = sub.add_parser('backfill', help="download missing history for a location (resumable)")
+    fill.add_argument('lat', type=float)
+    fill.add_argument('lon', type=float)
+    fill.add_argument('--years', type=int, default=ARCHIVE_YEARS)
+    fill.add_argument('--archive-url', help="archive endpoint (default: Open-Meteo)")
+    query = sub.add_parser('query', help="print stored hours between two dates as CSV")
+    query.add_argument('lat', type=float)
+    query.add_argument('lon', type=float)
+    query.add_argument('start', type=date.fromisoformat)
+    query.add_argument('stop', type=date.fromisoformat, help="exclusive")
+    normals = sub.add_parser('normals', help="print the climatology for a date")
+    normals.add_argument('lat', type=float)
+    normals.add_argument('lon', type=float)
+    normals.add_argument('day', type=date.fromisoformat, nargs='?', default=date.today())
+    sub.add_parser('stats', help="files, size and counters")
+    args = parser.parse_args(argv)
+
+    if args.command == 'backfill':
+        if args.archive_url:
+            config.ARCHIVE_URL = args.archive_url
+        started = time.perf_counter()
+
+        def progress(year, day, out):
+            print(f"\r{day.isoformat()}  {out['requests']} requests, {out['hours']} hours", end='', file=sys.stderr, flush=True)
+
+        result = backfill(args.lat, args.lon, years=args.years, progress=progress)
+        print(file=sys.stderr)
+        if result['error']:
+            print(f"{result['error']}; rerun to resume", file=sys.stderr)
+            return 1
+        print(f"{result['hours']} hours in {result['requests']} requests, {time.perf_counter() - started:.1f}s")
+    elif args.command == 'query':
+        frame = archive_store.query(args.lat, args.lon, args.start, args.stop)
+        names = list(frame.columns)
+        print(",".join(['time'] + names))
+        for i in range(len(frame)):
+            stamp = f"{frame.date_at(i).isoformat()}T{frame.hour_at(i):02d}:00"
+            print(",".join([stamp] + ['' if frame.columns[n][i] != frame.columns[n][i] else f"{frame.columns[n][i]:g}" for n in names]))
+    elif args.command == 'normals':
+        entry = archive_store.normals(args.lat, args.lon, args.day)
+        if entry is None:
+            print("no history stored for that location; run backfill first", file=sys.stderr)
+            return 1
+        print(json.dumps(entry, indent=2))
+    else:
+        for name, value in archive_store.stats().items():
+            print(f"{name}: {value}")
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,99 @@
+from .aggregate import aggregate_days
+from .derive import derive_days, derive_hourly
+from .frame import ForecastFrame
+from .trace import span
+
+
+def bundle_from_payload(lat, lon, data):
+    with span('frame'):
+        hourly = ForecastFrame.from_json(data.get("hourly"), data.get("hourly_units"))
+        daily = ForecastFrame.from_json(data.get("daily"), data.get("daily_units"))
+    with span('aggregate', rows=len(hourly)):
+        day_stats = aggregate_days(hourly)
+    with span('derive', rows=len(hourly)):
+        derived = derive_hourly(hourly)
+        day_derived = derive_days(derived, hourly.column('is_day'))
+    return {
+        "lat": lat,
+        "lon": lon,
+        "current": data.get("current", {}),
+        "current_units": data.get("current_units", {}),
+        "hourly": hourly,
+        "hourly_units": data.get("hourly_units", {}),
+        "daily": daily,
+        "daily_units": data.get("daily_units", {}),
+        "utc_offset_seconds": data.get("utc_offset_seconds", 0),
+        "day_stats": day_stats,
+        "derived": derived,
+        "day_derived": day_derived,
+    }
+
+
+def bundle_to_json(bundle):
+    out = dict(bundle)
+    for key in ('day_stats', 'derived', 'day_derived'):
+        out.pop(key, None)
+    for key in ('hourly', 'daily'):
+        if isinstance(out.get(key), ForecastFrame):
+            out[key] = out[key].to_json()
+    return out
+
+
+def bundle_from_json(obj):
+    out = dict(obj)
+    for key in ('hourly', 'daily'):
+        if not isinstance(out.get(key), ForecastFrame):
+            out[key] = ForecastFrame.from_json(out.get(key), out.get(key + '_units'))
+    out['day_stats'] = aggregate_days(out['hourly'])
+    out['derived'] = derive_hourly(out['hourly'])
+    out['day_derived'] = derive_days(out['derived'], out['hourly'].column('is_day'))
+    return out
+
+
+def bundle_to_payload(bundle):
+    # The Open-Meteo response a bundle was built from (what the local proxy serves)
+    out = {
+        "latitude": bundle.get("lat"),
+        "longitude": bundle.get("lon"),
+        "utc_offset_seconds": bundle.get("utc_offset_seconds", 0),
+        "current": bundle.get("current") or {},
+        "current_units": bundle.get("current_units") or {},
+    }
+    for key, with_time in (('hourly', True), ('daily', False)):
+        frame = bundle.get(key)
+        if frame is not None and len(frame):
+            out[key] = frame.to_payload(with_time)
+            out[key + '_units'] = bundle.get(key + '_units') or {}
+    return out
+
+
+BUNDLE_SECTIONS = ('current', 'hourly', 'daily')
+
+
+def _frames_equal(a, b):
+    if a is None or b is None:
+        return a is b
+    if a.times != b.times or a.columns.keys() != b.columns.keys():
+        return False
+    # Byte comparison so NaN (missing) values compare equal to themselves
+    return all(col.tobytes() == b.columns[name].tobytes() for name, col in a.columns.items())
+
+
+def bundle_changes(old, new):
+    """Return the sections of `new` that differ from `old` and need repainting."""
+    if not old or (old.get('lat'), old.get('lon')) != (new.get('lat'), new.get('lon')):
+        return set(BUNDLE_SECTIONS)
+    changed = set()
+    # The observation timestamp moves every 15 minutes even when no value does
+    ignore = ('time', 'interval')
+    old_cur = {k: v for k, v in (old.get('current') or {}).items() if k not in ignore}
+    new_cur = {k: v for k, v in (new.get('current') or {}).items() if k not in ignore}
+    if old_cur != new_cur or old.get('current_units') != new.get('current_units'):
+        changed.add('current')
+    for key in ('hourly', 'daily'):
+        if not _frames_equal(old.get(key), new.get(key)) or old.get(key + '_units') != new.get(key + '_units'):
+            changed.add(key)
+    # Daily icons and comfort come from the hourly rows
+    if 'hourly' in changed and old.get('day_derived') != new.get('day_derived'):
+        changed.add('daily')
+    return changed
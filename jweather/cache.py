@@ -0,0 +1,181 @@
+import os
+import time
+import sqlite3
+import threading
+from collections import OrderedDict
+
+from .bundle import bundle_from_json, bundle_to_json
+from .codec import dumps, loads
+from .config import CACHE_DIR, forecast_variables
+
+# Forecast cache: a small in-memory LRU in front of a SQLite table that
+# survives restarts. Entries are keyed on lat/lon snapped to CACHE_GRID degrees
+# plus the requested variable set, and stay fresh until the next model update
+# boundary. Stale entries are still returned so the UI can paint them while a
+# refresh runs in the background.
+CACHE_GRID = 0.01           # degrees, ~1 km
+CACHE_UPDATE_INTERVAL = 3600  # seconds between Open-Meteo model updates
+CACHE_MEMORY_ITEMS = 32
+CACHE_DISK_ITEMS = 500
+CACHE_MAX_STALE = 2 * 86400   # never serve anything older than this
+
+
+def open_cache_db(path=None, filename='cache.sqlite3'):
+    # SQLite file under CACHE_DIR (shared by the small stores); None when unavailable
+    try:
+        if path is None:
+            os.makedirs(CACHE_DIR, exist_ok=True)
+            path = os.path.join(CACHE_DIR, filename)
+        db = sqlite3.connect(path, check_same_thread=False)
+        # Let SQLite page the file in through mmap instead of reading it up front
+        db.execute("PRAGMA mmap_size = 67108864")
+        return db
+    except Exception:
+        return None
+
+
+class SQLiteStore:
+    # Base for the on-disk stores: the SQLite file is opened (and SCHEMA
+    # applied) on first use, so importing or constructing a store costs no I/O.
+    # _db is None when the file cannot be used; stores then run memory-only.
+    SCHEMA = ()
+    FILENAME = 'cache.sqlite3'
+
+    def __init__(self, path=None):
+        self._path = path
+        self._lock = threading.RLock()
+        self._conn = None
+        self._opened = False
+
+    @property
+    def _db(self):
+        if not self._opened:
+            with self._lock:
+                if not self._opened:
+                    conn = open_cache_db(self._path, self.FILENAME)
+                    try:
+                        for stmt in self.SCHEMA:
+                            conn.execute(stmt)
+                        conn.commit()
+                        self._on_open(conn)
+                    except Exception:
+                        # Read-only home or broken file: keep working with the memory tier only
+                        conn = None
+                    self._conn = conn
+                    self._opened = True
+        return self._conn
+
+    def _on_open(self, conn):
+        pass
+
+
+class ForecastCache(SQLiteStore):
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS forecast ("
+        "key TEXT PRIMARY KEY, fetched_at REAL, expires_at REAL, accessed_at REAL, body TEXT)",
+    )
+
+    def __init__(self, path=None, grid=CACHE_GRID, memory_items=CACHE_MEMORY_ITEMS, disk_items=CACHE_DISK_ITEMS):
+        super().__init__(path)
+        self.grid = grid
+        self.memory_items = memory_items
+        self.disk_items = disk_items
+        self._memory = OrderedDict()
+        self._counters = {'hits': 0, 'stale_hits': 0, 'misses': 0, 'evictions': 0, 'disk_evictions': 0}
+
+    def key_for(self, lat, lon, views=None):
+        try:
+            lat = float(lat); lon = float(lon)
+        except Exception:
+            return None
+        snap_lat = round(lat / self.grid) * self.grid
+        snap_lon = round(lon / self.grid) * self.grid
+        fields = forecast_variables(views)
+        variables = "c=" + ",".join(fields['current']) + ";h=" + ",".join(fields['hourly']) + ";d=" + ",".join(fields['daily'])
+        if fields['forecast_days']:
+            variables += f";n={fields['forecast_days']}"
+        if fields['past_days']:
+            variables += f";p={fields['past_days']}"
+        return f"{snap_lat:.4f},{snap_lon:.4f}|{variables}"
+
+    def expires_after(self, fetched_at):
+        # Fresh until the next model update boundary
+        return (int(fetched_at // CACHE_UPDATE_INTERVAL) + 1) * CACHE_UPDATE_INTERVAL
+
+    def get(self, lat, lon, views=None):
+        """Return (bundle, fresh) for a location, or (None, False) on a miss."""
+        key = self.key_for(lat, lon, views)
+        if key is None:
+            return None, False
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+            elif self._db is not None:
+                try:
+                    row = self._db.execute(
+                        "SELECT fetched_at, expires_at, body FROM forecast WHERE key = ?", (key,)
+                    ).fetchone()
+                    if row is not None:
+                        entry = (row[0], row[1], bundle_from_json(loads(row[2])))
+                        self._db.execute("UPDATE forecast SET accessed_at = ? WHERE key = ?", (now, key))
+                        self._db.commit()
+                        self._remember(key, entry)
+                except Exception:
+                    entry = None
+            if entry is None or now - entry[0] > CACHE_MAX_STALE:
+                self._counters['misses'] += 1
+                return None, False
+            fresh = now < entry[1]
+            self._counters['hits' if fresh else 'stale_hits'] += 1
+        bundle = dict(entry[2])
+        bundle['lat'] = float(lat)
+        bundle['lon'] = float(lon)
+        bundle['fetched_at'] = entry[0]
+        return bundle, fresh
+
+    def put(self, lat, lon, bundle, views=None):
+        key = self.key_for(lat, lon, views)
+        if key is None or 'error' in bundle:
+            return
+        now = time.time()
+        entry = (now, self.expires_after(now), bundle)
+        with self._lock:
+            self._remember(key, entry)
+            if self._db is None:
+                return
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO forecast (key, fetched_at, expires_at, accessed_at, body) VALUES (?, ?, ?, ?, ?)",
+                    (key, entry[0], entry[1], now, dumps(bundle_to_json(bundle))),
+                )
+                # Trim the disk tier to its least recently used entries
+                cur = self._db.execute(
+                    "DELETE FROM forecast WHERE key NOT IN (SELECT key FROM forecast ORDER BY accessed_at DESC LIMIT ?)",
+                    (self.disk_items,),
+                )
+                self._counters['disk_evictions'] += max(0, cur.rowcount)
+                self._db.commit()
+            except Exception:
+                pass
+
+    def _remember(self, key, entry):
+        self._memory[key] = entry
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+            self._counters['evictions'] += 1
+
+    def stats(self):
+        with self._lock:
+            out = dict(self._counters)
+            out['memory_items'] = len(self._memory)
+            try:
+                out['disk_items'] = self._db.execute("SELECT COUNT(*) FROM forecast").fetchone()[0] if self._db else 0
+            except Exception:
+                out['disk_items'] = 0
+        return out
+
+
+forecast_cache = ForecastCache()
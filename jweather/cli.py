@@ -0,0 +1,304 @@
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, ALL_COMPLETED, FIRST_COMPLETED
+
+from . import config, transport
+from .bundle import bundle_to_payload
+from .config import FORECAST_CURRENT
+
+# Headless batch mode: reads one location or a CSV/JSONL file of lat/lon
+# points or city names, resolves and fetches them on a bounded worker pool and
+# streams each result out as soon as it completes. Coordinates are grouped into
+# multi-location requests; cities go through the geocoding store first. A
+# checkpoint file records the ids of rows fetched successfully so an
+# interrupted run can resume. With a checkpoint, failed rows stay out of the
+# output: their error records go to <checkpoint>.failed (one JSON object per
+# line, rewritten each run) and the rows are tried again on the next run, so
+# the output holds exactly one record per id.
+CLI_BATCH_SIZE = 50
+CLI_WORKERS = 8
+
+
+def read_locations(path):
+    # Yields (row_id, query, lat, lon); city rows have lat/lon None
+    if path == '-':
+        fh = sys.stdin
+    else:
+        fh = open(path, newline='', encoding='utf-8')
+    try:
+        if path.endswith('.jsonl') or path.endswith('.ndjson'):
+            rows = (json.loads(line) for line in fh if line.strip())
+        else:
+            rows = csv.DictReader(fh)
+        for i, row in enumerate(rows):
+            row_id = str(row.get('id') or i)
+            lat = row.get('lat', row.get('latitude'))
+            lon = row.get('lon', row.get('longitude'))
+            if lat not in (None, '') and lon not in (None, ''):
+                yield row_id, f"{lat},{lon}", lat, lon
+            else:
+                yield row_id, (row.get('city') or row.get('name') or '').strip(), None, None
+    finally:
+        if fh is not sys.stdin:
+            fh.close()
+
+
+def flatten(record):
+    # One flat row per location for the tabular formats
+    bundle = record.get('bundle') or {}
+    row = {
+        'id': record['id'],
+        'query': record['query'],
+        'lat': bundle.get('lat'),
+        'lon': bundle.get('lon'),
+        'error': record.get('error'),
+    }
+    current = bundle.get('current') or {}
+    for name in FORECAST_CURRENT:
+        row[f'current_{name}'] = current.get(name)
+    daily = bundle.get('daily')
+    tmax = daily.column('temperature_2m_max') if daily is not None and len(daily) else None
+    tmin = daily.column('temperature_2m_min') if daily is not None and len(daily) else None
+    # Columns are float32; print them as Open-Meteo sent them (12.3, not 12.300000190734863)
+    row['today_max'] = float(f"{tmax[0]:.7g}") if tmax is not None and tmax[0] == tmax[0] else None
+    row['today_min'] = float(f"{tmin[0]:.7g}") if tmin is not None and tmin[0] == tmin[0] else None
+    return row
+
+
+class NdjsonWriter:
+    def __init__(self, fh):
+        self.fh = fh
+
+    def write(self, record):
+        out = {'id': record['id'], 'query': record['query']}
+        if record.get('error'):
+            out['error'] = record['error']
+        else:
+            # Open-Meteo's own response shape: ISO times, null for missing values
+            out.update(bundle_to_payload(record['bundle']))
+        self.fh.write(json.dumps(out, ensure_ascii=False) + "\n")
+        self.fh.flush()
+
+    def close(self):
+        if self.fh is not sys.stdout:
+            self.fh.close()
+
+
+class CsvWriter:
+    def __init__(self, fh, write_header=True):
+        self.fh = fh
+        self.writer = None
+        self.write_header = write_header
+
+    def write(self, record):
+        row = flatten(record)
+        if self.writer is None:
+            self.writer = csv.DictWriter(self.fh, fieldnames=list(row))
+            if self.write_header:
+                self.writer.writeheader()
+        self.writer.writerow(row)
+        self.fh.flush()
+
+    def close(self):
+        if self.fh is not sys.stdout:
+            self.fh.close()
+
+
+class ParquetWriter:
+    # Buffers rows into row groups; requires pyarrow
+    def __init__(self, path, row_group=1000):
+        import pyarrow
+        import pyarrow.parquet
+        self.pa = pyarrow
+        self.pq = pyarrow.parquet
+        self.path = path
+        self.row_group = row_group
+        self.rows = []
+        self.writer = None
+
+    def write(self, record):
+        self.rows.append(flatten(record))
+        if len(self.rows) >= self.row_group:
+            self._flush()
+
+    def _flush(self):
+        if not self.rows:
+            return
+        table = self.pa.Table.from_pylist(self.rows)
+        if self.writer is None:
+            self.writer = self.pq.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table.cast(self.writer.schema))
+        self.rows = []
+
+    def close(self):
+        self._flush()
+        if self.writer is not None:
+            self.writer.close()
+
+
+def open_writer(fmt, output, resume):
+    if fmt == 'parquet':
+        if output in (None, '-'):
+            raise SystemExit("parquet output needs --output FILE")
+        if resume and os.path.exists(output):
+            raise SystemExit("parquet files cannot be appended to; pick a new --output when resuming")
+        return ParquetWriter(output)
+    if output in (None, '-'):
+        fh = sys.stdout
+    else:
+        fh = open(output, 'a' if resume else 'w', newline='', encoding='utf-8')
+    if fmt == 'csv':
+        return CsvWriter(fh, write_header=not (resume and fh.tell() > 0))
+    return NdjsonWriter(fh)
+
+
+def load_checkpoint(path):
+    if not path or not os.path.exists(path):
+        return set()
+    with open(path, encoding='utf-8') as fh:
+        return {line.rstrip("\n") for line in fh if line.strip()}
+
+
+def _fetch_points(batch):
+    from .forecast import fetch_weather_many
+    bundles = fetch_weather_many([(lat, lon) for _, _, lat, lon in batch], chunk_size=len(batch), max_workers=1)
+    return [(row_id, query, b) for (row_id, query, _, _), b in zip(batch, bundles)]
+
+
+def _fetch_city(row_id, query):
+    from .forecast import cached_fetch_weather
+    from .geocode import geocode_city
+    if not query:
+        return [(row_id, query, {"error": "Row has neither lat/lon nor a city"})]
+    place = geocode_city(query)
+    if 'error' in place:
+        return [(row_id, query, place)]
+    return [(row_id, query, cached_fetch_weather(place['latitude'], place['longitude']))]
+
+
+def run(locations, writer, checkpoint=None, done=(), workers=CLI_WORKERS, batch_size=CLI_BATCH_SIZE, progress=None):
+    # Returns (written, failed). At most workers * 2 jobs are in flight, so the
+    # input is read lazily and memory stays flat for any file size.
+    written = failed = 0
+    ckpt = open(checkpoint, 'a', encoding='utf-8') if checkpoint else None
+    failed_out = open(checkpoint + '.failed', 'w', encoding='utf-8') if checkpoint else None
+    pending = set()
+    batch = []
+
+    def drain(block):
+        nonlocal pending, written, failed
+        if not pending:
+            return
+        finished, pending = wait(pending, return_when=FIRST_COMPLETED if block else ALL_COMPLETED)
+        for fut in finished:
+            for row_id, query, bundle in fut.result():
+                record = {'id': row_id, 'query': query}
+                written += 1
+                if 'error' in bundle:
+                    record['error'] = bundle['error']
+                    failed += 1
+                    if failed_out is not None:
+                        failed_out.write(json.dumps(record, ensure_ascii=False) + "\n")
+                        failed_out.flush()
+                        continue
+                else:
+                    record['bundle'] = bundle
+                writer.write(record)
+                if ckpt is not None:
+                    ckpt.write(row_id + "\n")
+                    ckpt.flush()
+        if progress is not None:
+            progress(written, failed)
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='jweather-cli') as pool:
+            def submit(fn, *args):
+                while len(pending) >= workers * 2:
+                    drain(block=True)
+                pending.add(pool.submit(fn, *args))
+
+            for row_id, query, lat, lon in locations:
+                if row_id in done:
+                    continue
+                if lat is None:
+                    submit(_fetch_city, row_id, query)
+                    continue
+                batch.append((row_id, query, lat, lon))
+                if len(batch) >= batch_size:
+                    submit(_fetch_points, batch)
+                    batch = []
+            if batch:
+                submit(_fetch_points, batch)
+            drain(block=False)
+    finally:
+        writer.close()
+        if ckpt is not None:
+            ckpt.close()
+            failed_out.close()
+    return written, failed
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog='jweather', description="Fetch Open-Meteo forecasts without the GUI.")
+    where = parser.add_mutually_exclusive_group(required=True)
+    where.add_argument('--city', help="single city name")
+    where.add_argument('--coords', metavar='LAT,LON', help="single location, e.g. 48.85,2.35")
+    where.add_argument('--input', '-i', metavar='FILE', help="CSV or JSONL with lat/lon (or latitude/longitude) or city columns; '-' for stdin")
+    parser.add_argument('--output', '-o', metavar='FILE', help="output file (default: stdout)")
+    parser.add_argument('--format', '-f', choices=('ndjson', 'csv', 'parquet'), default='ndjson')
+    parser.add_argument('--workers', type=int, default=CLI_WORKERS, help="concurrent requests (default: %(default)s)")
+    parser.add_argument('--batch-size', type=int, default=CLI_BATCH_SIZE, help="locations per forecast request (default: %(default)s)")
+    parser.add_argument('--checkpoint', metavar='FILE', help="record successful rows here and skip them on the next run; failed rows go to FILE.failed instead of the output and are retried")
+    parser.add_argument('--forecast-url', help="forecast endpoint (default: Open-Meteo)")
+    parser.add_argument('--geocoding-url', help="geocoding endpoint (default: Open-Meteo)")
+    parser.add_argument('--replay', choices=('record', 'replay', 'off'), help="recorded responses: keep them, answer from them offline, or neither (default: JWEATHER_REPLAY or record)")
+    parser.add_argument('--quiet', '-q', action='store_true', help="no progress on stderr")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.forecast_url:
+        config.FORECAST_URL = args.forecast_url
+    if args.geocoding_url:
+        config.GEOCODING_URL = args.geocoding_url
+    if args.replay:
+        config.REPLAY_MODE = args.replay
+    workers = max(1, args.workers)
+    # Enough pooled connections for every worker to keep one alive
+    transport.HTTP_POOL_SIZES['forecast'] = max(transport.HTTP_POOL_SIZES['forecast'], workers)
+    transport.HTTP_POOL_SIZES['geocoding'] = max(transport.HTTP_POOL_SIZES['geocoding'], workers)
+
+    if args.input:
+        locations = read_locations(args.input)
+    elif args.coords:
+        lat, _, lon = args.coords.partition(',')
+        locations = [('0', args.coords, lat.strip(), lon.strip())]
+    else:
+        locations = [('0', args.city, None, None)]
+
+    done = load_checkpoint(args.checkpoint)
+    # A checkpoint that exists means an earlier run wrote to this output, even
+    # when none of its rows succeeded
+    resume = bool(args.checkpoint) and os.path.exists(args.checkpoint)
+    writer = open_writer(args.format, args.output, resume=resume)
+    started = time.perf_counter()
+
+    def progress(written, failed):
+        if not args.quiet:
+            rate = written / max(1e-9, time.perf_counter() - started)
+            print(f"\r{written} done, {failed} failed, {rate:.1f} loc/s", end='', file=sys.stderr, flush=True)
+
+    try:
+        written, failed = run(locations, writer, args.checkpoint, done, workers, max(1, args.batch_size), progress)
+    except KeyboardInterrupt:
+        if not args.quiet:
+            print("\ninterrupted; rerun with the same --checkpoint to resume", file=sys.stderr)
+        return 130
+    if not args.quiet and (written or done):
+        print(file=sys.stderr)
+    return 1 if failed and failed == written else 0
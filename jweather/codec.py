@@ -0,0 +1,49 @@
+import json
+
+# JSON codec for forecast bodies and cached bundles: orjson when installed,
+# else msgspec, else the stdlib. Forecast payloads are mostly long float
+# lists, where the C decoders are several times faster and allocate less.
+# Decoding works on the raw response bytes, so no intermediate str is built.
+JSON_CODECS = ('orjson', 'msgspec', 'json')
+_codec = {'name': None, 'loads': None, 'dumps': None}
+
+
+def _load_codec(name):
+    if name == 'orjson':
+        import orjson
+        return orjson.loads, lambda obj: orjson.dumps(obj).decode()
+    if name == 'msgspec':
+        import msgspec
+        encoder = msgspec.json.Encoder()
+        return msgspec.json.decode, lambda obj: encoder.encode(obj).decode()
+    return json.loads, json.dumps
+
+
+def use_codec(name=None):
+    """Select a codec by name, or the fastest installed one; returns its name."""
+    for candidate in ((name,) if name else JSON_CODECS):
+        try:
+            loads_fn, dumps_fn = _load_codec(candidate)
+        except ImportError:
+            continue
+        _codec.update(name=candidate, loads=loads_fn, dumps=dumps_fn)
+        return candidate
+    raise ValueError(f"JSON codec {name!r} is not available")
+
+
+def codec_name():
+    if _codec['name'] is None:
+        use_codec()
+    return _codec['name']
+
+
+def loads(data):
+    if _codec['loads'] is None:
+        use_codec()
+    return _codec['loads'](data)
+
+
+def dumps(obj):
+    if _codec['dumps'] is None:
+        use_codec()
+    return _codec['dumps'](obj)
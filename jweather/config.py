@@ -0,0 +1,124 @@
+import os
+
+# Where caches and stores live; override with JWEATHER_HOME
+CACHE_DIR = os.environ.get('JWEATHER_HOME') or os.path.join(os.path.expanduser('~'), '.jweather')
+GAZETTEER_PATH = os.environ.get('JWEATHER_GAZETTEER') or os.path.join(os.path.dirname(os.path.abspath(__file__)), 'gazetteer.csv')
+
+# Endpoints; point these at a stub or a local proxy with the env vars
+FORECAST_URL = os.environ.get('JWEATHER_FORECAST_URL') or "https://api.open-meteo.com/v1/forecast"
+GEOCODING_URL = os.environ.get('JWEATHER_GEOCODING_URL') or "https://geocoding-api.open-meteo.com/v1/search"
+ARCHIVE_URL = os.environ.get('JWEATHER_ARCHIVE_URL') or "https://archive-api.open-meteo.com/v1/archive"
+
+# Recorded responses (jweather.replay): 'record' keeps every good forecast for
+# offline use, 'replay' answers from the recordings without touching the
+# network (fixtures for tests and benchmarks), 'off' does neither
+REPLAY_MODE = os.environ.get('JWEATHER_REPLAY') or 'record'
+
+# Variables requested from the forecast API; also part of the cache key
+FORECAST_CURRENT = [
+    "temperature_2m",
+    "apparent_temperature",
+    "relative_humidity_2m",
+    "dew_point_2m",
+    "is_day",
+    "precipitation",
+    "rain",
+    "showers",
+    "snowfall",
+    "cloud_cover",
+    "pressure_msl",
+    "surface_pressure",
+    "wind_speed_10m",
+    "wind_gusts_10m",
+    "wind_direction_10m",
+    "visibility",
+    "uv_index"
+]
+# Hourly inputs of jweather.derive (conditions, heat index, wind chill, comfort)
+DERIVED_HOURLY = ["temperature_2m", "relative_humidity_2m", "dew_point_2m", "wind_speed_10m",
+                  "cloud_cover", "rain", "snowfall", "is_day"]
+FORECAST_HOURLY = list(DERIVED_HOURLY)
+# Hourly variables backfilled from the archive API (jweather.archive)
+ARCHIVE_HOURLY = ["temperature_2m", "precipitation"]
+FORECAST_DAILY = ["temperature_2m_max","temperature_2m_min"]
+
+
+# Fields each view reads. The request builder asks Open-Meteo only for the
+# union over ACTIVE_VIEWS; None means the full FORECAST_* lists above, which
+# is what library callers and the CLI get. A view may also ask for a longer
+# horizon with 'forecast_days', and for hours already past with 'past_days'.
+# Views opened on demand (the hourly explorer) fetch with their own views
+# tuple instead of joining ACTIVE_VIEWS.
+VIEW_FIELDS = {
+    'current_card': {
+        'current': ["temperature_2m", "apparent_temperature", "relative_humidity_2m", "wind_speed_10m",
+                    "wind_gusts_10m", "uv_index", "cloud_cover", "rain", "snowfall", "is_day"],
+    },
+    'hourly_chart': {'hourly': ["temperature_2m"]},
+    'daily_rows': {'daily': ["temperature_2m_max", "temperature_2m_min"], 'hourly': DERIVED_HOURLY,
+                   'forecast_days': 16},
+    'dashboard': {
+        'current': ["temperature_2m", "wind_speed_10m", "cloud_cover", "rain", "snowfall", "is_day"],
+        'hourly': ["temperature_2m"],
+    },
+    'hourly_explorer': {
+        'hourly': ["temperature_2m", "apparent_temperature", "relative_humidity_2m", "dew_point_2m",
+                   "precipitation", "cloud_cover", "pressure_msl", "wind_speed_10m", "wind_gusts_10m"],
+        'forecast_days': 16,
+        'past_days': 7,
+    },
+}
+ACTIVE_VIEWS = None
+_variables_memo = {}
+
+
+def forecast_variables(views=None):
+    """Return {'current', 'hourly', 'daily': sorted names, 'forecast_days', 'past_days': int or None}.
+
+    `views` defaults to ACTIVE_VIEWS.
+    """
+    if views is None:
+        views = ACTIVE_VIEWS
+    views = tuple(views) if views is not None else None
+    if views not in _variables_memo:
+        if views is None:
+            out = {'current': sorted(FORECAST_CURRENT), 'hourly': sorted(FORECAST_HOURLY),
+                   'daily': sorted(FORECAST_DAILY), 'forecast_days': None, 'past_days': None}
+        else:
+            out = {'current': set(), 'hourly': set(), 'daily': set(), 'forecast_days': None, 'past_days': None}
+            for view in views:
+                fields = VIEW_FIELDS[view]
+                for block in ('current', 'hourly', 'daily'):
+                    out[block].update(fields.get(block, ()))
+                for horizon in ('forecast_days', 'past_days'):
+                    if fields.get(horizon):
+                        out[horizon] = max(out[horizon] or 0, fields[horizon])
+            for block in ('current', 'hourly', 'daily'):
+                out[block] = sorted(out[block])
+        _variables_memo[views] = out
+    return _variables_memo[views]
+
+
+# Views for variable sets named in a request rather than by the app (the local
+# proxy passes its clients' fields through); bounded so arbitrary queries
+# cannot grow VIEW_FIELDS without limit
+REQUEST_VIEWS_MAX = 256
+
+
+def request_view(current=(), hourly=(), daily=(), forecast_days=None, past_days=None):
+    """Return the name of a VIEW_FIELDS entry with exactly these fields, registering it if needed.
+
+    None when REQUEST_VIEWS_MAX request views already exist.
+    """
+    fields = {'current': sorted(set(current)), 'hourly': sorted(set(hourly)), 'daily': sorted(set(daily))}
+    name = "request:" + ";".join(f"{block}={','.join(fields[block])}" for block in ('current', 'hourly', 'daily'))
+    name += f";forecast_days={forecast_days or ''};past_days={past_days or ''}"
+    if name not in VIEW_FIELDS:
+        if sum(1 for view in VIEW_FIELDS if view.startswith('request:')) >= REQUEST_VIEWS_MAX:
+            return None
+        if forecast_days:
+            fields['forecast_days'] = forecast_days
+        if past_days:
+            fields['past_days'] = past_days
+        VIEW_FIELDS[name] = fields
+    return name
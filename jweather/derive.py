@@ -0,0 +1,230 @@
+from array import array
+
+# Derived per-hour metrics, computed in batch when a bundle arrives (next to
+# aggregate_days) from the hourly columns Open-Meteo returns in its default
+# units (°C, %, km/h, mm, cm):
+#   condition   CONDITION_* class from cloud cover, rain and snowfall
+#   heat_index  NWS heat index, °C; NaN below 27 °C where it does not apply
+#   wind_chill  Environment Canada wind chill, °C; NaN above 10 °C or in calm air
+#   comfort     dew-point comfort band, an index into COMFORT_NAMES
+# Columns are plain sequences, so hours from many locations can be run through
+# derive_columns() in one call. NaN marks a missing input or output.
+CONDITION_CLEAR, CONDITION_PARTLY, CONDITION_CLOUDY, CONDITION_RAIN, CONDITION_SNOW = range(5)
+CONDITION_NAMES = ('clear', 'partly cloudy', 'cloudy', 'rain', 'snow')
+CLOUD_BOUNDS = (20, 60)          # cloud cover % splitting clear / partly / cloudy
+COMFORT_NAMES = ('dry', 'comfortable', 'humid', 'muggy', 'oppressive')
+COMFORT_BOUNDS = (10, 16, 18, 21)   # dew point °C
+PRECIP_HOURS = 2                 # wet hours that make a whole day rain or snow
+DERIVED_INPUTS = ("temperature_2m", "relative_humidity_2m", "dew_point_2m", "wind_speed_10m",
+                  "cloud_cover", "rain", "snowfall", "is_day")
+DERIVED_NEEDS = {
+    'condition': ("cloud_cover", "rain", "snowfall"),
+    'heat_index': ("temperature_2m", "relative_humidity_2m"),
+    'wind_chill': ("temperature_2m", "wind_speed_10m"),
+    'comfort': ("dew_point_2m",),
+}
+_NAN = float('nan')
+
+
+def condition_icon(condition, is_day=True):
+    if condition is None or condition != condition:
+        return '—'
+    condition = int(condition)
+    if condition == CONDITION_CLEAR:
+        return '☀' if is_day else '🌙'
+    return ('☀', '⛅', '☁', '🌧', '🌨')[condition]
+
+
+def condition_of(cloud_cover, rain, snowfall):
+    # The scalar rule the columns are classified with (also used for `current`)
+    if snowfall and snowfall > 0:
+        return CONDITION_SNOW
+    if rain and rain > 0:
+        return CONDITION_RAIN
+    if cloud_cover is None or cloud_cover != cloud_cover or cloud_cover < CLOUD_BOUNDS[0]:
+        return CONDITION_CLEAR
+    if cloud_cover < CLOUD_BOUNDS[1]:
+        return CONDITION_PARTLY
+    return CONDITION_CLOUDY
+
+
+def heat_index(t, rh):
+    # Rothfusz regression with the NWS low/high humidity adjustments
+    if t != t or rh != rh or t < 27:
+        return _NAN
+    f = t * 1.8 + 32
+    hi = (-42.379 + 2.04901523 * f + 10.14333127 * rh - 0.22475541 * f * rh - 0.00683783 * f * f
+          - 0.05481717 * rh * rh + 0.00122874 * f * f * rh + 0.00085282 * f * rh * rh
+          - 0.00000199 * f * f * rh * rh)
+    if rh < 13 and f <= 112:
+        hi -= (13 - rh) / 4 * ((17 - abs(f - 95)) / 17) ** 0.5
+    elif rh > 85 and f <= 87:
+        hi += (rh - 85) / 10 * ((87 - f) / 5)
+    return (hi - 32) / 1.8
+
+
+def wind_chill(t, wind):
+    if t != t or wind != wind or t > 10 or wind <= 4.8:
+        return _NAN
+    v = wind ** 0.16
+    return 13.12 + 0.6215 * t - 11.37 * v + 0.3965 * t * v
+
+
+def comfort_of(dew_point):
+    if dew_point != dew_point:
+        return _NAN
+    band = 0
+    for bound in COMFORT_BOUNDS:
+        if dew_point >= bound:
+            band += 1
+    return band
+
+
+def _column(columns, name, n):
+    col = columns.get(name)
+    return col if col is not None else [_NAN] * n
+
+
+def _derive_python(columns, n):
+    temp = _column(columns, 'temperature_2m', n)
+    rh = _column(columns, 'relative_humidity_2m', n)
+    dew = _column(columns, 'dew_point_2m', n)
+    wind = _column(columns, 'wind_speed_10m', n)
+    cloud = _column(columns, 'cloud_cover', n)
+    rain = _column(columns, 'rain', n)
+    snow = _column(columns, 'snowfall', n)
+    return {
+        'condition': array('f', (condition_of(cloud[i], rain[i], snow[i]) for i in range(n))),
+        'heat_index': array('f', (heat_index(temp[i], rh[i]) for i in range(n))),
+        'wind_chill': array('f', (wind_chill(temp[i], wind[i]) for i in range(n))),
+        'comfort': array('f', (comfort_of(dew[i]) for i in range(n))),
+    }
+
+
+def _derive_numpy(np, columns, n):
+    def col(name):
+        values = columns.get(name)
+        if values is None:
+            return np.full(n, np.nan, dtype=np.float32)
+        return np.asarray(values, dtype=np.float32)
+
+    def out(values):
+        return array('f', values.astype(np.float32).tobytes())
+
+    temp = col('temperature_2m').astype(np.float64)
+    rh = col('relative_humidity_2m').astype(np.float64)
+    dew = col('dew_point_2m')
+    wind = col('wind_speed_10m').astype(np.float64)
+    cloud = col('cloud_cover')
+    rain = col('rain')
+    snow = col('snowfall')
+    with np.errstate(invalid='ignore'):
+        # NaN compares False everywhere, so missing cloud cover reads as clear
+        # and missing precipitation as dry, as in condition_of()
+        condition = np.select(
+            [snow > 0, rain > 0, cloud >= CLOUD_BOUNDS[1], cloud >= CLOUD_BOUNDS[0]],
+            [CONDITION_SNOW, CONDITION_RAIN, CONDITION_CLOUDY, CONDITION_PARTLY],
+            CONDITION_CLEAR,
+        )
+
+        f = temp * 1.8 + 32
+        hi = (-42.379 + 2.04901523 * f + 10.14333127 * rh - 0.22475541 * f * rh - 0.00683783 * f * f
+              - 0.05481717 * rh * rh + 0.00122874 * f * f * rh + 0.00085282 * f * rh * rh
+              - 0.00000199 * f * f * rh * rh)
+        dry = (rh < 13) & (f <= 112)
+        hi = np.where(dry, hi - (13 - rh) / 4 * np.sqrt(np.clip((17 - np.abs(f - 95)) / 17, 0, None)), hi)
+        hi = np.where(~dry & (rh > 85) & (f <= 87), hi + (rh - 85) / 10 * ((87 - f) / 5), hi)
+        hi = np.where(temp >= 27, (hi - 32) / 1.8, np.nan)
+
+        v = np.power(np.where(wind > 0, wind, 0), 0.16)
+        wc = np.where((temp <= 10) & (wind > 4.8), 13.12 + 0.6215 * temp - 11.37 * v + 0.3965 * temp * v, np.nan)
+
+        comfort = np.where(np.isnan(dew), np.nan, np.searchsorted(np.asarray(COMFORT_BOUNDS, dtype=np.float32), dew, side='right'))
+    return {'condition': out(condition), 'heat_index': out(hi), 'wind_chill': out(wc), 'comfort': out(comfort)}
+
+
+def derive_columns(columns):
+    """Return {'condition', 'heat_index', 'wind_chill', 'comfort': array('f')} for equal-length input columns.
+
+    Metrics whose inputs (DERIVED_NEEDS) are all absent are left out.
+    """
+    lengths = [len(v) for v in columns.values() if v is not None]
+    n = max(lengths) if lengths else 0
+    try:
+        import numpy as np
+    except ImportError:
+        out = _derive_python(columns, n)
+    else:
+        out = _derive_numpy(np, columns, n)
+    return {name: col for name, col in out.items()
+            if any(columns.get(need) is not None for need in DERIVED_NEEDS[name])}
+
+
+def derive_hourly(frame):
+    # A frame over the same hours holding the derived columns
+    from .frame import ForecastFrame
+    if frame is None or len(frame) == 0:
+        return ForecastFrame()
+    temp_unit = frame.units.get('temperature_2m', '°C')
+    units = {'heat_index': temp_unit, 'wind_chill': temp_unit, 'condition': '', 'comfort': ''}
+    return ForecastFrame(frame.times, derive_columns(frame.columns), units)
+
+
+def _day_condition(cond):
+    # cond: classes of the hours that count (the daylight ones when there are any)
+    cond = [c for c in cond if c == c]
+    if not cond:
+        return None
+    wet = [c for c in cond if c >= CONDITION_RAIN]
+    if len(wet) >= PRECIP_HOURS:
+        return CONDITION_SNOW if wet.count(CONDITION_SNOW) >= PRECIP_HOURS else CONDITION_RAIN
+    dry = [c for c in cond if c < CONDITION_RAIN]
+    return int(round(sum(dry) / len(dry))) if dry else CONDITION_CLEAR
+
+
+def derive_days(derived, is_day=None):
+    """Return {day_number: {'condition', 'heat_index', 'wind_chill', 'comfort'}}.
+
+    A day is rain or snow when at least PRECIP_HOURS of its daylight hours
+    are; otherwise it gets the average cloud class of those hours. The heat
+    index is the day's highest, the wind chill its lowest and comfort the
+    muggiest band reached; each is None when it never applies.
+    """
+    if derived is None or len(derived) == 0:
+        return {}
+    cols = derived.columns
+    days = {}
+    start = 0
+    n = len(derived)
+    for i in range(1, n + 1):
+        if i < n and derived.day_at(i) == derived.day_at(start):
+            continue
+        rows = range(start, i)
+        summary = {'condition': None, 'heat_index': None, 'wind_chill': None, 'comfort': None}
+        cond = cols.get('condition')
+        if cond is not None:
+            lit = [cond[j] for j in rows if is_day is None or is_day[j] != 0]
+            summary['condition'] = _day_condition(lit or [cond[j] for j in rows])
+        for name, pick in (('heat_index', max), ('wind_chill', min), ('comfort', max)):
+            col = cols.get(name)
+            values = [col[j] for j in rows if col[j] == col[j]] if col is not None else []
+            if values:
+                summary[name] = pick(values)
+        if summary['comfort'] is not None:
+            summary['comfort'] = int(summary['comfort'])
+        days[derived.day_at(start)] = summary
+        start = i
+    return days
+
+
+def trend_slope(values):
+    """Least-squares slope of a series per step (NaN ignored), or None with fewer than 2 values."""
+    points = [(i, v) for i, v in enumerate(values) if v == v]
+    n = len(points)
+    if n < 2:
+        return None
+    mean_x = sum(i for i, _ in points) / n
+    mean_y = sum(v for _, v in points) / n
+    sxx = sum((i - mean_x) ** 2 for i, _ in points)
+    sxy = sum((i - mean_x) * (v - mean_y) for i, v in points)
+    return sxy / sxx
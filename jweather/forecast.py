@@ -0,0 +1,205 @@
+import time
+
+from .bundle import bundle_from_payload
+from .cache import forecast_cache
+from .codec import dumps, loads
+from . import config
+from .trace import span
+from .transport import http_session, request_errors
+
+
+def validate_coords(latVal, lonVal):
+    # Returns (lat, lon, error)
+    try:
+        lat = float(latVal)
+        if not (-90 <= lat <= 90):
+            raise ValueError("Latitude must be between -90 and 90")
+    except Exception as e:
+        return None, None, str(e)
+    try:
+        lon = float(lonVal)
+        if not (-180 <= lon <= 180):
+            raise ValueError("Longitude must be between -180 and 180")
+    except Exception as e:
+        return None, None, str(e)
+    return lat, lon, None
+
+
+def forecast_params(lat, lon, views=None):
+    # Only the variables the active (or given) views read (config.forecast_variables)
+    fields = config.forecast_variables(views)
+    params = {
+        "latitude": lat,
+        "longitude": lon,
+        "timezone": "auto"
+    }
+    for block in ('current', 'hourly', 'daily'):
+        if fields[block]:
+            params[block] = ",".join(fields[block])
+    if fields['forecast_days']:
+        params["forecast_days"] = fields['forecast_days']
+    if fields['past_days']:
+        params["past_days"] = fields['past_days']
+    return params
+
+
+def fetch_weather(latVal, lonVal, etag=None, last_modified=None, views=None):
+    # Validate inputs
+    lat, lon, error = validate_coords(latVal, lonVal)
+    if error:
+        return {"error": error}
+
+    if config.REPLAY_MODE == 'replay':
+        from .replay import replay_store
+        return replay_store.latest_bundle(lat, lon, rebase=True, views=views) or {"error": "No recorded forecast for this location"}
+
+    api_url = config.FORECAST_URL
+    params = forecast_params(lat, lon, views)
+    # Conditional request when the caller still holds a previous answer
+    headers = {}
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+    try:
+        resp = http_session().get(api_url, params=params, headers=headers or None, timeout=7)
+        if resp.status_code == 304:
+            return {"not_modified": True}
+        resp.raise_for_status()
+        with span('decode', bytes=len(resp.content)):
+            data = loads(resp.content)
+    except (request_errors(), ValueError) as e:
+        return {"error": f"Failed to fetch data: {e}"}
+
+    if config.REPLAY_MODE == 'record':
+        from .replay import replay_store
+        replay_store.record(lat, lon, resp.content, views=views)
+    bundle = bundle_from_payload(lat, lon, data)
+    if resp.headers.get('ETag'):
+        bundle['etag'] = resp.headers['ETag']
+    if resp.headers.get('Last-Modified'):
+        bundle['last_modified'] = resp.headers['Last-Modified']
+    return bundle
+
+
+def cached_fetch_weather(latVal, lonVal, max_age=None, views=None):
+    # Cache-aware fetch for callers that just want a bundle; fresh entries skip the network.
+    # views: fetch for these config.VIEW_FIELDS views instead of ACTIVE_VIEWS
+    bundle, fresh = forecast_cache.get(latVal, lonVal, views)
+    if bundle is not None and (fresh or (max_age is not None and time.time() - bundle['fetched_at'] <= max_age)):
+        return bundle
+    validators = (bundle.get('etag'), bundle.get('last_modified')) if bundle is not None else ()
+    data = fetch_weather(latVal, lonVal, *validators, views=views)
+    # Replayed fixtures are rebased to today; caching them would pass them off
+    # as live forecasts once replay mode is turned off
+    if config.REPLAY_MODE == 'replay':
+        return data
+    if data.get('not_modified'):
+        # Upstream says nothing changed: keep the cached forecast and restart its freshness window
+        data = dict(bundle)
+        data.pop('fetched_at', None)
+        forecast_cache.put(data['lat'], data['lon'], data, views)
+        return data
+    if 'error' not in data:
+        forecast_cache.put(data['lat'], data['lon'], data, views)
+        return data
+    offline = offline_bundle(latVal, lonVal, bundle, views)
+    if offline is None:
+        return data
+    # Upstream failed but we still have an earlier answer to show
+    offline['stale'] = True
+    offline['refresh_error'] = data['error']
+    return offline
+
+
+def offline_bundle(latVal, lonVal, cached=None, views=None):
+    """Return the newest stored forecast for a location with past hours trimmed, or None.
+
+    Looks at the cached bundle and the replay store and keeps whichever
+    was fetched last; its 'fetched_at' tells the caller how old it is.
+    """
+    best = cached
+    if config.REPLAY_MODE != 'off':
+        from .replay import replay_store
+        recorded = replay_store.latest_bundle(latVal, lonVal, views=views)
+        if recorded is not None and (best is None or recorded['fetched_at'] > best.get('fetched_at', 0)):
+            best = recorded
+    if best is None:
+        return None
+    from .replay import trim_to_now
+    out = trim_to_now(best)
+    if out.get('hourly') is not None and not len(out['hourly']):
+        return None
+    out['offline'] = True
+    return out
+
+
+# Batch API: Open-Meteo accepts comma-separated latitude/longitude lists and
+# answers with one result object per location, so many sites cost one round
+# trip per chunk instead of one per site.
+BATCH_CHUNK_SIZE = 50
+BATCH_MAX_WORKERS = 4
+
+
+def _fetch_weather_chunk(chunk):
+    # chunk: list of (lat, lon); returns a list of bundles in the same order
+    if config.REPLAY_MODE == 'replay':
+        return [fetch_weather(lat, lon) for lat, lon in chunk]
+    api_url = config.FORECAST_URL
+    # repr keeps every digit; :g would round to 6 significant ones (~100 m)
+    params = forecast_params(
+        ",".join(repr(float(lat)) for lat, _ in chunk),
+        ",".join(repr(float(lon)) for _, lon in chunk),
+    )
+    try:
+        resp = http_session().get(api_url, params=params, timeout=7 + len(chunk) * 0.1)
+        resp.raise_for_status()
+        with span('decode', bytes=len(resp.content), locations=len(chunk)):
+            data = loads(resp.content)
+    except (request_errors(), ValueError) as e:
+        return [{"error": f"Failed to fetch data: {e}"} for _ in chunk]
+    payloads = data if isinstance(data, list) else [data]
+    out = []
+    for i, (lat, lon) in enumerate(chunk):
+        if i >= len(payloads) or not isinstance(payloads[i], dict) or payloads[i].get('error'):
+            reason = payloads[i].get('reason') if i < len(payloads) and isinstance(payloads[i], dict) else None
+            out.append({"error": f"Failed to fetch data: {reason or 'missing result'}"})
+        else:
+            if config.REPLAY_MODE == 'record':
+                from .replay import replay_store
+                replay_store.record(lat, lon, dumps(payloads[i]).encode())
+            out.append(bundle_from_payload(lat, lon, payloads[i]))
+    return out
+
+
+def fetch_weather_many(points, chunk_size=BATCH_CHUNK_SIZE, max_workers=BATCH_MAX_WORKERS, use_cache=True):
+    """Fetch forecasts for many (lat, lon) points.
+
+    Returns a list aligned with `points`; each item is a bundle shaped like
+    fetch_weather's, or {"error": ...} for that location alone.
+    """
+    results = [None] * len(points)
+    todo = []
+    for i, (latVal, lonVal) in enumerate(points):
+        lat, lon, error = validate_coords(latVal, lonVal)
+        if error:
+            results[i] = {"error": error}
+            continue
+        if use_cache:
+            cached, fresh = forecast_cache.get(lat, lon)
+            if fresh:
+                results[i] = cached
+                continue
+        todo.append((i, lat, lon))
+    chunks = [todo[j:j + chunk_size] for j in range(0, len(todo), chunk_size)]
+    if not chunks:
+        return results
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(chunks)))) as pool:
+        fetched = pool.map(lambda c: _fetch_weather_chunk([(lat, lon) for _, lat, lon in c]), chunks)
+        for chunk, bundles in zip(chunks, fetched):
+            for (i, lat, lon), bundle in zip(chunk, bundles):
+                if use_cache and 'error' not in bundle and config.REPLAY_MODE != 'replay':
+                    forecast_cache.put(lat, lon, bundle)
+                results[i] = bundle
+    return results
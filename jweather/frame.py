@@ -0,0 +1,128 @@
+from array import array
+from bisect import bisect_left
+from datetime import date
+
+# Columnar forecast blocks. Open-Meteo returns hourly/daily data as parallel
+# JSON lists of ISO strings and floats; ForecastFrame keeps the same data as an
+# int64 array of local wall-clock epoch seconds plus one float32 array per
+# variable (NaN marks a missing value), with an O(1) index from calendar day
+# to row range.
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_NAN = float('nan')
+
+
+def iso_to_epoch(text):
+    # 'YYYY-MM-DD' or 'YYYY-MM-DDTHH:MM' in the location's local time
+    secs = (date(int(text[0:4]), int(text[5:7]), int(text[8:10])).toordinal() - _EPOCH_ORDINAL) * 86400
+    if len(text) >= 16:
+        secs += int(text[11:13]) * 3600 + int(text[14:16]) * 60
+    return secs
+
+
+def epoch_to_iso(secs, with_time=True):
+    # Inverse of iso_to_epoch
+    text = date.fromordinal(secs // 86400 + _EPOCH_ORDINAL).isoformat()
+    if with_time:
+        rest = secs % 86400
+        text += f"T{rest // 3600:02d}:{rest % 3600 // 60:02d}"
+    return text
+
+
+def iso_day(text):
+    return iso_to_epoch(text[:10]) // 86400
+
+
+class ForecastFrame:
+    __slots__ = ('times', 'columns', 'units', '_day_index')
+
+    def __init__(self, times=None, columns=None, units=None):
+        self.times = times if times is not None else array('q')
+        self.columns = columns or {}
+        self.units = units or {}
+        self._day_index = None
+
+    @classmethod
+    def from_json(cls, block, units=None):
+        block = block or {}
+        raw_times = block.get('time') or []
+        if raw_times and isinstance(raw_times[0], int):
+            times = array('q', raw_times)
+        else:
+            # Hourly blocks repeat each date 24 times and each hour once a day;
+            # parse both halves once and add them up
+            parts = {'': 0}
+            times = array('q')
+            for t in raw_times:
+                day, _, clock = t.partition('T')
+                secs = parts.get(day)
+                if secs is None:
+                    secs = parts[day] = iso_to_epoch(day)
+                offset = parts.get(clock)
+                if offset is None:
+                    offset = parts[clock] = int(clock[0:2]) * 3600 + int(clock[3:5]) * 60
+                times.append(secs + offset)
+        columns = {}
+        for name, values in block.items():
+            if name == 'time' or not isinstance(values, list):
+                continue
+            try:
+                # The common case has no gaps and converts at C speed
+                columns[name] = array('f', values)
+            except TypeError:
+                columns[name] = array('f', (_NAN if v is None else v for v in values))
+        return cls(times, columns, dict(units or {}))
+
+    def to_json(self):
+        out = {'time': self.times.tolist()}
+        for name, col in self.columns.items():
+            out[name] = [None if v != v else v for v in col]
+        return out
+
+    def to_payload(self, with_time=True):
+        # Open-Meteo's own shape: ISO times, values trimmed back from float32, null for missing
+        out = {'time': [epoch_to_iso(t, with_time) for t in self.times]}
+        for name, col in self.columns.items():
+            out[name] = [None if v != v else float(f"{v:.7g}") for v in col]
+        return out
+
+    def __len__(self):
+        return len(self.times)
+
+    def column(self, name):
+        return self.columns.get(name)
+
+    def as_numpy(self, name):
+        # Zero-copy NumPy view of a column, when NumPy is installed
+        import numpy as np
+        col = self.times if name == 'time' else self.columns[name]
+        return np.frombuffer(col, dtype=np.int64 if name == 'time' else np.float32)
+
+    def day_at(self, i):
+        return self.times[i] // 86400
+
+    def date_at(self, i):
+        return date.fromordinal(self.times[i] // 86400 + _EPOCH_ORDINAL)
+
+    def hour_at(self, i):
+        return (self.times[i] % 86400) // 3600
+
+    def since(self, t):
+        """Return a new frame holding the rows at or after epoch second t."""
+        i = bisect_left(self.times, t)
+        if i == 0:
+            return self
+        return ForecastFrame(self.times[i:], {name: col[i:] for name, col in self.columns.items()}, self.units)
+
+    def day_slice(self, day):
+        """Return the (start, stop) rows for a day number, or None."""
+        if self._day_index is None:
+            index = {}
+            for i, t in enumerate(self.times):
+                d = t // 86400
+                if d in index:
+                    index[d][1] = i + 1
+                else:
+                    index[d] = [i, i + 1]
+            self._day_index = index
+        rng = self._day_index.get(day)
+        return tuple(rng) if rng else None
@@ -0,0 +1,153 @@
+import os
+import json
+import time
+
+from .cache import SQLiteStore
+from . import config
+from .config import GAZETTEER_PATH
+from .transport import http_session, request_errors
+
+# Geocoding store: every place the geocoder has returned is kept on disk,
+# together with the queries that resolved to it. Prefix suggestions are a
+# range scan over an indexed, normalized name column, so type-ahead never
+# touches the network and the file is paged in lazily rather than loaded.
+def normalize_place_query(text):
+    return " ".join(str(text).lower().split())
+
+
+def place_label(place):
+    parts = [place.get('name'), place.get('admin1'), place.get('country')]
+    seen = []
+    for p in parts:
+        if p and p not in seen:
+            seen.append(p)
+    return ", ".join(seen)
+
+
+class GeocodeStore(SQLiteStore):
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS geocode_place ("
+        "label_key TEXT PRIMARY KEY, name_key TEXT, label TEXT, body TEXT)",
+        "CREATE INDEX IF NOT EXISTS geocode_place_name ON geocode_place (name_key)",
+        "CREATE TABLE IF NOT EXISTS geocode_query (query_key TEXT PRIMARY KEY, label_key TEXT, fetched_at REAL)",
+    )
+
+    def __init__(self, path=None):
+        super().__init__(path)
+        self._memo = {}
+
+    def lookup(self, query):
+        """Return the cached place for a query (or a suggestion label), or None."""
+        key = normalize_place_query(query)
+        if not key:
+            return None
+        with self._lock:
+            if key in self._memo:
+                return self._memo[key]
+            if self._db is None:
+                return None
+            try:
+                row = self._db.execute(
+                    "SELECT p.body FROM geocode_query q JOIN geocode_place p ON p.label_key = q.label_key "
+                    "WHERE q.query_key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    row = self._db.execute("SELECT body FROM geocode_place WHERE label_key = ?", (key,)).fetchone()
+            except Exception:
+                row = None
+            place = json.loads(row[0]) if row else None
+            if place is not None:
+                self._memo[key] = place
+            return place
+
+    def remember(self, query, place):
+        label = place_label(place)
+        label_key = normalize_place_query(label)
+        with self._lock:
+            self._memo[normalize_place_query(query)] = place
+            self._memo[label_key] = place
+            if self._db is None:
+                return
+            try:
+                self._add_place(place, label, label_key)
+                self._db.execute(
+                    "INSERT OR REPLACE INTO geocode_query (query_key, label_key, fetched_at) VALUES (?, ?, ?)",
+                    (normalize_place_query(query), label_key, time.time()),
+                )
+                self._db.commit()
+            except Exception:
+                pass
+
+    def _add_place(self, place, label, label_key):
+        self._db.execute(
+            "INSERT OR REPLACE INTO geocode_place (label_key, name_key, label, body) VALUES (?, ?, ?, ?)",
+            (label_key, normalize_place_query(place.get('name') or label), label, json.dumps(place)),
+        )
+
+    def suggest(self, prefix, limit=8):
+        """Return up to `limit` place labels whose name starts with `prefix`."""
+        key = normalize_place_query(prefix)
+        if not key or self._db is None:
+            return []
+        with self._lock:
+            try:
+                # Half-open range over the name index: [key, key + U+FFFF)
+                rows = self._db.execute(
+                    "SELECT label FROM geocode_place WHERE name_key >= ? AND name_key < ? ORDER BY name_key LIMIT ?",
+                    (key, key + "\uffff", limit),
+                ).fetchall()
+            except Exception:
+                return []
+        return [r[0] for r in rows]
+
+    def seed_from_gazetteer(self, path=GAZETTEER_PATH):
+        # Optional offline gazetteer: CSV with name, admin1, country, latitude, longitude columns
+        if self._db is None or not os.path.exists(path):
+            return 0
+        import csv
+        count = 0
+        with self._lock:
+            try:
+                if self._db.execute("SELECT 1 FROM geocode_place LIMIT 1").fetchone():
+                    return 0
+                with open(path, newline='', encoding='utf-8') as fh:
+                    for rec in csv.DictReader(fh):
+                        try:
+                            place = {
+                                'name': rec['name'],
+                                'admin1': rec.get('admin1') or None,
+                                'country': rec.get('country') or None,
+                                'latitude': float(rec['latitude']),
+                                'longitude': float(rec['longitude']),
+                            }
+                        except (KeyError, ValueError):
+                            continue
+                        label = place_label(place)
+                        self._add_place(place, label, normalize_place_query(label))
+                        count += 1
+                self._db.commit()
+            except Exception:
+                pass
+        return count
+
+
+geocode_store = GeocodeStore()
+
+
+def geocode_city(name):
+    place = geocode_store.lookup(name)
+    if place is not None:
+        return place
+    geo_url = config.GEOCODING_URL
+    params = {"name": name, "count": 1, "language": "en", "format": "json"}
+    try:
+        resp = http_session().get(geo_url, params=params, timeout=6)
+        resp.raise_for_status()
+        data = resp.json()
+    except request_errors() as e:
+        return {"error": f"Failed to fetch coordinates: {e}"}
+    results = data.get('results') or []
+    if not results:
+        return {"error": f"No results for '{name}'", "not_found": True}
+    geocode_store.remember(name, results[0])
+    return results[0]
@@ -0,0 +1,185 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from .cache import SQLiteStore
+from .transport import http_session
+
+# IP auto-locate: the historically fastest provider is asked first and the
+# next one is hedged in only if it has not answered within its usual latency
+# (or has failed), one backup at a time with at most LOCATE_HEDGE_WIDTH
+# requests in flight. The first usable answer wins; providers not yet started
+# are never asked, and requests already on the wire are abandoned (bounded by
+# their timeout). The located position is cached so warm starts skip the
+# lookup entirely.
+IP_PROVIDERS = [
+    "https://ipapi.co/json/",
+    "https://ipinfo.io/json",
+    "https://ifconfig.co/json",
+    "https://ipwho.is/",
+]
+IP_PROVIDER_TIMEOUT = 3.5
+LOCATE_BUDGET = 4.0
+LOCATE_HEDGE_MIN = 0.25
+LOCATE_HEDGE_WIDTH = 3
+LOCATE_CACHE_TTL = 12 * 3600
+
+
+def normalize_ip_info(info: dict):
+    city = (info.get('city') or info.get('city_name') or '').strip()
+    lat = info.get('latitude') or info.get('lat')
+    lon = info.get('longitude') or info.get('lon')
+    # Some providers use strings
+    try:
+        lat = float(lat) if lat is not None else None
+        lon = float(lon) if lon is not None else None
+    except Exception:
+        lat, lon = None, None
+    return city, lat, lon
+
+
+def query_ip_provider(url):
+    try:
+        r = http_session().get(url, timeout=IP_PROVIDER_TIMEOUT)
+        if r.status_code != 200:
+            return None
+        info = r.json() or {}
+    except Exception:
+        return None
+    # ipinfo may return loc as "lat,lon"
+    if 'loc' in info and (not info.get('latitude') or not info.get('longitude')):
+        try:
+            parts = str(info['loc']).split(',')
+            if len(parts) == 2:
+                info['latitude'] = float(parts[0])
+                info['longitude'] = float(parts[1])
+        except Exception:
+            pass
+    if 'success' in info and not info.get('success', True):
+        return None
+    return info
+
+
+class LocateStore(SQLiteStore):
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS ip_provider (url TEXT PRIMARY KEY, latency REAL)",
+        "CREATE TABLE IF NOT EXISTS located ("
+        "id INTEGER PRIMARY KEY CHECK (id = 1), city TEXT, lat REAL, lon REAL, located_at REAL)",
+    )
+
+    def __init__(self, path=None):
+        super().__init__(path)
+        self._latency = {}
+
+    def _on_open(self, conn):
+        self._latency.update(conn.execute("SELECT url, latency FROM ip_provider").fetchall())
+
+    def _latencies(self):
+        # Opening the store loads the persisted latencies
+        _ = self._db
+        return self._latency
+
+    def provider_order(self, urls):
+        # Fastest first; providers never seen keep their listed order after known ones
+        latencies = self._latencies()
+        return sorted(urls, key=lambda u: latencies.get(u, IP_PROVIDER_TIMEOUT / 2))
+
+    def hedge_delay(self, url):
+        latency = self._latencies().get(url)
+        if latency is None:
+            return LOCATE_HEDGE_MIN
+        return min(LOCATE_BUDGET / 2, max(LOCATE_HEDGE_MIN, latency * 1.5))
+
+    def record(self, url, elapsed, ok):
+        # Exponentially weighted latency; failures count as a full timeout
+        sample = elapsed if ok else IP_PROVIDER_TIMEOUT
+        with self._lock:
+            prev = self._latencies().get(url)
+            latency = sample if prev is None else prev * 0.7 + sample * 0.3
+            self._latency[url] = latency
+            if self._db is None:
+                return
+            try:
+                self._db.execute("INSERT OR REPLACE INTO ip_provider (url, latency) VALUES (?, ?)", (url, latency))
+                self._db.commit()
+            except Exception:
+                pass
+
+    def cached_location(self, max_age=LOCATE_CACHE_TTL):
+        if self._db is None:
+            return None
+        with self._lock:
+            try:
+                row = self._db.execute("SELECT city, lat, lon, located_at FROM located WHERE id = 1").fetchone()
+            except Exception:
+                row = None
+        if row is None or time.time() - row[3] > max_age:
+            return None
+        return {'city': row[0], 'lat': row[1], 'lon': row[2], 'cached': True}
+
+    def save_location(self, city, lat, lon):
+        if self._db is None:
+            return
+        with self._lock:
+            try:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO located (id, city, lat, lon, located_at) VALUES (1, ?, ?, ?, ?)",
+                    (city, lat, lon, time.time()),
+                )
+                self._db.commit()
+            except Exception:
+                pass
+
+
+locate_store = LocateStore()
+
+
+def locate_by_ip(budget=LOCATE_BUDGET, use_cache=True):
+    """Return {'city', 'lat', 'lon'} for this machine's IP, or None."""
+    if use_cache:
+        cached = locate_store.cached_location()
+        if cached is not None:
+            return cached
+
+    def timed(url):
+        start = time.perf_counter()
+        info = query_ip_provider(url)
+        locate_store.record(url, time.perf_counter() - start, info is not None)
+        return info
+
+    order = locate_store.provider_order(IP_PROVIDERS)
+    # Backups are only submitted when there is a free worker, so nothing queues
+    width = min(LOCATE_HEDGE_WIDTH, len(order))
+    pool = ThreadPoolExecutor(max_workers=width, thread_name_prefix='jweather-locate')
+    deadline = time.monotonic() + budget
+    hedged = list(order)
+    pending = set()
+    hedge_at = time.monotonic()
+    result = None
+    try:
+        while result is None and (pending or hedged):
+            now = time.monotonic()
+            if now >= deadline:
+                break
+            can_hedge = hedged and len(pending) < width
+            if can_hedge and (now >= hedge_at or not pending):
+                url = hedged.pop(0)
+                pending.add(pool.submit(timed, url))
+                hedge_at = now + locate_store.hedge_delay(url)
+                continue
+            wake = min(deadline, hedge_at) if can_hedge else deadline
+            done, pending = wait(pending, timeout=max(0, wake - now), return_when=FIRST_COMPLETED)
+            for fut in done:
+                info = fut.result()
+                if not info:
+                    continue
+                city, lat, lon = normalize_ip_info(info)
+                if (lat is not None and lon is not None) or city:
+                    result = {'city': city, 'lat': lat, 'lon': lon}
+                    break
+    finally:
+        for fut in pending:
+            fut.cancel()
+        pool.shutdown(wait=False, cancel_futures=True)
+    if result is not None:
+        locate_store.save_location(result['city'], result['lat'], result['lon'])
+    return result
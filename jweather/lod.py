@@ -0,0 +1,103 @@
+from array import array
+
+# Level-of-detail series for zoomable charts. A MinMaxPyramid keeps a float
+# series at successive halvings: level 0 is the raw values, level k holds the
+# min and max of each run of 2**k samples (NaN-aware). window() answers "what
+# should a W-pixel-wide line over rows [start, stop) look like" from the
+# coarsest level that still has at least one entry per pixel, so the work per
+# redraw is O(pixels) however long the series is, and peaks are never lost
+# the way plain striding loses them.
+_NAN = float('nan')
+
+
+def _pairs_python(mins, maxs):
+    n = len(mins)
+    out_min = array('f')
+    out_max = array('f')
+    for i in range(0, n - 1, 2):
+        a, b = mins[i], mins[i + 1]
+        out_min.append(a if b != b or a <= b else b)
+        a, b = maxs[i], maxs[i + 1]
+        out_max.append(a if b != b or a >= b else b)
+    if n % 2:
+        out_min.append(mins[-1])
+        out_max.append(maxs[-1])
+    return out_min, out_max
+
+
+def _pairs_numpy(np, mins, maxs):
+    lo = np.frombuffer(mins, dtype=np.float32)
+    hi = np.frombuffer(maxs, dtype=np.float32)
+    even = len(lo) - len(lo) % 2
+    # fmin/fmax skip NaN unless both sides are NaN
+    new_lo = np.fmin(lo[0:even:2], lo[1:even:2])
+    new_hi = np.fmax(hi[0:even:2], hi[1:even:2])
+    if len(lo) % 2:
+        new_lo = np.append(new_lo, lo[-1])
+        new_hi = np.append(new_hi, hi[-1])
+    return array('f', new_lo.astype(np.float32).tobytes()), array('f', new_hi.astype(np.float32).tobytes())
+
+
+class MinMaxPyramid:
+    __slots__ = ('levels',)
+
+    def __init__(self, values):
+        base = values if isinstance(values, array) and values.typecode == 'f' else array('f', values)
+        self.levels = [(base, base)]
+        try:
+            import numpy as np
+            pairs = lambda lo, hi: _pairs_numpy(np, lo, hi)
+        except ImportError:
+            pairs = _pairs_python
+        while len(self.levels[-1][0]) > 1:
+            self.levels.append(pairs(*self.levels[-1]))
+
+    def __len__(self):
+        return len(self.levels[0][0])
+
+    def window(self, start, stop, pixels):
+        """Return [(row, value), ...] drawing rows [start, stop) in about `pixels` columns.
+
+        Zoomed in far enough (no more rows than pixels) the raw samples come
+        back; otherwise each column contributes its min and max. Missing
+        (NaN) samples are left out. Fractional bounds are truncated.
+        """
+        n = len(self)
+        start = max(0, int(start))
+        stop = min(n, int(stop))
+        if stop <= start or pixels <= 0:
+            return []
+        raw = self.levels[0][0]
+        per = (stop - start) / pixels
+        if per <= 2:
+            return [(i, raw[i]) for i in range(start, stop) if raw[i] == raw[i]]
+        level = min(len(self.levels) - 1, max(0, int(per).bit_length() - 1))
+        size = 1 << level
+        mins, maxs = self.levels[level]
+        out = []
+        col = -1
+        lo = hi = _NAN
+        lo_at = hi_at = 0
+        for j in range(start >> level, (stop - 1 >> level) + 1):
+            row = j << level
+            c = int((row - start) / per) if row > start else 0
+            if c != col:
+                if lo == lo:
+                    out.extend(((lo_at, lo), (hi_at, hi)) if lo_at <= hi_at else ((hi_at, hi), (lo_at, lo)))
+                col = c
+                lo = hi = _NAN
+            a, b = mins[j], maxs[j]
+            mid = row + size / 2
+            if a == a and not a >= lo:
+                lo, lo_at = a, mid
+            if b == b and not b <= hi:
+                hi, hi_at = b, mid
+        if lo == lo:
+            out.extend(((lo_at, lo), (hi_at, hi)) if lo_at <= hi_at else ((hi_at, hi), (lo_at, lo)))
+        return out
+
+    def extent(self, start, stop):
+        """Return (min, max) over rows [start, stop), or None when all are missing."""
+        found = self.window(start, stop, 64)
+        values = [v for _, v in found]
+        return (min(values), max(values)) if values else None
@@ -0,0 +1,71 @@
+import time
+
+from .cache import SQLiteStore
+
+# Pinned locations shown on the dashboard and kept fresh by the auto-refresh.
+# The list is small (hundreds at most), so it is mirrored in memory once the
+# store opens and every change is written through to SQLite.
+
+
+class PinStore(SQLiteStore):
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS pinned ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, label TEXT, lat REAL, lon REAL, added_at REAL)",
+    )
+
+    def __init__(self, path=None):
+        super().__init__(path)
+        self._pins = []
+        self._next_id = 1
+
+    def _on_open(self, conn):
+        rows = conn.execute("SELECT id, label, lat, lon FROM pinned ORDER BY id").fetchall()
+        self._pins = [{'id': r[0], 'label': r[1], 'lat': r[2], 'lon': r[3]} for r in rows]
+        self._next_id = max([p['id'] for p in self._pins] + [0]) + 1
+
+    def all(self):
+        with self._lock:
+            _ = self._db
+            return [dict(p) for p in self._pins]
+
+    def find(self, lat, lon):
+        with self._lock:
+            _ = self._db
+            for p in self._pins:
+                if round(p['lat'], 4) == round(float(lat), 4) and round(p['lon'], 4) == round(float(lon), 4):
+                    return dict(p)
+        return None
+
+    def add(self, label, lat, lon):
+        existing = self.find(lat, lon)
+        if existing is not None:
+            return existing
+        with self._lock:
+            pin = {'id': self._next_id, 'label': label, 'lat': float(lat), 'lon': float(lon)}
+            if self._db is not None:
+                try:
+                    cur = self._db.execute(
+                        "INSERT INTO pinned (label, lat, lon, added_at) VALUES (?, ?, ?, ?)",
+                        (label, pin['lat'], pin['lon'], time.time()),
+                    )
+                    self._db.commit()
+                    pin['id'] = cur.lastrowid
+                except Exception:
+                    pass
+            self._next_id = pin['id'] + 1
+            self._pins.append(pin)
+        return dict(pin)
+
+    def remove(self, pin_id):
+        with self._lock:
+            self._pins = [p for p in self._pins if p['id'] != pin_id]
+            if self._db is None:
+                return
+            try:
+                self._db.execute("DELETE FROM pinned WHERE id = ?", (pin_id,))
+                self._db.commit()
+            except Exception:
+                pass
+
+
+pin_store = PinStore()
@@ -0,0 +1,213 @@
+import hashlib
+import time
+import zlib
+from datetime import date
+
+from .bundle import bundle_from_payload
+from .cache import SQLiteStore, forecast_cache
+from .codec import loads
+
+# Record/replay store: every successful forecast body is kept zlib-compressed
+# in its own SQLite file, addressed by the SHA-256 of the raw bytes so
+# identical answers are stored once. Each recording points at a blob and
+# remembers where and when it was fetched. The store backs offline mode (the
+# newest recording for a location, trimmed to the current hour) and, with
+# config.REPLAY_MODE = 'replay', serves as a network-free fixture source.
+REPLAY_KEEP = 3   # recordings kept per location and variable set
+
+
+def trim_to_now(bundle, now=None):
+    """Drop the hours and days of a bundle that already lie in the past."""
+    local = (now or time.time()) + (bundle.get('utc_offset_seconds') or 0)
+    hour_start = int(local // 3600) * 3600
+    today = hour_start // 86400
+    out = dict(bundle)
+    if out.get('hourly') is not None:
+        out['hourly'] = out['hourly'].since(hour_start)
+    if out.get('derived') is not None:
+        out['derived'] = out['derived'].since(hour_start)
+    if out.get('daily') is not None:
+        out['daily'] = out['daily'].since(today * 86400)
+    for key in ('day_stats', 'day_derived'):
+        out[key] = {day: stats for day, stats in (bundle.get(key) or {}).items() if day >= today}
+    return out
+
+
+def rebase_payload(payload, start=None):
+    """Shift a raw payload's dates by whole days so its first day is `start` (default: today)."""
+    times = (payload.get('daily') or {}).get('time') or (payload.get('hourly') or {}).get('time')
+    if not times or not isinstance(times[0], str):
+        return payload
+    delta = (start or date.today()) - date.fromisoformat(times[0][:10])
+    if not delta:
+        return payload
+
+    def shift(text):
+        return (date.fromisoformat(text[:10]) + delta).isoformat() + text[10:]
+
+    out = dict(payload)
+    for block in ('hourly', 'daily', 'current'):
+        if not isinstance(out.get(block), dict):
+            continue
+        out[block] = dict(out[block])
+        t = out[block].get('time')
+        if isinstance(t, list):
+            out[block]['time'] = [shift(v) for v in t]
+        elif isinstance(t, str):
+            out[block]['time'] = shift(t)
+    return out
+
+
+class ReplayStore(SQLiteStore):
+    FILENAME = 'replay.sqlite3'
+    SCHEMA = (
+        "CREATE TABLE IF NOT EXISTS replay_blob (hash TEXT PRIMARY KEY, body BLOB)",
+        "CREATE TABLE IF NOT EXISTS replay_response ("
+        "id INTEGER PRIMARY KEY AUTOINCREMENT, key TEXT, cell TEXT, lat REAL, lon REAL, recorded_at REAL, hash TEXT)",
+        "CREATE INDEX IF NOT EXISTS replay_response_cell ON replay_response (cell, recorded_at)",
+        "CREATE INDEX IF NOT EXISTS replay_response_key ON replay_response (key, recorded_at)",
+    )
+
+    def __init__(self, path=None, keep=REPLAY_KEEP):
+        super().__init__(path)
+        self.keep = keep
+        self._counters = {'recorded': 0, 'deduplicated': 0, 'replayed': 0}
+
+    @staticmethod
+    def _cell(key):
+        # The snapped coordinates part of a forecast cache key
+        return key.split('|', 1)[0]
+
+    def record(self, lat, lon, body, recorded_at=None, views=None):
+        key = forecast_cache.key_for(lat, lon, views)
+        if key is None or self._db is None:
+            return None
+        digest = hashlib.sha256(body).hexdigest()
+        with self._lock:
+            try:
+                db = self._db
+                if db.execute("SELECT 1 FROM replay_blob WHERE hash = ?", (digest,)).fetchone():
+                    self._counters['deduplicated'] += 1
+                else:
+                    db.execute("INSERT INTO replay_blob (hash, body) VALUES (?, ?)", (digest, zlib.compress(body, 6)))
+                db.execute(
+                    "INSERT INTO replay_response (key, cell, lat, lon, recorded_at, hash) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, self._cell(key), float(lat), float(lon), recorded_at or time.time(), digest),
+                )
+                # Keep the newest recordings per key; drop blobs nothing points at any more
+                old = db.execute(
+                    "SELECT id, hash FROM replay_response WHERE key = ? ORDER BY recorded_at DESC LIMIT -1 OFFSET ?",
+                    (key, self.keep),
+                ).fetchall()
+                for row_id, old_hash in old:
+                    db.execute("DELETE FROM replay_response WHERE id = ?", (row_id,))
+                    if not db.execute("SELECT 1 FROM replay_response WHERE hash = ? LIMIT 1", (old_hash,)).fetchone():
+                        db.execute("DELETE FROM replay_blob WHERE hash = ?", (old_hash,))
+                db.commit()
+                self._counters['recorded'] += 1
+            except Exception:
+                return None
+        return digest
+
+    def latest(self, lat, lon, views=None, any_views=False):
+        """Return (raw body, recorded_at) of the newest recording for a location, or None.
+
+        Only recordings made with the same variable set and horizon count; one
+        made for another set would lack fields the caller's views read.
+        any_views takes the newest recording of the location whatever its set
+        (for exporting fixtures).
+        """
+        key = forecast_cache.key_for(lat, lon, views)
+        if key is None or self._db is None:
+            return None
+        with self._lock:
+            try:
+                column, value = ('cell', self._cell(key)) if any_views else ('key', key)
+                row = self._db.execute(
+                    "SELECT b.body, r.recorded_at FROM replay_response r JOIN replay_blob b ON b.hash = r.hash "
+                    f"WHERE r.{column} = ? ORDER BY r.recorded_at DESC LIMIT 1",
+                    (value,),
+                ).fetchone()
+            except Exception:
+                row = None
+        if row is None:
+            return None
+        return zlib.decompress(row[0]), row[1]
+
+    def latest_bundle(self, lat, lon, rebase=False, views=None):
+        found = self.latest(lat, lon, views)
+        if found is None:
+            return None
+        try:
+            payload = loads(found[0])
+        except ValueError:
+            return None
+        if rebase:
+            payload = rebase_payload(payload)
+        self._counters['replayed'] += 1
+        bundle = bundle_from_payload(float(lat), float(lon), payload)
+        if not rebase:
+            bundle['fetched_at'] = found[1]
+        return bundle
+
+    def stats(self):
+        out = dict(self._counters)
+        if self._db is None:
+            return out
+        with self._lock:
+            try:
+                out['responses'] = self._db.execute("SELECT COUNT(*) FROM replay_response").fetchone()[0]
+                out['blobs'], out['compressed_bytes'] = self._db.execute(
+                    "SELECT COUNT(*), COALESCE(SUM(LENGTH(body)), 0) FROM replay_blob"
+                ).fetchone()
+            except Exception:
+                pass
+        return out
+
+    def recordings(self):
+        if self._db is None:
+            return []
+        with self._lock:
+            return self._db.execute(
+                "SELECT lat, lon, recorded_at, hash FROM replay_response ORDER BY recorded_at DESC"
+            ).fetchall()
+
+
+replay_store = ReplayStore()
+
+
+def main(argv=None):
+    import argparse
+    import sys
+    parser = argparse.ArgumentParser(prog='python -m jweather.replay', description="Inspect the recorded-response store.")
+    sub = parser.add_subparsers(dest='command', required=True)
+    sub.add_parser('list', help="recordings, newest first")
+    sub.add_parser('stats', help="counts and compressed size")
+    export = sub.add_parser('export', help="write the newest recording for a location as JSON (a test fixture)")
+    export.add_argument('lat', type=float)
+    export.add_argument('lon', type=float)
+    export.add_argument('output', nargs='?', default='-')
+    args = parser.parse_args(argv)
+
+    if args.command == 'list':
+        for lat, lon, recorded_at, digest in replay_store.recordings():
+            stamp = time.strftime('%Y-%m-%d %H:%M', time.localtime(recorded_at))
+            print(f"{stamp}  {lat:9.4f} {lon:9.4f}  {digest[:12]}")
+    elif args.command == 'stats':
+        for name, value in replay_store.stats().items():
+            print(f"{name}: {value}")
+    else:
+        found = replay_store.latest(args.lat, args.lon, any_views=True)
+        if found is None:
+            print("no recording for that location", file=sys.stderr)
+            return 1
+        if args.output == '-':
+            sys.stdout.buffer.write(found[0])
+        else:
+            with open(args.output, 'wb') as fh:
+                fh.write(found[0])
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
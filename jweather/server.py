@@ -0,0 +1,313 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from .bundle import bundle_to_payload
+from .codec import dumps
+
+# Local forecast proxy: a small asyncio HTTP/1.1 server that speaks the same
+# /v1/forecast and /v1/search shapes as Open-Meteo, so the Tk client (or the
+# batch CLI) can be pointed at it with JWEATHER_FORECAST_URL and
+# JWEATHER_GEOCODING_URL. Forecast requests are honored for the parameters
+# JWeather itself sends (coordinates, current/hourly/daily variables,
+# forecast_days, past_days, timezone=auto); anything else is a 400. A request
+# naming no variables gets JWeather's default set. Identical concurrent requests are coalesced into a
+# single upstream call (singleflight), answers come from the shared forecast
+# cache and geocoding store, and encoded responses are kept until the cache
+# entry behind them expires. Blocking upstream work runs on a small thread pool;
+# the event loop itself only parses requests and writes bytes.
+SERVER_HOST = '127.0.0.1'
+SERVER_PORT = 8765
+SERVER_UPSTREAM_WORKERS = 16
+SERVER_IDLE_TIMEOUT = 30      # seconds a keep-alive connection may sit idle
+SERVER_BACKLOG = 2048
+SERVER_ENCODED_ITEMS = 1024   # encoded responses kept in memory
+SERVER_CACHE_ITEMS = 512      # forecast cache memory tier while serving
+SERVER_MAX_LOCATIONS = 100    # comma-separated locations per request
+SERVER_FORECAST_PARAMS = ('latitude', 'longitude', 'current', 'hourly', 'daily', 'forecast_days', 'past_days', 'timezone')
+# Variables Open-Meteo answers with strings; bundles only hold numeric columns
+SERVER_NON_NUMERIC = ('sunrise', 'sunset')
+
+_REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed', 502: 'Bad Gateway'}
+
+
+def _load_forecast(lat, lon, views=None):
+    # Runs on the upstream pool; encoding happens here too so the event loop
+    # and every coalesced waiter share one serialized body.
+    from .cache import forecast_cache
+    from .forecast import cached_fetch_weather
+    bundle = cached_fetch_weather(lat, lon, views=views)
+    if 'error' in bundle:
+        return 502, json.dumps({"error": True, "reason": bundle['error']}).encode(), None
+    payload = bundle_to_payload(bundle)
+    payload['latitude'] = lat
+    payload['longitude'] = lon
+    body = dumps(payload).encode()
+    if bundle.get('stale'):
+        return 200, body, None
+    return 200, body, forecast_cache.expires_after(bundle.get('fetched_at') or time.time())
+
+
+class ForecastServer:
+    def __init__(self, host=SERVER_HOST, port=SERVER_PORT, upstream_workers=SERVER_UPSTREAM_WORKERS):
+        self.host = host
+        self.port = port
+        self._pool = ThreadPoolExecutor(max_workers=upstream_workers, thread_name_prefix='jweather-upstream')
+        self._server = None
+        self._inflight = {}
+        self._encoded = OrderedDict()
+        self._counters = {
+            'connections': 0, 'open_connections': 0, 'requests': 0, 'upstream_calls': 0,
+            'coalesced': 0, 'encoded_hits': 0, 'not_modified': 0, 'errors': 0,
+        }
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port, backlog=SERVER_BACKLOG)
+        self.port = self._server.sockets[0].getsockname()[1]
+        return self
+
+    async def serve_forever(self):
+        if self._server is None:
+            await self.start()
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+        self._pool.shutdown(wait=False)
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    def stats(self):
+        from .cache import forecast_cache
+        out = dict(self._counters)
+        out['inflight'] = len(self._inflight)
+        out['encoded_items'] = len(self._encoded)
+        out['cache'] = forecast_cache.stats()
+        return out
+
+    # Singleflight: the first caller for a key starts the work, later callers
+    # await the same future until it settles.
+    async def _singleflight(self, key, fn, *args):
+        fut = self._inflight.get(key)
+        if fut is not None:
+            self._counters['coalesced'] += 1
+        else:
+            fut = asyncio.get_running_loop().run_in_executor(self._pool, fn, *args)
+            self._inflight[key] = fut
+            fut.add_done_callback(lambda _: self._inflight.pop(key, None))
+            self._counters['upstream_calls'] += 1
+        # shield: a client hanging up must not cancel the work others wait on
+        return await asyncio.shield(fut)
+
+    def _encoded_get(self, key):
+        entry = self._encoded.get(key)
+        if entry is None:
+            return None
+        if time.time() >= entry[0]:
+            del self._encoded[key]
+            return None
+        self._encoded.move_to_end(key)
+        self._counters['encoded_hits'] += 1
+        return entry[1]
+
+    def _encoded_put(self, key, expires_at, body):
+        self._encoded[key] = (expires_at, body)
+        self._encoded.move_to_end(key)
+        while len(self._encoded) > SERVER_ENCODED_ITEMS:
+            self._encoded.popitem(last=False)
+
+    async def _forecast_one(self, lat, lon, views=None):
+        # Returns (status, encoded body). The key holds the exact coordinates,
+        # which the body echoes, plus the variable set and horizon; other points
+        # in the same cache cell are still answered from the cached forecast.
+        from .cache import forecast_cache
+        key = f"f|{lat!r},{lon!r}|" + forecast_cache.key_for(lat, lon, views)
+        body = self._encoded_get(key)
+        if body is not None:
+            return 200, body
+        status, body, expires_at = await self._singleflight(key, _load_forecast, lat, lon, views)
+        if expires_at is not None and key not in self._encoded:
+            self._encoded_put(key, expires_at, body)
+        return status, body
+
+    def _request_views(self, query):
+        # Returns (views, error): the variable set and horizon the client asked for
+        from .config import request_view
+        for name in query:
+            if name not in SERVER_FORECAST_PARAMS:
+                return None, f"Parameter '{name}' is not supported by this proxy"
+        if query.get('timezone', 'auto') != 'auto':
+            return None, "Only timezone=auto is supported by this proxy"
+        horizon = {}
+        for name in ('forecast_days', 'past_days'):
+            if query.get(name):
+                try:
+                    horizon[name] = int(query[name])
+                except ValueError:
+                    return None, f"Parameter '{name}' must be an integer"
+        blocks = {block: [v for v in query.get(block, '').split(',') if v] for block in ('current', 'hourly', 'daily')}
+        for block, names in blocks.items():
+            for name in names:
+                if name in SERVER_NON_NUMERIC:
+                    return None, f"Variable '{name}' is not supported by this proxy (not numeric)"
+        if not any(blocks.values()):
+            if not horizon:
+                return None, None
+            from . import config
+            blocks = {'current': config.FORECAST_CURRENT, 'hourly': config.FORECAST_HOURLY, 'daily': config.FORECAST_DAILY}
+        view = request_view(**blocks, **horizon)
+        if view is None:
+            return None, "Too many distinct variable sets; try again later"
+        return (view,), None
+
+    async def forecast(self, query):
+        from .forecast import validate_coords
+        views, error = self._request_views(query)
+        if error:
+            return 400, {"error": True, "reason": error}
+        lats = (query.get('latitude') or '').split(',')
+        lons = (query.get('longitude') or '').split(',')
+        if len(lats) != len(lons):
+            return 400, {"error": True, "reason": "latitude and longitude lists differ in length"}
+        if len(lats) > SERVER_MAX_LOCATIONS:
+            return 400, {"error": True, "reason": f"At most {SERVER_MAX_LOCATIONS} locations per request"}
+        points = []
+        for latVal, lonVal in zip(lats, lons):
+            lat, lon, error = validate_coords(latVal, lonVal)
+            if error:
+                return 400, {"error": True, "reason": error}
+            points.append((lat, lon))
+        if len(points) == 1:
+            return await self._forecast_one(*points[0], views)
+        results = await asyncio.gather(*(self._forecast_one(lat, lon, views) for lat, lon in points))
+        # Multi-location answers are a JSON list; a failed site gets an error object in its slot
+        return 200, b'[' + b','.join(body for _, body in results) + b']'
+
+    async def search(self, query):
+        from .geocode import geocode_city, normalize_place_query
+        name = (query.get('name') or '').strip()
+        if not name:
+            return 400, {"error": True, "reason": "Parameter 'name' is required"}
+        place = await self._singleflight('g|' + normalize_place_query(name), geocode_city, name)
+        if place.get('not_found'):
+            return 200, {"generationtime_ms": 0.0}
+        if 'error' in place:
+            return 502, {"error": True, "reason": place['error']}
+        return 200, {"results": [place]}
+
+    async def route(self, method, target):
+        if method != 'GET':
+            return 405, {"error": True, "reason": "Only GET is supported"}
+        url = urlsplit(target)
+        # Lists arrive either comma-separated or as repeated keys
+        query = {k: ",".join(v) for k, v in parse_qs(url.query).items()}
+        if url.path.endswith('/forecast'):
+            return await self.forecast(query)
+        if url.path.endswith('/search'):
+            return await self.search(query)
+        if url.path in ('/stats', '/health'):
+            return 200, self.stats()
+        return 404, {"error": True, "reason": f"No route for {url.path}"}
+
+    async def _handle(self, reader, writer):
+        self._counters['connections'] += 1
+        self._counters['open_connections'] += 1
+        try:
+            while True:
+                try:
+                    head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), SERVER_IDLE_TIMEOUT)
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError, ConnectionError):
+                    break
+                lines = head.decode('latin-1').split('\r\n')
+                parts = lines[0].split(' ')
+                if len(parts) != 3:
+                    break
+                method, target, version = parts
+                headers = {}
+                for line in lines[1:]:
+                    name, sep, value = line.partition(':')
+                    if sep:
+                        headers[name.strip().lower()] = value.strip()
+                length = int(headers.get('content-length') or 0)
+                if length:
+                    await reader.readexactly(length)
+                self._counters['requests'] += 1
+                try:
+                    status, body = await self.route(method, target)
+                except Exception as e:
+                    status, body = 502, {"error": True, "reason": f"Proxy error: {e}"}
+                if status >= 400:
+                    self._counters['errors'] += 1
+                if not isinstance(body, bytes):
+                    body = json.dumps(body).encode()
+                conn = headers.get('connection', '').lower()
+                keep_alive = conn != 'close' if version == 'HTTP/1.1' else conn == 'keep-alive'
+                extra = ''
+                if status == 200:
+                    # Validator for conditional refreshes; an unchanged answer costs no body
+                    etag = '"%s"' % hashlib.blake2b(body, digest_size=8).hexdigest()
+                    extra = f"ETag: {etag}\r\n"
+                    if headers.get('if-none-match') == etag:
+                        status, body = 304, b''
+                        self._counters['not_modified'] += 1
+                writer.write(
+                    f"HTTP/1.1 {status} {_REASONS.get(status, '')}\r\n{extra}"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(body)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode('latin-1') + body
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._counters['open_connections'] -= 1
+            writer.close()
+
+
+def main(argv=None):
+    import argparse
+    from . import config, transport
+    from .cache import forecast_cache
+    parser = argparse.ArgumentParser(prog='python -m jweather.server', description="Local Open-Meteo proxy with request coalescing.")
+    parser.add_argument('--host', default=SERVER_HOST)
+    parser.add_argument('--port', type=int, default=SERVER_PORT)
+    parser.add_argument('--upstream-workers', type=int, default=SERVER_UPSTREAM_WORKERS, help="concurrent upstream requests (default: %(default)s)")
+    parser.add_argument('--forecast-url', help="upstream forecast endpoint (default: Open-Meteo)")
+    parser.add_argument('--geocoding-url', help="upstream geocoding endpoint (default: Open-Meteo)")
+    args = parser.parse_args(argv)
+    if args.forecast_url:
+        config.FORECAST_URL = args.forecast_url
+    if args.geocoding_url:
+        config.GEOCODING_URL = args.geocoding_url
+    workers = max(1, args.upstream_workers)
+    transport.HTTP_POOL_SIZES['forecast'] = max(transport.HTTP_POOL_SIZES['forecast'], workers)
+    transport.HTTP_POOL_SIZES['geocoding'] = max(transport.HTTP_POOL_SIZES['geocoding'], workers)
+    forecast_cache.memory_items = max(forecast_cache.memory_items, SERVER_CACHE_ITEMS)
+
+    server = ForecastServer(args.host, args.port, workers)
+
+    async def serve():
+        await server.start()
+        print(f"jweather proxy on {server.base_url}  (JWEATHER_FORECAST_URL={server.base_url}/v1/forecast)", flush=True)
+        await server.serve_forever()
+
+    try:
+        asyncio.run(serve())
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,8 @@
+# Light colors, shared by every window
+primary_bg = "#f7f7fa"   # light neutral background
+surface_bg = "#ffffff"    # cards
+border_color = "#dcdde1"
+accent = "#007aff"        # iOS blue
+text_color = "#1c1c1e"
+subtle_text = "#6b7280"
+accent_text = "#ffffff"
@@ -0,0 +1,158 @@
+import functools
+import os
+import threading
+import time
+from collections import deque
+
+# In-process span recorder. Hot paths wrap their work in `with span('name'):`;
+# finished spans go into a fixed-size ring buffer as (name, start_ns, dur_ns,
+# thread id, attrs) tuples. While tracing is off span() hands back one shared
+# no-op context manager, so an instrumented call costs a function call and a
+# dict lookup. Turn it on with JWEATHER_TRACE=1, enable(), or the app's debug
+# panel (Ctrl+Shift+D).
+TRACE_BUFFER = 20000
+_trace = {
+    'enabled': os.environ.get('JWEATHER_TRACE', '') not in ('', '0'),
+    'spans': deque(maxlen=TRACE_BUFFER),
+}
+_PID = os.getpid()
+
+
+class _NoopSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def set(self, **attrs):
+        pass
+
+
+_NOOP = _NoopSpan()
+
+
+class _Span:
+    __slots__ = ('name', 'attrs', 'start')
+
+    def __init__(self, name, attrs):
+        self.name = name
+        self.attrs = attrs
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, *exc):
+        if exc_type is not None:
+            self.attrs['error'] = exc_type.__name__
+        _trace['spans'].append((self.name, self.start, time.perf_counter_ns() - self.start,
+                                threading.get_ident(), self.attrs))
+        return False
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+
+def span(name, **attrs):
+    if not _trace['enabled']:
+        return _NOOP
+    return _Span(name, attrs)
+
+
+def traced(name):
+    # Decorator form of span()
+    def wrap(fn):
+        @functools.wraps(fn)
+        def inner(*args, **kwargs):
+            if not _trace['enabled']:
+                return fn(*args, **kwargs)
+            with _Span(name, {}):
+                return fn(*args, **kwargs)
+        return inner
+    return wrap
+
+
+def record(name, start_ns, dur_ns, **attrs):
+    # For durations measured elsewhere (perf_counter_ns clock)
+    if _trace['enabled']:
+        _trace['spans'].append((name, start_ns, dur_ns, threading.get_ident(), attrs))
+
+
+def enabled():
+    return _trace['enabled']
+
+
+def enable(on=True):
+    _trace['enabled'] = bool(on)
+
+
+def clear():
+    _trace['spans'].clear()
+
+
+def spans():
+    return list(_trace['spans'])
+
+
+def _percentile(ordered, q):
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summary():
+    """Return {name: {'count', 'total_ms', 'p50', 'p95', 'p99', 'max'}} over the buffered spans (ms)."""
+    durations = {}
+    for name, _, dur, _, _ in spans():
+        durations.setdefault(name, []).append(dur)
+    out = {}
+    for name, values in durations.items():
+        values.sort()
+        out[name] = {
+            'count': len(values),
+            'total_ms': sum(values) / 1e6,
+            'p50': _percentile(values, 0.50) / 1e6,
+            'p95': _percentile(values, 0.95) / 1e6,
+            'p99': _percentile(values, 0.99) / 1e6,
+            'max': values[-1] / 1e6,
+        }
+    return out
+
+
+def chrome_trace():
+    # Trace Event Format ("X" complete events, microseconds); opens in
+    # chrome://tracing and Perfetto
+    events = []
+    for name, start, dur, tid, attrs in spans():
+        event = {'name': name, 'ph': 'X', 'ts': start / 1000, 'dur': dur / 1000, 'pid': _PID, 'tid': tid}
+        if attrs:
+            event['args'] = {k: v if isinstance(v, (int, float, str, bool)) or v is None else str(v)
+                             for k, v in attrs.items()}
+        events.append(event)
+    return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+
+def export_chrome(path):
+    import json
+    with open(path, 'w', encoding='utf-8') as fh:
+        json.dump(chrome_trace(), fh)
+    return path
+
+
+def export_otel(tracer=None):
+    # Replays the buffer as OpenTelemetry spans; requires opentelemetry-api
+    # (and an SDK with an exporter configured by the caller)
+    from opentelemetry import trace as otel
+    tracer = tracer or otel.get_tracer('jweather')
+    # Span starts are perf_counter_ns; map them onto the wall clock
+    offset = time.time_ns() - time.perf_counter_ns()
+    count = 0
+    for name, start, dur, tid, attrs in spans():
+        s = tracer.start_span(name, start_time=start + offset)
+        s.set_attribute('thread.id', tid)
+        for k, v in attrs.items():
+            s.set_attribute(k, v if isinstance(v, (int, float, str, bool)) else str(v))
+        s.end(end_time=start + offset + dur)
+        count += 1
+    return count
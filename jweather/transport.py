@@ -0,0 +1,166 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+from . import config
+from .trace import enabled as tracing, record, span
+
+# Shared HTTP transport: one pooled session for the whole app so repeat calls
+# to the same host reuse a kept-alive connection instead of a fresh TCP+TLS
+# handshake. Open-Meteo hosts get jittered exponential backoff on 429/5xx
+# (honoring Retry-After); the IP providers used for auto-locate do not retry,
+# since only the fastest answer matters there. requests is only imported when
+# the first session is built.
+HTTP_POOL_SIZES = {
+    'forecast': 8,
+    'geocoding': 4,
+    'archive': 2,
+}
+HTTP_DEFAULT_POOL_SIZE = 4
+HTTP_RETRY_AFTER_MAX = 10  # seconds; never sleep longer than this on Retry-After
+_http = {'session': None, 'adapter_cls': None}
+_http_lock = threading.Lock()
+
+
+def _retry_policy():
+    from urllib3.util.retry import Retry
+
+    class _CappedRetry(Retry):
+        def get_retry_after(self, response):
+            retry_after = super().get_retry_after(response)
+            return None if retry_after is None else min(retry_after, HTTP_RETRY_AFTER_MAX)
+
+    kwargs = dict(
+        total=3, connect=2, read=0, status=3,
+        backoff_factor=0.4,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(["GET"]),
+        respect_retry_after_header=True,
+        raise_on_status=False,
+    )
+    try:
+        return _CappedRetry(backoff_jitter=0.3, **kwargs)
+    except TypeError:
+        # urllib3 < 2 has no jitter knob
+        return _CappedRetry(**kwargs)
+
+
+def _adapter_cls():
+    # HTTPAdapter whose pools hand out traced connections. Spans: http.connect
+    # (DNS + TCP, resolved inside urllib3), http.tls, http.request (send until
+    # the response headers are in) and http.transfer (body read + decompress).
+    if _http['adapter_cls'] is not None:
+        return _http['adapter_cls']
+    from requests.adapters import HTTPAdapter
+    from urllib3.connection import HTTPConnection, HTTPSConnection
+    from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+    class _TracedHTTPConnection(HTTPConnection):
+        def _new_conn(self):
+            with span('http.connect', host=self.host):
+                return super()._new_conn()
+
+    class _TracedHTTPSConnection(HTTPSConnection):
+        def _new_conn(self):
+            start = time.perf_counter_ns()
+            try:
+                return super()._new_conn()
+            finally:
+                self._tcp_done = time.perf_counter_ns()
+                record('http.connect', start, self._tcp_done - start, host=self.host)
+
+        def connect(self):
+            self._tcp_done = None
+            super().connect()
+            if self._tcp_done is not None and tracing():
+                record('http.tls', self._tcp_done, time.perf_counter_ns() - self._tcp_done, host=self.host)
+
+    class _TracedHTTPPool(HTTPConnectionPool):
+        ConnectionCls = _TracedHTTPConnection
+
+    class _TracedHTTPSPool(HTTPSConnectionPool):
+        ConnectionCls = _TracedHTTPSConnection
+
+    class _TracedAdapter(HTTPAdapter):
+        def init_poolmanager(self, *args, **kwargs):
+            super().init_poolmanager(*args, **kwargs)
+            self.poolmanager.pool_classes_by_scheme = {'http': _TracedHTTPPool, 'https': _TracedHTTPSPool}
+
+        def send(self, request, stream=False, **kwargs):
+            if not tracing():
+                return super().send(request, stream=stream, **kwargs)
+            with span('http.request', host=urlsplit(request.url).hostname) as s:
+                resp = super().send(request, stream=stream, **kwargs)
+                s.set(status=resp.status_code)
+            if not stream:
+                with span('http.transfer', host=urlsplit(request.url).hostname) as s:
+                    s.set(bytes=len(resp.content))
+            return resp
+
+    _http['adapter_cls'] = _TracedAdapter
+    return _TracedAdapter
+
+
+def _accept_encoding():
+    encodings = ["gzip", "deflate"]
+    for mod in ("brotli", "brotlicffi"):
+        try:
+            __import__(mod)
+            encodings.append("br")
+            break
+        except ImportError:
+            pass
+    return ", ".join(encodings)
+
+
+def _origin(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}/"
+
+
+def http_session():
+    with _http_lock:
+        if _http['session'] is None:
+            import requests
+            HTTPAdapter = _adapter_cls()
+            session = requests.Session()
+            session.headers.update({"Accept-Encoding": _accept_encoding(), "User-Agent": "JWeather"})
+            default = HTTPAdapter(pool_connections=8, pool_maxsize=HTTP_DEFAULT_POOL_SIZE, max_retries=0)
+            session.mount("https://", default)
+            session.mount("http://", default)
+            for url, size in ((config.FORECAST_URL, HTTP_POOL_SIZES['forecast']),
+                              (config.GEOCODING_URL, HTTP_POOL_SIZES['geocoding']),
+                              (config.ARCHIVE_URL, HTTP_POOL_SIZES['archive'])):
+                session.mount(_origin(url), HTTPAdapter(pool_connections=1, pool_maxsize=size, max_retries=_retry_policy()))
+            _http['session'] = session
+        return _http['session']
+
+
+def request_errors():
+    # Exception class to catch around http_session() calls
+    import requests
+    return requests.RequestException
+
+
+def http_stats():
+    # Connections opened (= handshakes) vs requests sent, per host
+    session = _http['session']
+    hosts = {}
+    if session is not None:
+        for adapter in set(session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None:
+                    continue
+                entry = hosts.setdefault(pool.host, {'connections': 0, 'requests': 0})
+                entry['connections'] += pool.num_connections
+                entry['requests'] += pool.num_requests
+    connections = sum(h['connections'] for h in hosts.values())
+    reqs = sum(h['requests'] for h in hosts.values())
+    return {
+        'hosts': hosts,
+        'handshakes': connections,
+        'requests': reqs,
+        'reuse_rate': (1 - connections / reqs) if reqs else 0.0,
+    }